@@ -0,0 +1,77 @@
+"""Benchmark bulk comment inserts, ids checked one by one (the old gen_random_id) against grant.utils.ids.
+
+Seeds a scratch database with comments (see pagination.py), then times inserting --inserts more through the ORM,
+in transactions of --batch, and counts the SELECTs each way.
+
+    python benchmarks/ids.py postgresql://localhost/grant_bench --proposals 5000 --inserts 5000
+
+The target database is wiped and re-created, never point this at real data.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from pagination import seed, capture_statements  # noqa: E402, the sibling benchmark
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('database_url', help='Scratch database to seed, it will be wiped')
+    parser.add_argument('--proposals', type=int, default=5000, help='Number of proposals to seed, 10 comments each')
+    parser.add_argument('--inserts', type=int, default=5000, help='Comments to insert each way')
+    parser.add_argument('--batch', type=int, default=1, help='Comments per transaction, 1 like the comment endpoint')
+    return parser.parse_args()
+
+
+def legacy_gen_random_id(model):
+    # what grant.utils.misc.gen_random_id did
+    random_id = random.randint(100000, pow(2, 31) - 1)
+    if model.query.filter_by(id=random_id).first():
+        return legacy_gen_random_id(model)
+    return random_id
+
+
+def insert_comments(db, count, batch, num_proposals):
+    from grant.comment.models import Comment
+
+    for i in range(0, count, batch):
+        for _ in range(min(batch, count - i)):
+            db.session.add(Comment(random.randint(1, num_proposals), 1, None, 'A benchmark comment'))
+        db.session.commit()
+
+
+def run(db, name, args):
+    start = time.perf_counter()
+    statements = capture_statements(db, lambda: insert_comments(db, args.inserts, args.batch, args.proposals))
+    elapsed = time.perf_counter() - start
+    print(f'  {elapsed:8.2f}s  {args.inserts / elapsed:9.1f}/s  {len(statements):7} SELECTs  {name}')
+
+
+def main():
+    args = parse_args()
+    os.environ['DATABASE_URL'] = args.database_url
+
+    from grant.app import create_app
+    from grant.extensions import db
+
+    app = create_app()
+    app.config['SQLALCHEMY_DATABASE_URI'] = args.database_url
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        print(f'Seeding {args.proposals} proposals...')
+        seed(db, args.proposals)
+
+        print(f'\nInserting {args.inserts} comments, {args.batch} per transaction:')
+        with patch('grant.comment.models.gen_random_id', legacy_gen_random_id):
+            run(db, 'SELECT per id', args)
+        run(db, 'reserved blocks', args)
+
+
+if __name__ == '__main__':
+    main()
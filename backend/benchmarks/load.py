@@ -0,0 +1,123 @@
+"""Load test the web process under gunicorn.conf.py, with 1, 2, 4... workers.
+
+For each worker count, starts gunicorn on the current environment (.env, DATABASE_URL etc), then reports
+- throughput of a public read, GET /api/v1/proposals/ with the response cache off, and
+- how many of a burst of POST /api/v1/users/auth got past its "5/minute" limit, spread over the workers.
+
+    python benchmarks/load.py --workers 1 2 4 --storage redis://localhost:6379/15
+
+Throughput should grow with the worker count while the auth requests let through stay at 5. With the
+default --storage memory:// every worker counts for itself and up to 5 per worker get through.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+BACKEND = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
+# SSLify redirects plain http otherwise
+HEADERS = {'X-Forwarded-Proto': 'https', 'Content-Type': 'application/json'}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4], help='Worker counts to compare')
+    parser.add_argument('--storage', default='memory://', help='RATELIMIT_STORAGE_URL for the run')
+    parser.add_argument('--port', type=int, default=5099)
+    parser.add_argument('--clients', type=int, default=32, help='Concurrent clients')
+    parser.add_argument('--duration', type=float, default=10, help='Seconds to run the read test for')
+    parser.add_argument('--burst', type=int, default=50, help='Auth requests to send at once')
+    return parser.parse_args()
+
+
+def request(url, data=None):
+    body = json.dumps(data).encode('utf-8') if data is not None else None
+    req = urllib.request.Request(url, data=body, headers=HEADERS, method='POST' if body else 'GET')
+    try:
+        with urllib.request.urlopen(req, timeout=30) as res:
+            res.read()
+            return res.status
+    except urllib.error.HTTPError as e:
+        return e.code
+
+
+def wait_until_up(url, proc):
+    for _ in range(100):
+        if proc.poll() is not None:
+            sys.exit('gunicorn exited, see its output above')
+        try:
+            request(url)
+            return
+        except urllib.error.URLError:
+            time.sleep(0.2)
+    sys.exit('gunicorn did not start')
+
+
+def start(workers, args):
+    env = {
+        **os.environ,
+        'PORT': str(args.port),
+        'WEB_CONCURRENCY': str(workers),
+        'RATELIMIT_STORAGE_URL': args.storage,
+        'CACHE_TYPE': 'null',
+    }
+    return subprocess.Popen(
+        ['gunicorn', '-c', 'gunicorn.conf.py', '--access-logfile', '/dev/null', 'grant.app:create_app()'],
+        cwd=BACKEND,
+        env=env,
+    )
+
+
+def throughput(url, clients, duration):
+    deadline = time.perf_counter() + duration
+
+    def client():
+        count = 0
+        while time.perf_counter() < deadline:
+            if request(url) == 200:
+                count += 1
+        return count
+
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        total = sum(pool.map(lambda _: client(), range(clients)))
+    return total / duration
+
+
+def burst(url, count, clients):
+    data = {'email': 'load-test@example.com', 'password': 'not-the-password'}
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        statuses = list(pool.map(lambda _: request(url, data), range(count)))
+    return sum(1 for s in statuses if s != 429)
+
+
+def main():
+    args = parse_args()
+    base = f'http://127.0.0.1:{args.port}/api/v1'
+    if args.storage.startswith('redis://'):
+        import redis
+        # clean slate, otherwise the previous run's auth requests count against this one
+        redis.StrictRedis.from_url(args.storage).flushdb()
+
+    print(f'rate limit storage: {args.storage}\n')
+    print('  workers     req/s   auth let through (limit 5/minute)')
+    for workers in args.workers:
+        proc = start(workers, args)
+        try:
+            wait_until_up(f'{base}/proposals/', proc)
+            rps = throughput(f'{base}/proposals/', args.clients, args.duration)
+            allowed = burst(f'{base}/users/auth', args.burst, args.clients)
+            print(f'  {workers:7}  {rps:8.1f}   {allowed}')
+        finally:
+            proc.terminate()
+            proc.wait()
+        if args.storage.startswith('redis://'):
+            redis.StrictRedis.from_url(args.storage).flushdb()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,298 @@
+"""Benchmark the grant.utils.pagination queries against a seeded database.
+
+Seeds a scratch database, then reports timings and query plans for each
+pagination class, first without and then with the secondary indexes.
+
+    python benchmarks/pagination.py postgresql://localhost/grant_bench --proposals 20000
+
+The target database is wiped and re-created, never point this at real data.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+CHUNK_SIZE = 5000
+INDEXED_TABLES = ['proposal', 'proposal_contribution', 'comment', 'milestone', 'task']
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('database_url', help='Scratch database to seed, it will be wiped')
+    parser.add_argument('--proposals', type=int, default=10000, help='Number of proposals to seed')
+    parser.add_argument('--repeat', type=int, default=20, help='Runs per query, the median is reported')
+    parser.add_argument('--no-plans', action='store_true', help='Only report timings')
+    return parser.parse_args()
+
+
+def insert(db, model, rows):
+    for i in range(0, len(rows), CHUNK_SIZE):
+        db.session.execute(model.__table__.insert(), rows[i:i + CHUNK_SIZE])
+    db.session.commit()
+
+
+def seed(db, num_proposals):
+    from grant.ccr.models import CCR
+    from grant.comment.models import Comment
+    from grant.milestone.models import Milestone
+    from grant.proposal.models import Proposal, ProposalContribution
+    from grant.task.models import Task
+    from grant.user.models import User
+    from grant.utils.enums import ProposalStatus, ProposalStage, Category, ContributionStatus, MilestoneStage, \
+        CCRStatus
+
+    now = datetime.now()
+    num_users = max(num_proposals // 2, 100)
+    # most rows that get paginated publicly are LIVE, make the filters selective like they are in production
+    proposal_statuses = [ProposalStatus.LIVE] * 6 + ProposalStatus.list()
+
+    def ago(max_days):
+        return now - timedelta(minutes=random.randint(0, max_days * 24 * 60))
+
+    insert(db, User, [{
+        'id': i,
+        'email_address': f'bench{i}@example.com',
+        'password': 'x',
+        'display_name': f'Bench User {i}',
+        'active': True,
+        'is_admin': False,
+        'silenced': random.random() < 0.01,
+        'banned': random.random() < 0.01,
+    } for i in range(1, num_users + 1)])
+
+    insert(db, Proposal, [{
+        'id': i,
+        'date_created': ago(730),
+        'date_published': ago(700),
+        'status': random.choice(proposal_statuses),
+        'stage': random.choice(ProposalStage.list()),
+        'category': random.choice(Category.list()),
+        'title': f'Bench Proposal {i}',
+        'brief': 'A benchmark proposal',
+        'content': '# Benchmark',
+        'target': '100',
+        'payout_address': 'z',
+        'contribution_matching': 0,
+        'contribution_bounty': '0',
+        'contributed_total': '0',
+        'staked_total': '0',
+    } for i in range(1, num_proposals + 1)])
+
+    insert(db, Milestone, [{
+        'proposal_id': p,
+        'index': i,
+        'date_created': ago(700),
+        'title': f'Milestone {i}',
+        'content': 'Milestone content',
+        'payout_percent': '33',
+        'stage': random.choice(MilestoneStage.list()),
+    } for p in range(1, num_proposals + 1) for i in range(3)])
+
+    insert(db, ProposalContribution, [{
+        'proposal_id': random.randint(1, num_proposals),
+        'user_id': random.randint(1, num_users),
+        'date_created': ago(700),
+        'status': random.choice(ContributionStatus.list()),
+        'amount': str(random.randint(1, 10000) / 100),
+        'staking': random.random() < 0.1,
+        'private': False,
+    } for _ in range(num_proposals * 10)])
+
+    comments = []
+    for i in range(1, num_proposals * 10 + 1):
+        proposal_id = random.randint(1, num_proposals)
+        parent = random.choice([c for c in comments[-20:] if c['proposal_id'] == proposal_id] or [None])
+        comments.append({
+            'id': i,
+            'proposal_id': proposal_id,
+            'parent_comment_id': parent['id'] if parent else None,
+            'user_id': random.randint(1, num_users),
+            'date_created': ago(700),
+            'content': 'A benchmark comment',
+            'hidden': random.random() < 0.02,
+            'reported': random.random() < 0.02,
+        })
+    insert(db, Comment, comments)
+
+    insert(db, CCR, [{
+        'user_id': random.randint(1, num_users),
+        'date_created': ago(700),
+        'title': 'Bench CCR',
+        'status': random.choice(CCRStatus.list()),
+    } for _ in range(max(num_proposals // 5, 1))])
+
+    insert(db, Task, [{
+        'job_type': 1,
+        'blob': {'proposal_id': random.randint(1, num_proposals)},
+        'execute_after': ago(365) + timedelta(days=30),
+        'completed': random.random() < 0.95,
+        'attempts': 0,
+    } for _ in range(num_proposals * 5)])
+
+
+def make_cases():
+    from grant.comment.models import Comment
+    from grant.extensions import ma
+    from grant.proposal.models import Proposal, ProposalContribution
+    from grant.task.worker import due_tasks
+    from grant.user.models import User
+    from grant.utils import pagination
+    from grant.utils.enums import ProposalStatus
+    from sqlalchemy import func
+
+    # dump only ids so the timings & plans are for the pagination queries, not relationship loading
+    class IdSchema(ma.Schema):
+        class Meta:
+            fields = ("id",)
+
+    ids_schema = IdSchema(many=True)
+    # the proposal with the most contributions, a worst case for a detail page
+    busiest = ProposalContribution.query \
+        .with_entities(ProposalContribution.proposal_id) \
+        .group_by(ProposalContribution.proposal_id) \
+        .order_by(func.count().desc()) \
+        .first()[0]
+
+    return [
+        ('ProposalPagination: LIVE, newest', lambda: pagination.proposal(
+            schema=ids_schema,
+            query=Proposal.query.filter_by(status=ProposalStatus.LIVE),
+        )),
+        ('ProposalPagination: LIVE WIP, page 5', lambda: pagination.proposal(
+            schema=ids_schema,
+            query=Proposal.query.filter_by(status=ProposalStatus.LIVE),
+            page=5,
+            filters=['STAGE_WIP'],
+        )),
+        ('ProposalPagination: admin, milestone REQUESTED', lambda: pagination.proposal(
+            schema=ids_schema,
+            filters=['STATUS_LIVE', 'MILESTONE_REQUESTED'],
+        )),
+        ('ContributionPagination: proposal CONFIRMED', lambda: pagination.contribution(
+            schema=ids_schema,
+            query=ProposalContribution.query.filter_by(proposal_id=busiest, staking=False),
+            filters=['STATUS_CONFIRMED'],
+            sort='CREATED:DESC',
+        )),
+        ('CommentPagination: proposal threads', lambda: pagination.comment(
+            schema=ids_schema,
+            query=Comment.query.filter_by(proposal_id=busiest, parent_comment_id=None, hidden=False),
+        )),
+        ('CommentPagination: admin REPORTED', lambda: pagination.comment(
+            schema=ids_schema,
+            filters=['REPORTED'],
+        )),
+        ('CCRPagination: LIVE', lambda: pagination.ccr(
+            schema=ids_schema,
+            filters=['STATUS_LIVE'],
+        )),
+        ('UserPagination: BANNED', lambda: pagination.user(
+            schema=ids_schema,
+            query=User.query,
+            filters=['BANNED'],
+        )),
+        # not a pagination class, but polled constantly by the task workers. Only the locking SELECT, claiming
+        # commits updates that would change what the next run scans
+        ('task worker: select due tasks', lambda: due_tasks(limit=8).all()),
+    ]
+
+
+def capture_statements(db, fn):
+    from sqlalchemy import event
+
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        fn()
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+    return [s for s in statements if s[0].lstrip().upper().startswith('SELECT')]
+
+
+def explain(db, statement, parameters):
+    prefix = 'EXPLAIN ANALYZE ' if db.engine.dialect.name == 'postgresql' else 'EXPLAIN QUERY PLAN '
+    connection = db.engine.raw_connection()
+    try:
+        cursor = connection.cursor()
+        cursor.execute(prefix + statement, parameters)
+        return ['    ' + ' '.join(str(c) for c in row) for row in cursor.fetchall()]
+    finally:
+        connection.close()
+
+
+def time_case(db, fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+        db.session.rollback()
+    return statistics.median(timings)
+
+
+def run_cases(db, cases, repeat, plans):
+    results = {}
+    for name, fn in cases:
+        results[name] = time_case(db, fn, repeat)
+        print(f'  {results[name]:8.2f}ms  {name}')
+        if plans:
+            for statement, parameters in capture_statements(db, fn):
+                print('\n'.join(explain(db, statement, parameters)))
+            db.session.rollback()
+    return results
+
+
+def analyze(db):
+    # refresh planner statistics so the plans reflect the seeded data
+    db.session.execute('ANALYZE')
+    db.session.commit()
+
+
+def main():
+    args = parse_args()
+    os.environ['DATABASE_URL'] = args.database_url
+
+    from grant.app import create_app
+    from grant.extensions import db
+
+    app = create_app()
+    app.config['SQLALCHEMY_DATABASE_URI'] = args.database_url
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        print(f'Seeding {args.proposals} proposals...')
+        start = time.perf_counter()
+        seed(db, args.proposals)
+        print(f'Seeded in {time.perf_counter() - start:.1f}s')
+
+        indexes = [i for t in INDEXED_TABLES for i in db.metadata.tables[t].indexes]
+        cases = make_cases()
+
+        for index in indexes:
+            index.drop(bind=db.engine)
+        analyze(db)
+        print('\nWithout indexes:')
+        before = run_cases(db, cases, args.repeat, not args.no_plans)
+
+        for index in indexes:
+            index.create(bind=db.engine)
+        analyze(db)
+        print('\nWith indexes:')
+        after = run_cases(db, cases, args.repeat, not args.no_plans)
+
+        print('\nSummary (median ms):')
+        for name, _ in cases:
+            print(f'  {before[name]:8.2f} -> {after[name]:8.2f}  ({before[name] / after[name]:.1f}x)  {name}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,177 @@
+"""Benchmark admin/public search, the old ILIKE filters against grant.utils.search.
+
+Seeds a scratch database with comments (and a few users & proposals to hang them on), then
+reports p50/p95 latency of each search, by substring match and by search_vector.
+
+    python benchmarks/search.py postgresql://localhost/grant_bench --comments 100000
+
+The target database is wiped and re-created, never point this at real data.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from pagination import insert  # noqa: E402, the sibling benchmark
+
+WORDS = [
+    'zcash', 'shielded', 'wallet', 'sapling', 'grant', 'milestone', 'payout', 'android', 'ios', 'library',
+    'documentation', 'translation', 'community', 'meetup', 'hardware', 'privacy', 'audit', 'explorer', 'node',
+    'mining', 'research', 'protocol', 'education', 'video', 'podcast', 'design', 'website', 'integration',
+]
+# searches as typed into the admin & proposal search boxes
+SEARCHES = ['wallet', 'shielded wallet', 'audit', 'transl', 'podcast episode', 'zcash hardware node']
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('database_url', help='Scratch database to seed, it will be wiped')
+    parser.add_argument('--comments', type=int, default=100000, help='Number of comments to seed')
+    parser.add_argument('--repeat', type=int, default=50, help='Runs per search, for the percentiles')
+    return parser.parse_args()
+
+
+def sentence(length):
+    return ' '.join(random.choice(WORDS) for _ in range(length)).capitalize() + '.'
+
+
+def seed(db, num_comments):
+    from grant.comment.models import Comment
+    from grant.proposal.models import Proposal
+    from grant.user.models import User
+    from grant.utils.enums import ProposalStatus, ProposalStage, Category
+
+    now = datetime.now()
+    num_users = max(num_comments // 100, 10)
+    num_proposals = max(num_comments // 50, 10)
+
+    insert(db, User, [{
+        'id': i,
+        'email_address': f'bench{i}@example.com',
+        'password': 'x',
+        'display_name': f'Bench {random.choice(WORDS)} {i}',
+        'active': True,
+        'is_admin': False,
+    } for i in range(1, num_users + 1)])
+
+    insert(db, Proposal, [{
+        'id': i,
+        'date_created': now,
+        'status': ProposalStatus.LIVE,
+        'stage': ProposalStage.WIP,
+        'category': random.choice(Category.list()),
+        'title': sentence(4),
+        'brief': sentence(10),
+        'content': '\n\n'.join(sentence(40) for _ in range(5)),
+        'target': '100',
+        'payout_address': 'z',
+        'contribution_matching': 0,
+        'contribution_bounty': '0',
+        'contributed_total': '0',
+        'staked_total': '0',
+    } for i in range(1, num_proposals + 1)])
+
+    insert(db, Comment, [{
+        'id': i,
+        'proposal_id': random.randint(1, num_proposals),
+        'user_id': random.randint(1, num_users),
+        'date_created': now - timedelta(minutes=i),
+        'content': ' '.join(sentence(random.randint(5, 30)) for _ in range(random.randint(1, 4))),
+        'hidden': False,
+        'reported': False,
+    } for i in range(1, num_comments + 1)])
+
+
+def percentiles(timings):
+    timings = sorted(timings)
+    return statistics.median(timings), timings[int(len(timings) * 0.95) - 1]
+
+
+def time_search(db, fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+        db.session.rollback()
+    return percentiles(timings)
+
+
+def make_cases():
+    from grant.comment.models import Comment
+    from grant.extensions import ma
+    from grant.proposal.models import Proposal
+    from grant.utils import pagination
+
+    class IdSchema(ma.Schema):
+        class Meta:
+            fields = ("id",)
+
+    ids_schema = IdSchema(many=True)
+
+    def ilike_comments(search):
+        # what CommentPagination did before search_vector
+        query = Comment.query.filter(Comment.content.ilike(f'%{search}%')).order_by(Comment.date_created.desc())
+        return query.paginate(1, 10, False)
+
+    def ilike_proposals(search):
+        query = Proposal.query.filter(Proposal.title.ilike(f'%{search}%')).order_by(Proposal.date_published.desc())
+        return query.paginate(1, 9, False)
+
+    cases = []
+    for search in SEARCHES:
+        cases.extend([
+            (f'comments ILIKE      "{search}"', lambda s=search: ilike_comments(s)),
+            (f'comments search     "{search}"', lambda s=search: pagination.comment(schema=ids_schema, search=s)),
+            (f'comments relevance  "{search}"',
+             lambda s=search: pagination.comment(schema=ids_schema, search=s, sort='RELEVANCE')),
+            (f'proposals ILIKE     "{search}"', lambda s=search: ilike_proposals(s)),
+            (f'proposals relevance "{search}"',
+             lambda s=search: pagination.proposal(schema=ids_schema, search=s, sort='RELEVANCE')),
+        ])
+    return cases
+
+
+def main():
+    args = parse_args()
+    os.environ['DATABASE_URL'] = args.database_url
+
+    from grant.app import create_app
+    from grant.ccr.models import CCR
+    from grant.comment.models import Comment
+    from grant.extensions import db
+    from grant.proposal.models import Proposal
+    from grant.user.models import User
+    from grant.utils.search import rebuild_search_vectors
+
+    app = create_app()
+    app.config['SQLALCHEMY_DATABASE_URI'] = args.database_url
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        print(f'Seeding {args.comments} comments...')
+        start = time.perf_counter()
+        seed(db, args.comments)
+        print(f'Seeded in {time.perf_counter() - start:.1f}s')
+
+        # bulk inserts skip the ORM, index them the way `flask rebuild-search-index` would
+        start = time.perf_counter()
+        for model in [Proposal, Comment, User, CCR]:
+            rebuild_search_vectors(model)
+        db.session.execute('ANALYZE')
+        db.session.commit()
+        print(f'Indexed in {time.perf_counter() - start:.1f}s\n')
+
+        print('     p50 ms     p95 ms')
+        for name, fn in make_cases():
+            p50, p95 = time_search(db, fn, args.repeat)
+            print(f'  {p50:9.2f}  {p95:9.2f}  {name}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+"""Benchmark serializing a page of proposals, the old animalify + jsonify path against grant.utils.json_encoder.
+
+Seeds a scratch database (see pagination.py), dumps the public proposal list page and then reports p50/p95 of
+turning it into a response body: snake_case dicts through animalify & jsonify as before, and the camelCase
+schema output through camelize & each JSON_ENCODER.
+
+    python benchmarks/serialization.py postgresql://localhost/grant_bench --page-size 50
+
+The target database is wiped and re-created, never point this at real data.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from pagination import seed  # noqa: E402, the sibling benchmark
+
+# about the size of a real proposal's markdown
+CONTENT = '\n\n'.join(['## Milestone details\n\n' + 'Lorem ipsum dolor sit amet, consectetur adipiscing. ' * 20] * 8)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('database_url', help='Scratch database to seed, it will be wiped')
+    parser.add_argument('--page-size', type=int, default=50, help='Proposals per page')
+    parser.add_argument('--repeat', type=int, default=200, help='Runs per case, for the percentiles')
+    return parser.parse_args()
+
+
+def percentiles(timings):
+    timings = sorted(timings)
+    return statistics.median(timings), timings[int(len(timings) * 0.95) - 1]
+
+
+def time_case(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return percentiles(timings)
+
+
+def make_cases(app, page):
+    from animal_case import animalify
+    from flask import jsonify
+
+    from grant.utils.camel_case import camelize, snakeize
+    from grant.utils.json_encoder import json_response
+
+    # what views returned before the schemas emitted camelCase, plain dicts all the way down
+    snake_page = snakeize(dict(page))
+
+    def with_encoder(name):
+        def run():
+            app.config['JSON_ENCODER'] = name
+            return json_response(camelize(page))
+        return run
+
+    return [
+        ('animalify + jsonify', lambda: jsonify(animalify(snake_page))),
+        ('camelize + json', with_encoder('json')),
+        ('camelize + orjson', with_encoder('orjson')),
+    ]
+
+
+def main():
+    args = parse_args()
+    os.environ['DATABASE_URL'] = args.database_url
+
+    from grant.app import create_app
+    from grant.extensions import db
+    from grant.proposal.models import Proposal, proposals_schema
+    from grant.utils import pagination
+
+    app = create_app()
+    app.config['SQLALCHEMY_DATABASE_URI'] = args.database_url
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        print(f'Seeding {args.page_size * 10} proposals...')
+        seed(db, args.page_size * 10)
+        Proposal.query.update({'content': CONTENT, 'brief': CONTENT[:140]})
+        db.session.commit()
+
+    with app.test_request_context('/api/v1/proposals/'):
+        paginator = pagination.ProposalPagination()
+        paginator.PAGE_SIZE = args.page_size
+        start = time.perf_counter()
+        page = paginator.paginate(schema=proposals_schema, filters=['STATUS_LIVE'])
+        print(f'Dumped {len(page["items"])} proposals in {(time.perf_counter() - start) * 1000:.1f}ms\n')
+
+        print('     p50 ms     p95 ms  bytes')
+        for name, fn in make_cases(app, page):
+            p50, p95 = time_case(fn, args.repeat)
+            print(f'  {p50:9.2f}  {p95:9.2f}  {len(fn().get_data()):5}  {name}')
+
+
+if __name__ == '__main__':
+    main()
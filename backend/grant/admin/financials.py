@@ -0,0 +1,157 @@
+import time
+from datetime import datetime
+from decimal import Decimal, ROUND_HALF_DOWN
+
+from sqlalchemy import and_, case, cast, event, extract, func, literal_column
+from sqlalchemy.orm import Session
+
+from grant.extensions import db
+from grant.milestone.models import Milestone
+from grant.proposal.models import Proposal
+from grant.utils.enums import MilestoneStage, ProposalStage
+from grant.utils.money import AMOUNT_SCALE, PERCENT_SCALE
+
+START_YEAR = 2019
+CACHE_TTL = 60  # seconds, milestones being paid out also clear it (see below)
+
+cache = {
+    'financials': None,
+    'expires': 0,
+}
+
+
+def invalidate_financials():
+    cache['financials'] = None
+
+
+def get_financials():
+    if not cache['financials'] or cache['expires'] < time.time():
+        cache['financials'] = calculate_financials()
+        cache['expires'] = time.time() + CACHE_TTL
+    return cache['financials']
+
+
+@event.listens_for(Milestone.stage, 'set')
+def flag_milestone_paid(target, value, oldvalue, initiator):
+    if value == MilestoneStage.PAID and oldvalue != MilestoneStage.PAID:
+        db.session.info['financials_changed'] = True
+
+
+@event.listens_for(Session, 'after_commit')
+def invalidate_on_commit(session):
+    if session.info.pop('financials_changed', False):
+        invalidate_financials()
+
+
+def dec(value):
+    return (Decimal(value) if value else Decimal(0)).normalize()
+
+
+def calculate_payouts():
+    # every v2 milestone's payout, bucketed by stage, and by the month paid out for PAID ones
+    # the columns hold basis points & zatoshi (see grant.utils.money), so the product is scaled back down
+    amount = func.sum(
+        cast(Milestone.payout_percent, db.Numeric) * cast(Proposal.target, db.Numeric) /
+        literal_column(f'{10 ** (PERCENT_SCALE + AMOUNT_SCALE + 2)}.0'),
+        type_=db.Numeric(),
+    )
+    bucket = case([
+        (Milestone.stage == MilestoneStage.ACCEPTED, 'due'),  # accepted but not yet marked as paid
+        (Milestone.stage == MilestoneStage.PAID, 'paid'),  # all paid milestones regardless of proposal status/stage
+        (and_(
+            Milestone.stage.in_([MilestoneStage.IDLE, MilestoneStage.REJECTED, MilestoneStage.REQUESTED]),
+            Proposal.stage.in_([ProposalStage.WIP, ProposalStage.COMPLETED]),
+        ), 'future'),  # expected payments
+    ])
+    rows = db.session.query(
+        bucket.label('bucket'),
+        extract('year', Milestone.date_paid).label('paid_year'),
+        extract('month', Milestone.date_paid).label('paid_month'),
+        amount,
+    ) \
+        .join(Proposal, Milestone.proposal_id == Proposal.id) \
+        .filter(Proposal.version == '2') \
+        .group_by(literal_column('bucket'), literal_column('paid_year'), literal_column('paid_month')) \
+        .all()
+
+    totals = {'due': Decimal(0), 'paid': Decimal(0), 'future': Decimal(0)}
+    by_quarter = {
+        year: {q: Decimal(0) for q in range(1, 5)}
+        for year in range(START_YEAR, datetime.now().year + 1)
+    }
+    for bucket, year, month, amount in rows:
+        if not bucket or not amount:
+            continue
+        totals[bucket] += amount
+        if bucket == 'paid' and year and int(year) in by_quarter:
+            by_quarter[int(year)][(int(month) - 1) // 3 + 1] += amount
+    return totals, by_quarter
+
+
+def calculate_grants():
+    grants = {
+        'total': '0',
+        'matching': '0',
+        'bounty': '0',
+    }
+
+    def add_str_dec(a: str, b: str):
+        return str((Decimal(a) + Decimal(b)).quantize(Decimal('0.001'), rounding=ROUND_HALF_DOWN))
+
+    # CANCELED proposals excluded, though they could have had milestones paid out with grant funds
+    proposals = db.session.query(
+        Proposal.target,
+        Proposal.contributed_total,
+        Proposal.contribution_matching,
+        Proposal.contribution_bounty,
+    ) \
+        .filter(Proposal.version == '2') \
+        .filter(Proposal.stage.in_([ProposalStage.WIP, ProposalStage.COMPLETED])) \
+        .all()
+
+    for target, contributed, contribution_matching, contribution_bounty in proposals:
+        # matching
+        matching = Decimal(contributed) * Decimal(contribution_matching)
+        remaining = max(Decimal(target) - Decimal(contributed), Decimal('0.0'))
+        if matching > remaining:
+            matching = remaining
+
+        # bounty
+        bounty = Decimal(contribution_bounty)
+        remaining = max(Decimal(target) - (matching + Decimal(contributed)), Decimal('0.0'))
+        if bounty > remaining:
+            bounty = remaining
+
+        grants['matching'] = add_str_dec(grants['matching'], matching)
+        grants['bounty'] = add_str_dec(grants['bounty'], bounty)
+        grants['total'] = add_str_dec(grants['total'], matching + bounty)
+
+    return grants
+
+
+def calculate_financials():
+    totals, by_quarter = calculate_payouts()
+    po_due = dec(totals['due'])
+    po_paid = dec(totals['paid'])
+    po_future = dec(totals['future'])
+
+    payouts_by_quarter = {}
+    for year, quarters in by_quarter.items():
+        payouts_by_quarter[f"{year}"] = {}
+        year_total = 0
+        for quarter, amount in quarters.items():
+            payouts = dec(amount)
+            payouts_by_quarter[f"{year}"][f"q{quarter}"] = str(payouts)
+            year_total += payouts
+        payouts_by_quarter[f"{year}"]["year_total"] = str(year_total)
+
+    return {
+        'grants': calculate_grants(),
+        'payouts': {
+            'total': str(po_due + po_paid + po_future),
+            'due': str(po_due),
+            'paid': str(po_paid),
+            'future': str(po_future),
+        },
+        'payouts_by_quarter': payouts_by_quarter,
+    }
@@ -1,17 +1,17 @@
 from datetime import datetime
-from decimal import Decimal, ROUND_HALF_DOWN
+from decimal import Decimal
 from functools import reduce
 
 from flask import Blueprint, request
 from marshmallow import fields, validate
-from sqlalchemy import func, or_, text
+from sqlalchemy import func, or_
 
 import grant.utils.admin as admin
 import grant.utils.auth as auth
 from grant.ccr.models import CCR, ccrs_schema, ccr_schema
 from grant.comment.models import Comment, user_comments_schema, admin_comments_schema, admin_comment_schema
 from grant.email.send import generate_email, send_email
-from grant.extensions import db
+from grant.extensions import db, response_cache
 from grant.milestone.models import Milestone
 from grant.parser import body, query, paginated_fields
 from grant.proposal.models import (
@@ -23,6 +23,7 @@ from grant.proposal.models import (
     user_proposal_contributions_schema,
     admin_proposal_contribution_schema,
     admin_proposal_contributions_schema,
+    PROPOSAL_LOADERS,
 )
 from grant.rfp.models import RFP, admin_rfp_schema, admin_rfps_schema
 from grant.user.models import User, UserSettings, admin_users_schema, admin_user_schema
@@ -37,7 +38,9 @@ from grant.utils.enums import (
     CCRStatus
 )
 from grant.utils.misc import make_url, make_explore_url
+from grant.utils.requests import blockchain_client
 from .example_emails import example_email_args
+from .financials import get_financials
 
 blueprint = Blueprint('admin', __name__, url_prefix='/api/v1/admin')
 
@@ -182,6 +185,20 @@ def stats():
     }
 
 
+@blueprint.route("/cache", methods=["GET"])
+@admin.admin_auth_required
+def cache_stats():
+    # hits & misses per cached endpoint, shared by all workers with the redis backend
+    return response_cache.stats()
+
+
+@blueprint.route("/blockchain", methods=["GET"])
+@admin.admin_auth_required
+def blockchain_stats():
+    # watcher client circuit & latencies, per worker
+    return blockchain_client.stats()
+
+
 # USERS
 
 
@@ -200,12 +217,13 @@ def delete_user(user_id):
 @blueprint.route("/users", methods=["GET"])
 @query(paginated_fields)
 @admin.admin_auth_required
-def get_users(page, filters, search, sort):
+def get_users(page, filters, search, sort, cursor):
     filters_workaround = request.args.getlist('filters[]')
     page = pagination.user(
         schema=admin_users_schema,
         query=User.query,
         page=page,
+        cursor=cursor,
         filters=filters_workaround,
         search=search,
         sort=sort,
@@ -219,7 +237,9 @@ def get_user(id):
     user_db = User.query.filter(User.id == id).first()
     if user_db:
         user = admin_user_schema.dump(user_db)
-        user_proposals = Proposal.query.filter(Proposal.team.any(id=user['userid'])).all()
+        user_proposals = Proposal.query.options(*PROPOSAL_LOADERS['list']) \
+            .filter(Proposal.team.any(id=user['userid'])) \
+            .all()
         user['proposals'] = proposals_schema.dump(user_proposals)
         user_comments = Comment.get_by_user(user_db)
         user['comments'] = user_comments_schema.dump(user_comments)
@@ -333,12 +353,14 @@ def set_arbiter(proposal_id, user_id):
 @blueprint.route("/proposals", methods=["GET"])
 @query(paginated_fields)
 @admin.admin_auth_required
-def get_proposals(page, filters, search, sort):
+def get_proposals(page, filters, search, sort, cursor):
     filters_workaround = request.args.getlist('filters[]')
     page = pagination.proposal(
         schema=proposals_schema,
-        query=Proposal.query.filter(Proposal.status.notin_([ProposalStatus.ARCHIVED])),
+        query=Proposal.query.options(*PROPOSAL_LOADERS['admin']) \
+            .filter(Proposal.status.notin_([ProposalStatus.ARCHIVED])),
         page=page,
+        cursor=cursor,
         filters=filters_workaround,
         search=search,
         sort=sort,
@@ -349,7 +371,7 @@ def get_proposals(page, filters, search, sort):
 @blueprint.route('/proposals/<id>', methods=['GET'])
 @admin.admin_auth_required
 def get_proposal(id):
-    proposal = Proposal.query.filter(Proposal.id == id).first()
+    proposal = Proposal.query.options(*PROPOSAL_LOADERS['detail']).filter(Proposal.id == id).first()
     if proposal:
         return proposal_schema.dump(proposal)
     return {"message": f"Could not find proposal with id {id}"}, 404
@@ -558,12 +580,13 @@ def get_email_example(type):
 @blueprint.route("/ccrs", methods=["GET"])
 @query(paginated_fields)
 @admin.admin_auth_required
-def get_ccrs(page, filters, search, sort):
+def get_ccrs(page, filters, search, sort, cursor):
     filters_workaround = request.args.getlist('filters[]')
     page = pagination.ccr(
         schema=ccrs_schema,
         query=CCR.query,
         page=page,
+        cursor=cursor,
         filters=filters_workaround,
         search=search,
         sort=sort,
@@ -740,10 +763,11 @@ def delete_rfp(rfp_id):
 @blueprint.route('/contributions', methods=['GET'])
 @query(paginated_fields)
 @admin.admin_auth_required
-def get_contributions(page, filters, search, sort):
+def get_contributions(page, filters, search, sort, cursor):
     filters_workaround = request.args.getlist('filters[]')
     page = pagination.contribution(
         page=page,
+        cursor=cursor,
         schema=admin_proposal_contributions_schema,
         filters=filters_workaround,
         search=search,
@@ -774,6 +798,8 @@ def create_contribution(proposal_id, user_id, status, amount, tx_id):
     db.session.add(contribution)
     db.session.flush()
 
+    contribution.proposal.update_funding_totals()
+
     # TODO: should this stay?
     contribution.proposal.set_pending_when_ready()
 
@@ -806,6 +832,7 @@ def edit_contribution(contribution_id, proposal_id, user_id, status, amount, tx_
     if not contribution:
         return {"message": "No contribution matching that id"}, 404
     had_refund = contribution.refund_tx_id
+    previous_proposal = contribution.proposal
 
     # do not allow editing certain fields on contributions once a proposal has become funded
     if (proposal_id or user_id or status or amount or tx_id) and contribution.proposal.is_funded:
@@ -847,8 +874,14 @@ def edit_contribution(contribution_id, proposal_id, user_id, status, amount, tx_
     db.session.add(contribution)
     db.session.flush()
 
+    # any edited field can move the stored totals, so recalculate from the contributions
+    proposal = Proposal.query.filter(Proposal.id == contribution.proposal_id).first()
+    proposal.update_funding_totals()
+    if previous_proposal.id != proposal.id:
+        previous_proposal.update_funding_totals()
+
     # TODO: should this stay?
-    contribution.proposal.set_pending_when_ready()
+    proposal.set_pending_when_ready()
 
     db.session.commit()
     return admin_proposal_contribution_schema.dump(contribution), 200
@@ -860,10 +893,11 @@ def edit_contribution(contribution_id, proposal_id, user_id, status, amount, tx_
 @blueprint.route('/comments', methods=['GET'])
 @body(paginated_fields)
 @admin.admin_auth_required
-def get_comments(page, filters, search, sort):
+def get_comments(page, filters, search, sort, cursor):
     filters_workaround = request.args.getlist('filters[]')
     page = pagination.comment(
         page=page,
+        cursor=cursor,
         filters=filters_workaround,
         search=search,
         sort=sort,
@@ -898,144 +932,4 @@ def edit_comment(comment_id, hidden, reported):
 @blueprint.route("/financials", methods=["GET"])
 @admin.admin_auth_required
 def financials():
-    nfmt = '999999.99999999'  # smallest unit of ZEC
-
-    def sql_pc(where: str):
-        return f"SELECT SUM(TO_NUMBER(amount, '{nfmt}')) FROM proposal_contribution WHERE {where}"
-
-    def sql_pc_p(where: str):
-        return f'''
-            SELECT SUM(TO_NUMBER(amount, '{nfmt}'))
-                FROM proposal_contribution as pc
-                INNER JOIN proposal as p ON pc.proposal_id = p.id
-                LEFT OUTER JOIN "user" as u ON pc.user_id = u.id
-				LEFT OUTER JOIN user_settings as us ON u.id = us.user_id
-                WHERE {where}
-        '''
-
-    def sql_ms(where: str):
-        return f'''
-            SELECT SUM(TO_NUMBER(ms.payout_percent, '999')/100 * TO_NUMBER(p.target, '999999.99999999'))
-                FROM milestone as ms
-                INNER JOIN proposal as p ON ms.proposal_id = p.id
-                WHERE p.version = '2' AND {where}
-        '''
-
-    def ex(sql: str):
-        res = db.engine.execute(text(sql))
-        return [row[0] if row[0] else Decimal(0) for row in res][0].normalize()
-
-    def gen_quarter_date_range(year, quarter):
-        if quarter == 1:
-            return f"{year}-1-1", f"{year}-3-31"
-        if quarter == 2:
-            return f"{year}-4-1", f"{year}-6-30"
-        if quarter == 3:
-            return f"{year}-7-1", f"{year}-9-30"
-        if quarter == 4:
-            return f"{year}-10-1", f"{year}-12-31"
-
-    # contributions = {
-    #     'total': str(ex(sql_pc("status = 'CONFIRMED' AND staking = FALSE"))),
-    #     'staking': str(ex(sql_pc("status = 'CONFIRMED' AND staking = TRUE"))),
-    #     'funding': str(ex(sql_pc_p("pc.status = 'CONFIRMED' AND pc.staking = FALSE AND p.stage = 'FUNDING_REQUIRED'"))),
-    #     'funded': str(
-    #         ex(sql_pc_p("pc.status = 'CONFIRMED' AND pc.staking = FALSE AND p.stage in ('WIP', 'COMPLETED')"))),
-    #     # should have a refund_address
-    #     'refunding': str(ex(sql_pc_p(
-    #         '''
-    #         pc.status = 'CONFIRMED' AND
-    #         pc.staking = FALSE AND
-    #         pc.refund_tx_id IS NULL AND
-    #         p.stage IN ('CANCELED', 'FAILED') AND
-    #         us.refund_address IS NOT NULL
-    #         '''
-    #     ))),
-    #     # here we don't care about current refund_address of user, just that there has been a refund_tx_id
-    #     'refunded': str(ex(sql_pc_p(
-    #         '''
-    #         pc.status = 'CONFIRMED' AND
-    #         pc.staking = FALSE AND
-    #         pc.refund_tx_id IS NOT NULL AND
-    #         p.stage IN ('CANCELED', 'FAILED')
-    #         '''
-    #     ))),
-    #     # if there is no user, or the user hasn't any refund_address
-    #     'donations': str(ex(sql_pc_p(
-    #         '''
-    #         pc.status = 'CONFIRMED' AND
-    #         pc.staking = FALSE AND
-    #         pc.refund_tx_id IS NULL AND
-    #         (pc.user_id IS NULL OR us.refund_address IS NULL) AND
-    #         p.stage IN ('CANCELED', 'FAILED')
-    #         '''
-    #     ))),
-    #     'gross': str(ex(sql_pc_p("pc.status = 'CONFIRMED' AND pc.refund_tx_id IS NULL"))),
-    # }
-
-    po_due = ex(sql_ms("ms.stage = 'ACCEPTED'"))  # payments accepted but not yet marked as paid
-    po_paid = ex(sql_ms("ms.stage = 'PAID'"))  # will catch paid ms from all proposals regardless of status/stage
-    # expected payments
-    po_future = ex(sql_ms("ms.stage IN ('IDLE', 'REJECTED', 'REQUESTED') AND p.stage IN ('WIP', 'COMPLETED')"))
-    po_total = po_due + po_paid + po_future
-
-    now = datetime.now()
-    start_year = 2019
-    end_year = now.year
-
-    payouts_by_quarter = {}
-
-    for year in range(start_year, end_year + 1):
-        payouts_by_quarter[f"{year}"] = {}
-        year_total = 0
-
-        for quarter in range(1, 5):
-            begin, end = gen_quarter_date_range(year, quarter)
-            payouts = ex(sql_ms(f"ms.stage = 'PAID' AND (ms.date_paid BETWEEN '{begin}' AND '{end}')"))
-            payouts_by_quarter[f"{year}"][f"q{quarter}"] = str(payouts)
-            year_total += payouts
-
-        payouts_by_quarter[f"{year}"]["year_total"] = str(year_total)
-
-    payouts = {
-        'total': str(po_total),
-        'due': str(po_due),
-        'paid': str(po_paid),
-        'future': str(po_future),
-    }
-
-    grants = {
-        'total': '0',
-        'matching': '0',
-        'bounty': '0',
-    }
-
-    def add_str_dec(a: str, b: str):
-        return str((Decimal(a) + Decimal(b)).quantize(Decimal('0.001'), rounding=ROUND_HALF_DOWN))
-
-    proposals = Proposal.query.filter_by(version='2')
-
-    for p in proposals:
-        # CANCELED proposals excluded, though they could have had milestones paid out with grant funds
-        if p.stage in [ProposalStage.WIP, ProposalStage.COMPLETED]:
-            # matching
-            matching = Decimal(p.contributed) * Decimal(p.contribution_matching)
-            remaining = max(Decimal(p.target) - Decimal(p.contributed), Decimal('0.0'))
-            if matching > remaining:
-                matching = remaining
-
-            # bounty
-            bounty = Decimal(p.contribution_bounty)
-            remaining = max(Decimal(p.target) - (matching + Decimal(p.contributed)), Decimal('0.0'))
-            if bounty > remaining:
-                bounty = remaining
-
-            grants['matching'] = add_str_dec(grants['matching'], matching)
-            grants['bounty'] = add_str_dec(grants['bounty'], bounty)
-            grants['total'] = add_str_dec(grants['total'], matching + bounty)
-
-    return {
-        'grants': grants,
-        'payouts': payouts,
-        'payouts_by_quarter': payouts_by_quarter
-    }
+    return get_financials()
@@ -4,16 +4,18 @@ import logging
 import traceback
 
 import sentry_sdk
-from animal_case import animalify
 from flask import Flask, Response, jsonify, request, current_app, g
 from flask_cors import CORS
 from flask_security import SQLAlchemyUserDatastore
 from flask_sslify import SSLify
+from jinja2 import FileSystemBytecodeCache
 from sentry_sdk.integrations.flask import FlaskIntegration
 from sentry_sdk.integrations.logging import LoggingIntegration
+from werkzeug.middleware.proxy_fix import ProxyFix
 
 from grant import (
     commands,
+    blockchain,
     proposal,
     user,
     ccr,
@@ -26,17 +28,23 @@ from grant import (
     e2e,
     home
 )
-from grant.extensions import bcrypt, migrate, db, ma, security, limiter
+from grant.email.send import commit_late_emails
+from grant.extensions import bcrypt, migrate, db, ma, security, limiter, response_cache
 from grant.settings import SENTRY_RELEASE, ENV, E2E_TESTING, DEBUG, CORS_DOMAINS
 from grant.utils.auth import AuthException, handle_auth_error, get_authed_user
+from grant.utils.camel_case import camelize
+from grant.utils.etag import set_etag
 from grant.utils.exceptions import ValidationException
+from grant.utils.json_encoder import json_response
+from grant.utils.pagination import PaginationException
+from grant.utils.requests import blockchain_client
 
 
 class JSONResponse(Response):
     @classmethod
     def force_type(cls, rv, environ=None):
         if isinstance(rv, dict) or isinstance(rv, list) or isinstance(rv, tuple):
-            rv = jsonify(animalify(rv))
+            rv = json_response(camelize(rv))
         elif rv is None:
             rv = jsonify(data=None), 204
 
@@ -51,9 +59,19 @@ def create_app(config_objects=["grant.settings"]):
 
     @app.after_request
     def send_emails(response):
-        if 'email_sender' in g:
-            # starting email sender
-            g.email_sender.start()
+        # commit emails queued after the view's last commit, unless the request failed
+        if response.status_code < 400 and commit_late_emails():
+            if E2E_TESTING:
+                # e2e tests pick up the last email immediately, send it without a worker
+                from grant.email.outbox import send_pending_emails
+                send_pending_emails()
+        return response
+
+    @app.after_request
+    def send_etag(response):
+        # computed by grant.utils.etag.conditional before the view ran
+        if g.get('etag') and response.status_code == 200:
+            set_etag(response)
         return response
 
     # Return validation errors
@@ -61,6 +79,10 @@ def create_app(config_objects=["grant.settings"]):
     def handle_validation_error(err):
         return jsonify({"message": str(err)}), 400
 
+    @app.errorhandler(PaginationException)
+    def handle_pagination_error(err):
+        return jsonify({"message": str(err)}), 400
+
     @app.errorhandler(422)
     @app.errorhandler(400)
     def handle_error(err):
@@ -98,7 +120,13 @@ def create_app(config_objects=["grant.settings"]):
 
     for conf in config_objects:
         app.config.from_object(conf)
+    app.jinja_options = {
+        **app.jinja_options,
+        'bytecode_cache': FileSystemBytecodeCache(app.config.get('JINJA_BYTECODE_CACHE_DIR')),
+    }
     app.url_map.strict_slashes = False
+    if app.config.get('PROXY_FIX_X_FOR'):
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=app.config['PROXY_FIX_X_FOR'], x_proto=1)
     register_extensions(app)
     register_blueprints(app)
     register_shellcontext(app)
@@ -134,6 +162,8 @@ def register_extensions(app):
     migrate.init_app(app, db)
     ma.init_app(app)
     limiter.init_app(app)
+    response_cache.init_app(app)
+    blockchain_client.init_app(app)
     user_datastore = SQLAlchemyUserDatastore(db, user.models.User, user.models.Role)
     security.init_app(app, datastore=user_datastore, register_blueprint=False)
 
@@ -178,9 +208,16 @@ def register_commands(app):
     app.cli.add_command(commands.clean)
     app.cli.add_command(commands.urls)
     app.cli.add_command(commands.reset_db_chain_data)
+    app.cli.add_command(commands.rebuild_search_index)
+    app.cli.add_command(commands.rebuild_counters)
     app.cli.add_command(proposal.commands.create_proposal)
     app.cli.add_command(proposal.commands.create_proposals)
     app.cli.add_command(proposal.commands.retire_v1_proposals)
+    app.cli.add_command(proposal.commands.rebuild_funding_totals)
     app.cli.add_command(user.commands.set_admin)
     app.cli.add_command(user.commands.mangle_users)
     app.cli.add_command(task.commands.create_task)
+    app.cli.add_command(task.commands.run_worker)
+    app.cli.add_command(email.commands.run_email_worker)
+    app.cli.add_command(email.commands.requeue_dead_emails)
+    app.cli.add_command(blockchain.commands.sync_blockchain)
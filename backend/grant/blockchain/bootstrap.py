@@ -1,33 +1,120 @@
+"""
+Tells the blockchain watcher which contributions to look out for, see `flask sync-blockchain`.
+
+Without a checkpoint (or with --full) every pending contribution of the last 24h is sent to /bootstrap, in pages of
+CHUNK_SIZE. Otherwise only those created since the last sync are sent to /sync, along with the latest confirmed
+transaction & height. The watcher answers the last page with its heights, or with bootstrapRequired if it doesn't
+have the state to resume from, which falls back to a full bootstrap.
+
+Watchers from before /sync and pages 404 on /sync, and don't answer with `paged`, so would take each page as the
+whole bootstrap. They get a full bootstrap as one request instead, like before.
+"""
 from datetime import datetime, timedelta
 
+from grant.extensions import db
 from grant.proposal.models import ProposalContribution
 from grant.utils.requests import blockchain_post
 from grant.utils.enums import ContributionStatus
+from grant.utils.exceptions import BlockchainNotFound
+from .models import BlockchainSync
 
+CHUNK_SIZE = 500
 
-def make_bootstrap_data():
-    pending_contributions = ProposalContribution.query \
+
+def pending_contribution_ids(since=None):
+    """Ids of the pending contributions (created after `since`), a page at a time."""
+    query = db.session.query(ProposalContribution.id) \
         .filter_by(status=ContributionStatus.PENDING) \
-        .filter(ProposalContribution.date_created + timedelta(hours=24) > datetime.now()) \
-        .all()
+        .filter(ProposalContribution.date_created > datetime.now() - timedelta(hours=24))
+    if since:
+        query = query.filter(ProposalContribution.date_created > since)
+    last_id = 0
+    while True:
+        ids = [id for (id,) in query.filter(ProposalContribution.id > last_id)
+               .order_by(ProposalContribution.id)
+               .limit(CHUNK_SIZE)
+               .all()]
+        if not ids:
+            return
+        yield ids
+        last_id = ids[-1]
+
+
+def latest_confirmed_tx_id():
     latest_contribution = ProposalContribution.query \
         .filter_by(status=ContributionStatus.CONFIRMED) \
         .order_by(ProposalContribution.date_created.desc()) \
         .first()
-    serialized_pending_contributions = list(map(lambda c: {"id": c.id}, pending_contributions))
+    return latest_contribution.tx_id if latest_contribution else None
+
+
+def make_bootstrap_data(checkpoint, full):
+    """The requests to send the watcher, as (path, data) pairs."""
+    path = '/bootstrap' if full else '/sync'
+    data = {
+        "latestTxId": checkpoint.latest_tx_id or latest_confirmed_tx_id(),
+        "height": checkpoint.height,
+    }
+    if not full:
+        data["since"] = int(checkpoint.date_synced.timestamp())
+
+    pages = pending_contribution_ids(None if full else checkpoint.date_synced)
+    ids, i = next(pages, []), 0
+    while True:
+        # a page ahead, to flag the last one
+        next_ids = next(pages, None)
+        yield path, {
+            **data,
+            "page": i,
+            "final": next_ids is None,
+            "pendingContributions": [{"id": id} for id in ids],
+        }
+        if next_ids is None:
+            return
+        ids, i = next_ids, i + 1
+
+
+def make_unpaged_bootstrap_data(checkpoint):
     return {
-        "pendingContributions": serialized_pending_contributions,
-        "latestTxId": latest_contribution.tx_id if latest_contribution else None,
+        "latestTxId": checkpoint.latest_tx_id or latest_confirmed_tx_id(),
+        "pendingContributions": [{"id": id} for ids in pending_contribution_ids() for id in ids],
     }
 
 
-def send_bootstrap_data():
-    data = make_bootstrap_data()
-    print('Sending bootstrap data to blockchain watcher microservice')
-    print(' * Latest transaction ID: {}'.format(data['latestTxId']))
-    print(' * Number of pending contributions: {}'.format(len(data['pendingContributions'])))
+def send_bootstrap_data(full=False):
+    checkpoint = BlockchainSync.get()
+    full = full or not checkpoint.date_synced
+    # contributions created while this runs are picked up by the next sync
+    started = datetime.now()
+
+    print('Sending {} data to blockchain watcher microservice'.format('bootstrap' if full else 'sync'))
+    print(' * Latest transaction ID: {}'.format(checkpoint.latest_tx_id))
+    print(' * Latest confirmed height: {}'.format(checkpoint.height))
+
+    count = 0
+    res = None
+    for path, data in make_bootstrap_data(checkpoint, full):
+        try:
+            res = blockchain_post(path, data)
+        except BlockchainNotFound:
+            if full:
+                raise
+            print('Blockchain watcher cannot sync, bootstrapping')
+            return send_bootstrap_data(full=True)
+        count += len(data['pendingContributions'])
+        if res and res.get('bootstrapRequired'):
+            print('Blockchain watcher cannot resume from the checkpoint, bootstrapping')
+            return send_bootstrap_data(full=True)
+        if not data['final'] and not (res and res.get('paged')):
+            print('Blockchain watcher does not take pages, bootstrapping in one request')
+            data = make_unpaged_bootstrap_data(checkpoint)
+            res = blockchain_post('/bootstrap', data)
+            count = len(data['pendingContributions'])
+            break
+    print(' * Number of pending contributions: {}'.format(count))
 
-    res = blockchain_post('/bootstrap', data)
+    checkpoint.mark_synced(started)
+    db.session.commit()
     print('Blockchain watcher has started')
     print('Starting chain height: {}'.format(res['startHeight']))
     print('Current chain height: {}'.format(res['currentHeight']))
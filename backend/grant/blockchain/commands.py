@@ -0,0 +1,11 @@
+import click
+from flask.cli import with_appcontext
+
+from .bootstrap import send_bootstrap_data
+
+
+@click.command()
+@click.option('--full', is_flag=True, help='Send every pending contribution, rather than changes since the checkpoint')
+@with_appcontext
+def sync_blockchain(full):
+    send_bootstrap_data(full)
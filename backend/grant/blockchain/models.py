@@ -0,0 +1,40 @@
+from datetime import datetime
+
+from grant.extensions import db
+
+CHECKPOINT_ID = 1
+
+
+class BlockchainSync(db.Model):
+    """
+    Where syncing with the blockchain watcher got to, a single row. Restarts only send the watcher what changed
+    since date_synced, and tell it the latest confirmed transaction & height (see grant.blockchain.bootstrap).
+    """
+    __tablename__ = "blockchain_sync"
+
+    id = db.Column(db.Integer(), primary_key=True)
+    latest_tx_id = db.Column(db.String(255), nullable=True)
+    height = db.Column(db.Integer(), nullable=True)
+    date_synced = db.Column(db.DateTime, nullable=True)
+
+    @staticmethod
+    def get():
+        checkpoint = BlockchainSync.query.get(CHECKPOINT_ID)
+        if not checkpoint:
+            checkpoint = BlockchainSync(id=CHECKPOINT_ID)
+            db.session.add(checkpoint)
+            db.session.flush()
+        return checkpoint
+
+    @staticmethod
+    def record_confirmation(tx_id: str, height: int):
+        # one UPDATE rather than a locked read, confirmations of older blocks leave the checkpoint alone
+        BlockchainSync.get()
+        BlockchainSync.query \
+            .filter(BlockchainSync.id == CHECKPOINT_ID) \
+            .filter((BlockchainSync.height == None) | (BlockchainSync.height <= height)) \
+            .update({'latest_tx_id': tx_id, 'height': height}, synchronize_session=False)
+
+    def mark_synced(self, when: datetime):
+        self.date_synced = when
+        db.session.add(self)
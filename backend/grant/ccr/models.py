@@ -4,11 +4,15 @@ from decimal import Decimal
 from sqlalchemy import or_
 from sqlalchemy.ext.hybrid import hybrid_property
 
-from grant.email.send import send_email
+from grant.email.send import send_email, send_to_users
 from grant.extensions import ma, db
+from grant.utils.camel_case import CamelCaseSchema
 from grant.utils.enums import CCRStatus
 from grant.utils.exceptions import ValidationException
-from grant.utils.misc import make_admin_url, gen_random_id, dt_to_unix
+from grant.utils.ids import gen_random_id
+from grant.utils.misc import make_admin_url, dt_to_unix
+from grant.utils.etag import stamp_column
+from grant.utils.search import SearchVector
 
 
 def default_content():
@@ -30,6 +34,11 @@ The end result of a proposal the fulfills this request
 
 class CCR(db.Model):
     __tablename__ = "ccr"
+    __table_args__ = (
+        db.Index("ix_ccr_search_vector", "search_vector", postgresql_using="gin"),
+    )
+    __search_fields__ = (('A', 'title'), ('B', 'brief'), ('C', 'content'))
+    __stamp_owners__ = (("rfp", "rfp_id"),)
 
     id = db.Column(db.Integer(), primary_key=True)
     date_created = db.Column(db.DateTime)
@@ -37,6 +46,8 @@ class CCR(db.Model):
     title = db.Column(db.String(255), nullable=True)
     brief = db.Column(db.String(255), nullable=True)
     content = db.Column(db.Text, nullable=True)
+    search_vector = db.deferred(db.Column(SearchVector, nullable=True))  # see grant.utils.search, only used in SQL
+    stamp = stamp_column()  # see grant.utils.etag
     status = db.Column(db.String(255), nullable=False)
     _target = db.Column("target", db.String(255), nullable=True)
     reject_reason = db.Column(db.String())
@@ -117,13 +128,10 @@ class CCR(db.Model):
 
     def send_admin_email(self, type: str):
         from grant.user.models import User
-        admins = User.get_admins()
-        for a in admins:
-            send_email(a.email_address, type, {
-                'user': a,
-                'ccr': self,
-                'ccr_url': make_admin_url(f'/ccrs/{self.id}'),
-            })
+        send_to_users(User.query.filter(User.is_admin == True), type, {
+            'ccr': self,
+            'ccr_url': make_admin_url(f'/ccrs/{self.id}'),
+        })
 
     # state: status DRAFT -> PENDING
     def set_pending(self):
@@ -196,7 +204,7 @@ class CCR(db.Model):
             return None
 
 
-class CCRSchema(ma.Schema):
+class CCRSchema(CamelCaseSchema):
     class Meta:
         model = CCR
         # Fields to expose
@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 """Click commands."""
 import os
+import sys
 from glob import glob
 from subprocess import call
 
@@ -181,3 +182,42 @@ def reset_db_chain_data():
     print(f'* Deleted {p_count} proposals and their linked entities')
     print(f'* Deleted {t_count} tasks')
     print(f'* Removed refund address from {s_count} user settings')
+
+
+@click.command()
+@with_appcontext
+def rebuild_search_index():
+    """Recomputes the search_vector of every searchable row, for rows written outside the ORM."""
+    from grant.ccr.models import CCR
+    from grant.comment.models import Comment
+    from grant.proposal.models import Proposal
+    from grant.user.models import User
+    from grant.utils.search import rebuild_search_vectors
+
+    for model in [Proposal, Comment, User, CCR]:
+        count = rebuild_search_vectors(model)
+        print(f'* Rebuilt search index of {count} {model.__tablename__} rows')
+
+
+@click.command()
+@click.option('--verify', is_flag=True, help='Only report stale counters, do not fix them')
+@with_appcontext
+def rebuild_counters(verify):
+    """Recounts the stored like & follower counts, for associations written outside set_associated."""
+    from grant.comment.models import Comment
+    from grant.proposal.models import Proposal
+    from grant.rfp.models import RFP
+    from grant.utils.counters import rebuild_counters
+
+    stale_count = 0
+    for model, relationship, counter in [
+        (Proposal, 'followers', 'followers_count'),
+        (Proposal, 'likes', 'likes_count'),
+        (Comment, 'likes', 'likes_count'),
+        (RFP, 'likes', 'likes_count'),
+    ]:
+        count = rebuild_counters(model, relationship, counter, verify)
+        stale_count += count
+        print(f'* {"Found" if verify else "Rebuilt"} {count} stale {model.__tablename__}.{counter}')
+    if verify and stale_count:
+        sys.exit(1)
@@ -2,11 +2,16 @@ import datetime
 
 from functools import reduce
 from grant.extensions import ma, db
+from grant.utils.camel_case import CamelCaseSchema
 from grant.utils.ma_fields import UnixDate
-from grant.utils.misc import gen_random_id
-from sqlalchemy.orm import raiseload, column_property
+from grant.utils.ids import gen_random_id
+from grant.utils.authed_loader import authed_has
+from grant.utils.counters import counter_column, set_associated
+from grant.utils.search import SearchVector
+from marshmallow import pre_dump
+from sqlalchemy.orm import raiseload, aliased, joinedload
+from sqlalchemy.orm.attributes import set_committed_value
 from sqlalchemy.ext.hybrid import hybrid_property
-from sqlalchemy import func, select
 
 HIDDEN_CONTENT = '~~comment removed by admin~~'
 
@@ -20,10 +25,16 @@ comment_liker = db.Table(
 
 class Comment(db.Model):
     __tablename__ = "comment"
+    __table_args__ = (
+        db.Index("ix_comment_proposal_id_parent_comment_id_hidden", "proposal_id", "parent_comment_id", "hidden"),
+        db.Index("ix_comment_search_vector", "search_vector", postgresql_using="gin"),
+    )
+    __search_fields__ = (('A', 'content'),)
 
     id = db.Column(db.Integer(), primary_key=True)
     date_created = db.Column(db.DateTime)
     content = db.Column(db.Text, nullable=False)
+    search_vector = db.deferred(db.Column(SearchVector, nullable=True))  # see grant.utils.search, only used in SQL
     hidden = db.Column(db.Boolean, nullable=False, default=False, server_default=db.text("FALSE"))
     reported = db.Column(db.Boolean, nullable=True, default=False, server_default=db.text("FALSE"))
 
@@ -37,11 +48,7 @@ class Comment(db.Model):
     likes = db.relationship(
         "User", secondary=comment_liker, back_populates="liked_comments"
     )
-    likes_count = column_property(
-        select([func.count(comment_liker.c.comment_id)])
-        .where(comment_liker.c.comment_id == id)
-        .correlate_except(comment_liker)
-    )
+    likes_count = counter_column()  # see grant.utils.counters
 
     def __init__(self, proposal_id, user_id, parent_comment_id, content):
         self.id = gen_random_id(Comment)
@@ -69,26 +76,43 @@ class Comment(db.Model):
 
     @hybrid_property
     def authed_liked(self):
-        from grant.utils.auth import get_authed_user
-
-        authed = get_authed_user()
-        if not authed:
-            return False
-        res = (
-            db.session.query(comment_liker)
-            .filter_by(user_id=authed.id, comment_id=self.id)
-            .count()
-        )
-        if res:
-            return True
-        return False
+        return authed_has(comment_liker, 'comment_id', self)
 
     def like(self, user, is_liked):
-        if is_liked:
-            self.likes.append(user)
-        else:
-            self.likes.remove(user)
-        db.session.flush()
+        set_associated(self, 'likes', 'likes_count', user, is_liked)
+
+
+def load_threads(comments):
+    """
+    Loads the replies of comments, their replies and so on with one recursive query, authors included, and
+    sets them as each comment's replies. Dumping the threads then doesn't lazy load per comment.
+    """
+    from grant.proposal.models import user_schema_loaders
+
+    comments = [c for c in comments if 'replies' not in c.__dict__]
+    if not comments:
+        return
+
+    thread = db.session.query(Comment.id) \
+        .filter(Comment.parent_comment_id.in_([c.id for c in comments])) \
+        .cte(name='thread', recursive=True)
+    parent = aliased(thread, name='parent')
+    reply = aliased(Comment, name='reply')
+    thread = thread.union_all(
+        db.session.query(reply.id).filter(reply.parent_comment_id == parent.c.id)
+    )
+    replies = Comment.query \
+        .options(*user_schema_loaders(joinedload(Comment.author))) \
+        .join(thread, Comment.id == thread.c.id) \
+        .order_by(Comment.date_created, Comment.id) \
+        .all()
+
+    children = {}
+    for r in replies:
+        children.setdefault(r.parent_comment_id, []).append(r)
+    for c in comments + replies:
+        set_committed_value(c, 'replies', children.get(c.id, []))
+
 
 # are all of the replies hidden?
 def all_hidden(replies):
@@ -100,7 +124,7 @@ def filter_dead(replies):
     return [x for x in replies if not (x.hidden and all_hidden(x.replies))]
 
 
-class CommentSchema(ma.Schema):
+class CommentSchema(CamelCaseSchema):
     class Meta:
         model = Comment
         # Fields to expose
@@ -127,6 +151,11 @@ class CommentSchema(ma.Schema):
     def get_content(self, obj):
         return HIDDEN_CONTENT if obj.hidden else obj.content
 
+    @pre_dump(pass_many=True)
+    def preload_threads(self, data, many):
+        load_threads(data if many else [data])
+        return data
+
     # filter out "dead" comments
     def get_replies(self, obj):
         return comments_schema.dump(filter_dead(obj.replies))
@@ -136,7 +165,7 @@ comment_schema = CommentSchema()
 comments_schema = CommentSchema(many=True)
 
 
-class UserCommentSchema(ma.Schema):
+class UserCommentSchema(CamelCaseSchema):
     class Meta:
         model = Comment
         fields = (
@@ -170,7 +199,7 @@ user_comment_schema = UserCommentSchema()
 user_comments_schema = UserCommentSchema(many=True)
 
 
-class AdminCommentSchema(ma.Schema):
+class AdminCommentSchema(CamelCaseSchema):
     class Meta:
         model = Comment
         fields = (
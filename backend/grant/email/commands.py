@@ -0,0 +1,21 @@
+import click
+from flask.cli import with_appcontext
+
+from . import outbox
+
+
+@click.command()
+@click.option('--poll-interval', default=5.0, help='Seconds to wait when no emails are queued')
+@click.option('--once', is_flag=True, help='Exit once the outbox is drained')
+@with_appcontext
+def run_email_worker(poll_interval, once):
+    print('Running email outbox worker')
+    processed, failed = outbox.run_email_worker(poll_interval, once)
+    print(f'Processed {processed} email(s), {failed} batch(es) failed')
+
+
+@click.command()
+@with_appcontext
+def requeue_dead_emails():
+    count = outbox.requeue_dead_emails()
+    print(f'Requeued {count} dead email(s)')
@@ -1,7 +1,11 @@
+import hashlib
+import json
 from datetime import datetime
 from datetime import timedelta
 
-from grant.extensions import ma, db
+from grant.extensions import db
+from grant.utils.camel_case import CamelCaseSchema
+from grant.utils.enums import EmailOutboxStatus
 from grant.utils.misc import gen_random_code
 
 RECOVERY_EXPIRATION = timedelta(hours=1)
@@ -23,7 +27,7 @@ class EmailVerification(db.Model):
         self.has_verified = False
 
 
-class EmailVerificationSchema(ma.Schema):
+class EmailVerificationSchema(CamelCaseSchema):
     class Meta:
         model = EmailVerification
         # Fields to expose
@@ -57,7 +61,7 @@ class EmailRecovery(db.Model):
         return time_diff > RECOVERY_EXPIRATION
 
 
-class EmailRecoverySchema(ma.Schema):
+class EmailRecoverySchema(CamelCaseSchema):
     class Meta:
         model = EmailRecovery
         # Fields to expose
@@ -69,3 +73,51 @@ class EmailRecoverySchema(ma.Schema):
 
 
 email_recovery_schema = EmailRecoverySchema()
+
+
+# outbox
+class EmailOutbox(db.Model):
+    __tablename__ = "email_outbox"
+    __table_args__ = (
+        db.Index('ix_email_outbox_pending_send_after', 'send_after', postgresql_where=db.text("status = 'PENDING'")),
+    )
+
+    id = db.Column(db.Integer(), primary_key=True)
+    date_created = db.Column(db.DateTime, nullable=False)
+    type = db.Column(db.String(255), nullable=False)
+    to_address = db.Column(db.String(255), nullable=False)
+
+    # rendered once, shared by every recipient with the same content_hash
+    subject = db.Column(db.Text, nullable=False)
+    html = db.Column(db.Text, nullable=False)
+    text = db.Column(db.Text, nullable=False)
+    content_hash = db.Column(db.String(64), nullable=False)
+    # per-recipient values for the substitution tags in the content, as JSON
+    _substitutions = db.Column("substitutions", db.Text, nullable=False, default='{}')
+
+    status = db.Column(db.String(255), nullable=False)
+    attempts = db.Column(db.Integer(), nullable=False, default=0)
+    send_after = db.Column(db.DateTime, nullable=False)
+    date_sent = db.Column(db.DateTime, nullable=True)
+    last_error = db.Column(db.Text, nullable=True)
+
+    def __init__(self, to_address: str, type: str, subject: str, html: str, text: str, substitutions: dict = {}):
+        self.date_created = datetime.now()
+        self.send_after = self.date_created
+        self.to_address = to_address
+        self.type = type
+        self.subject = subject
+        self.html = html
+        self.text = text
+        self.content_hash = hashlib.sha256('\0'.join([type, subject, html, text]).encode('utf-8')).hexdigest()
+        self.substitutions = substitutions
+        self.status = EmailOutboxStatus.PENDING
+        self.attempts = 0
+
+    @property
+    def substitutions(self):
+        return json.loads(self._substitutions)
+
+    @substitutions.setter
+    def substitutions(self, substitutions: dict):
+        self._substitutions = json.dumps(substitutions)
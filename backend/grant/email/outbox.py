@@ -0,0 +1,137 @@
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from traceback import format_exc
+
+import sendgrid
+from flask import current_app
+from sendgrid.helpers.mail import Email, Mail, Content, Personalization, Substitution
+from sentry_sdk import capture_exception
+
+from grant.extensions import db
+from grant.settings import SENDGRID_API_KEY, SENDGRID_DEFAULT_FROM, SENDGRID_DEFAULT_FROMNAME, E2E_TESTING
+from grant.utils.enums import EmailOutboxStatus
+from .models import EmailOutbox
+
+MAX_RECIPIENTS = 1000  # SendGrid's limit of personalizations per request
+BATCH_SIZE = 5000  # emails claimed per round
+MAX_ATTEMPTS = 5
+RETRY_DELAY = 60  # seconds, doubled after every failed attempt
+MAX_RETRY_DELAY = 6 * 60 * 60  # 6 hours
+# claimed emails are pushed this far into the future, so they get picked up again if a worker dies mid-send
+CLAIM_TIMEOUT = 10 * 60  # 10 minutes
+
+
+def retry_delay(attempts):
+    return timedelta(seconds=min(RETRY_DELAY * 2 ** max(attempts - 1, 0), MAX_RETRY_DELAY))
+
+
+def claim_emails(limit=BATCH_SIZE, now=None):
+    now = now or datetime.now()
+    emails = EmailOutbox.query \
+        .filter_by(status=EmailOutboxStatus.PENDING) \
+        .filter(EmailOutbox.send_after <= now) \
+        .order_by(EmailOutbox.send_after, EmailOutbox.id) \
+        .limit(limit) \
+        .with_for_update(skip_locked=True) \
+        .all()
+    for email in emails:
+        email.attempts += 1
+        email.send_after = now + timedelta(seconds=CLAIM_TIMEOUT)
+        db.session.add(email)
+    db.session.commit()
+    return emails
+
+
+def group_emails(emails):
+    # emails with the same rendered content go out together, one personalization per recipient
+    groups = OrderedDict()
+    for email in emails:
+        groups.setdefault(email.content_hash, []).append(email)
+    for group in groups.values():
+        for i in range(0, len(group), MAX_RECIPIENTS):
+            yield group[i:i + MAX_RECIPIENTS]
+
+
+def make_mail(emails):
+    first = emails[0]
+    mail = Mail(
+        from_email=Email(SENDGRID_DEFAULT_FROM, SENDGRID_DEFAULT_FROMNAME),
+        subject=first.subject,
+    )
+    for email in emails:
+        personalization = Personalization()
+        personalization.add_to(Email(email.to_address))
+        for tag, value in email.substitutions.items():
+            personalization.add_substitution(Substitution(tag, value))
+        mail.add_personalization(personalization)
+    mail.add_content(Content('text/plain', first.text))
+    mail.add_content(Content('text/html', first.html))
+    return mail
+
+
+def send_group(emails):
+    type = emails[0].type
+    try:
+        mail = make_mail(emails)
+        if E2E_TESTING:
+            from grant.e2e import views
+            views.last_email = mail.get()
+            current_app.logger.info(f'Just set last_email for e2e to pickup, type: {type}')
+        else:
+            sg = sendgrid.SendGridAPIClient(apikey=SENDGRID_API_KEY)
+            res = sg.client.mail.send.post(request_body=mail.get())
+            current_app.logger.info('Just sent %s email(s) of type %s, response code: %s' %
+                                    (len(emails), type, res.status_code))
+        now = datetime.now()
+        for email in emails:
+            email.status = EmailOutboxStatus.SENT
+            email.date_sent = now
+            email.last_error = None
+            db.session.add(email)
+        db.session.commit()
+        return True
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.info('An error occured while sending %s email(s) of type %s - %s: %s' %
+                                (len(emails), type, e.__class__.__name__, e))
+        current_app.logger.debug(getattr(e, 'body', e))
+        capture_exception(e)
+        error = format_exc()
+        now = datetime.now()
+        for email in emails:
+            email.last_error = error
+            if email.attempts >= MAX_ATTEMPTS:
+                email.status = EmailOutboxStatus.DEAD
+            else:
+                email.send_after = now + retry_delay(email.attempts)
+            db.session.add(email)
+        db.session.commit()
+        return False
+
+
+def send_pending_emails(limit=BATCH_SIZE):
+    emails = claim_emails(limit)
+    results = [send_group(group) for group in group_emails(emails)]
+    return len(emails), results.count(False)
+
+
+def run_email_worker(poll_interval=5, once=False):
+    processed = 0
+    failed_groups = 0
+    while True:
+        claimed, failed = send_pending_emails()
+        processed += claimed
+        failed_groups += failed
+        if once and not claimed:
+            return processed, failed_groups
+        if not claimed:
+            time.sleep(poll_interval)
+
+
+def requeue_dead_emails():
+    count = EmailOutbox.query \
+        .filter_by(status=EmailOutboxStatus.DEAD) \
+        .update({'status': EmailOutboxStatus.PENDING, 'attempts': 0, 'send_after': datetime.now()})
+    db.session.commit()
+    return count
@@ -1,15 +1,14 @@
-from threading import Thread
-
-import sendgrid
-from flask import render_template, Markup, current_app, g
-from python_http_client import HTTPError
-from sendgrid.helpers.mail import Email, Mail, Content
-from sentry_sdk import capture_exception
-
-from grant.settings import SENDGRID_API_KEY, SENDGRID_DEFAULT_FROM, UI, E2E_TESTING
-from grant.settings import SENDGRID_DEFAULT_FROMNAME
+from flask import render_template, Markup, current_app, g, has_app_context
+from jinja2 import nodes
+from markupsafe import escape
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, contains_eager, joinedload
+
+from grant.extensions import db
+from grant.settings import UI
 from grant.utils.misc import make_url
-from .subscription_settings import EmailSubscription, is_subscribed
+from .models import EmailOutbox
+from .subscription_settings import EmailSubscription, is_subscribed, subscribed
 
 default_template_args = {
     'home_url': make_url('/'),
@@ -488,7 +487,18 @@ get_info_lookup = {
 }
 
 
-def generate_email(type, email_args, user=None):
+UNSUBSCRIBE_URL_TAG = '-unsubscribe_url-'
+# per-recipient args, rendered as tags and spliced in afterwards so the rest of the email can be shared
+RECIPIENT_ARG_TAGS = {
+    'display_name': '-display_name-',
+}
+
+
+def user_unsubscribe_url(user):
+    return make_url('/email/unsubscribe?code={}'.format(user.email_verification.code))
+
+
+def generate_email(type, email_args, user=None, unsubscribe_url=None):
     info = get_info_lookup[type](email_args)
     body_text = render_template(
         'emails/%s.txt' % (type),
@@ -503,7 +513,9 @@ def generate_email(type, email_args, user=None):
 
     template_args = {**default_template_args}
     if user:
-        template_args['unsubscribe_url'] = make_url('/email/unsubscribe?code={}'.format(user.email_verification.code))
+        template_args['unsubscribe_url'] = user_unsubscribe_url(user)
+    if unsubscribe_url:
+        template_args['unsubscribe_url'] = unsubscribe_url
 
     html = render_template(
         'emails/template.html',
@@ -531,10 +543,127 @@ def generate_email(type, email_args, user=None):
     }
 
 
+referenced_args_cache = {}
+
+
+def referenced_args(type):
+    """Keys of email_args used by the body templates of an email type, None if that can't be told."""
+    if type not in referenced_args_cache:
+        env = current_app.jinja_env
+        keys = set()
+        for name in ['emails/%s.txt' % type, 'emails/%s.html' % type]:
+            ast = env.parse(env.loader.get_source(env, name)[0])
+            uses = [n for n in ast.find_all((nodes.Getattr, nodes.Getitem))
+                    if isinstance(n.node, nodes.Name) and n.node.name == 'args']
+            if len(uses) != len([n for n in ast.find_all(nodes.Name) if n.name == 'args']) or \
+                    any(isinstance(n, nodes.Getitem) and not isinstance(n.arg, nodes.Const) for n in uses):
+                # args is passed around whole or indexed dynamically
+                keys = None
+                break
+            keys.update(n.attr if isinstance(n, nodes.Getattr) else n.arg.value for n in uses)
+        referenced_args_cache[type] = keys
+    return referenced_args_cache[type]
+
+
+def args_fingerprint(value):
+    if isinstance(value, dict):
+        return tuple(sorted((k, args_fingerprint(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple, set)):
+        return tuple(args_fingerprint(v) for v in value)
+    if isinstance(value, db.Model):
+        # renders are only cached for the current app context, where a row's identity is enough
+        return (type(value).__name__, inspect(value).identity or id(value))
+    return repr(value)
+
+
+def render_email(type, email_args):
+    """
+    Renders an email with the recipient's details left as tags, caching the result for the
+    current request (or task) so that fan-outs to many recipients only render it once.
+    """
+    info = get_info_lookup[type](email_args)
+    keys = referenced_args(type)
+    body_args = {k: v for k, v in email_args.items() if keys is None or k in keys}
+    recipient_args = {k: body_args.pop(k) for k in RECIPIENT_ARG_TAGS if k in body_args}
+
+    key = (type, args_fingerprint(body_args), args_fingerprint(info))
+    cache = g.setdefault('email_render_cache', {})
+    if key not in cache:
+        tagged_args = {**email_args, **{k: RECIPIENT_ARG_TAGS[k] for k in recipient_args}}
+        cache[key] = generate_email(type, tagged_args, unsubscribe_url=UNSUBSCRIBE_URL_TAG)
+
+    email = {**cache[key], 'info': info}
+    for k, value in recipient_args.items():
+        email['html'] = email['html'].replace(RECIPIENT_ARG_TAGS[k], str(escape(value)))
+        email['text'] = email['text'].replace(RECIPIENT_ARG_TAGS[k], str(value))
+    return email
+
+
 def send_email(to, type, email_args):
-    if 'email_sender' not in g:
-        g.email_sender = EmailSender(current_app._get_current_object())
-    g.email_sender.add(to, type, email_args)
+    # queued in the current transaction, the outbox worker sends it once committed (see grant.email.outbox)
+    envelope = make_envelope(to, type, email_args)
+    if envelope:
+        queue_envelopes([envelope])
+
+
+def send_emails(emails):
+    # (to, type, email_args) for each, queued together
+    envelopes = [e for e in (make_envelope(*email) for email in emails) if e]
+    queue_envelopes(envelopes)
+
+
+def send_to_users(users, type, email_args, user_args=None):
+    """
+    Fans an email out to a query of users, e.g. a proposal's followers. Recipients and everything their envelopes
+    need are resolved in one query, with unsubscribed users filtered out by the database (see subscribed_users).
+    user_args(user) gives args that differ per recipient, e.g. their refund address.
+    """
+    if current_app and current_app.config.get("TESTING"):
+        return
+
+    info = get_info_lookup[type](email_args)
+    envelopes = []
+    for user in subscribed_users(users, info.get('subscription')):
+        args = {'user': user, **email_args, **(user_args(user) if user_args else {})}
+        envelopes.append(build_envelope(user.email_address, user, type, args, info))
+    queue_envelopes(envelopes)
+
+
+def queue_envelopes(envelopes):
+    db.session.add_all(envelopes)
+    g.setdefault('queued_emails', []).extend(envelopes)
+
+
+def commit_late_emails():
+    """
+    Commits emails queued after the request's last commit. Anything else the view left uncommitted is rolled back
+    rather than committed along with them. Returns how many there were.
+    """
+    envelopes = g.pop('queued_emails', [])
+    if not envelopes:
+        return 0
+    # drops the emails from the session too, whether they were flushed or not
+    db.session.rollback()
+    db.session.add_all(envelopes)
+    db.session.commit()
+    return len(envelopes)
+
+
+@event.listens_for(Session, 'after_commit')
+def forget_committed_emails(session):
+    if has_app_context():
+        g.pop('queued_emails', None)
+
+
+def subscribed_users(users, sub: EmailSubscription = None):
+    """Users of the query subscribed to sub, with their settings & email verification loaded alongside."""
+    from grant.user.models import User, UserSettings
+    query = users \
+        .join(User.settings) \
+        .options(contains_eager(User.settings), joinedload(User.email_verification))
+    if sub:
+        query = query.filter(subscribed(UserSettings._email_subscriptions, sub))
+    return query.all()
 
 
 def make_envelope(to, type, email_args):
@@ -551,57 +680,18 @@ def make_envelope(to, type, email_args):
             current_app.logger.debug(f'Ignoring send_email to {to} of type {type} because user is unsubscribed.')
             return None
 
-    email = generate_email(type, email_args, user)
-    mail = Mail(
-        from_email=Email(SENDGRID_DEFAULT_FROM, SENDGRID_DEFAULT_FROMNAME),
-        to_email=Email(to),
-        subject=email['info']['subject'],
+    return build_envelope(to, user, type, email_args, info)
+
+
+def build_envelope(to, user, type, email_args, info):
+    # the unsubscribe link is filled in per recipient by SendGrid, so followers of a proposal can share one send
+    email = render_email(type, email_args)
+    unsubscribe_url = user_unsubscribe_url(user) if user else default_template_args['unsubscribe_url']
+    return EmailOutbox(
+        to_address=to,
+        type=type,
+        subject=info['subject'],
+        html=email['html'],
+        text=email['text'],
+        substitutions={UNSUBSCRIBE_URL_TAG: unsubscribe_url},
     )
-    mail.add_content(Content('text/plain', email['text']))
-    mail.add_content(Content('text/html', email['html']))
-
-    mail.___type = type
-    mail.___to = to
-
-    return mail
-
-
-def sendgrid_send(mail, app=current_app):
-    to = mail.___to
-    type = mail.___type
-    try:
-        sg = sendgrid.SendGridAPIClient(apikey=SENDGRID_API_KEY)
-        if E2E_TESTING:
-            from grant.e2e import views
-            views.last_email = mail.get()
-            app.logger.info(f'Just set last_email for e2e to pickup, to: {to}, type: {type}')
-        else:
-            res = sg.client.mail.send.post(request_body=mail.get())
-            app.logger.info('Just sent an email to %s of type %s, response code: %s' %
-                            (to, type, res.status_code))
-    except HTTPError as e:
-        app.logger.info('An HTTP error occured while sending an email to %s - %s: %s' %
-                        (to, e.__class__.__name__, e))
-        app.logger.debug(e.body)
-        capture_exception(e)
-    except Exception as e:
-        app.logger.info('An unknown error occured while sending an email to %s - %s: %s' %
-                        (to, e.__class__.__name__, e))
-        app.logger.debug(e)
-        capture_exception(e)
-
-
-class EmailSender(Thread):
-    def __init__(self, app):
-        Thread.__init__(self)
-        self.envelopes = []
-        self.app = app
-
-    def add(self, to, type, email_args):
-        env = make_envelope(to, type, email_args)
-        if env:
-            self.envelopes.append(env)
-
-    def run(self):
-        for envelope in self.envelopes:
-            sendgrid_send(envelope, self.app)
@@ -118,6 +118,11 @@ def is_subscribed(user_subs: dict, sub: EmailSubscription):
     return user_subs[sub.value['key']]
 
 
+def subscribed(bitmap_column, sub: EmailSubscription):
+    # is_subscribed as a SQL predicate on the bitmask column, for resolving recipients in the query
+    return bitmap_column.op('&')(1 << sub.value['bit']) != 0
+
+
 def get_bitmap_state(bitmap: int, nth: int):
     return bitmap & (1 << nth) > 0
 
@@ -8,9 +8,12 @@ from flask_sqlalchemy import SQLAlchemy
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 
+from grant.utils.cache import ResponseCache
+
 bcrypt = Bcrypt()
 db = SQLAlchemy()
 migrate = Migrate()
 ma = Marshmallow()
 security = Security()
 limiter = Limiter(key_func=get_remote_address)
+response_cache = ResponseCache()
@@ -1,19 +1,37 @@
 from datetime import datetime
 
 from flask import Blueprint
-from sqlalchemy import or_
+from sqlalchemy import func, or_
+from sqlalchemy.orm import selectinload
 
-from grant.proposal.models import Proposal, proposals_schema
+from grant.proposal.models import Proposal, proposals_schema, PROPOSAL_LOADERS, proposal_schema_loaders
 from grant.rfp.models import RFP, rfps_schema
+from grant.extensions import db, response_cache
 from grant.utils.enums import ProposalStatus, ProposalStage, RFPStatus
+from grant.utils.etag import conditional
 
 blueprint = Blueprint("home", __name__, url_prefix="/api/v1/home")
 
 
+def open_rfps_filter():
+    return or_(RFP.date_closes == None, RFP.date_closes > datetime.now())
+
+
+def home_stamps():
+    # counts catch deletes, and rfps dropping off as they close
+    return db.session.query(
+        db.session.query(func.max(Proposal.stamp), func.count(Proposal.id)).subquery(),
+        db.session.query(func.max(RFP.stamp), func.count(RFP.id)).filter(open_rfps_filter()).subquery(),
+    ).one()
+
+
 @blueprint.route("/latest", methods=["GET"])
+@conditional(home_stamps)
+@response_cache.cached('home', {'proposal': None, 'rfp': None})
 def get_home_content():
     latest_proposals = (
-        Proposal.query.filter_by(status=ProposalStatus.LIVE)
+        Proposal.query.options(*PROPOSAL_LOADERS['list'])
+        .filter_by(status=ProposalStatus.LIVE)
         .filter(Proposal.stage != ProposalStage.CANCELED)
         .filter(Proposal.stage != ProposalStage.FAILED)
         .order_by(Proposal.date_created.desc())
@@ -21,8 +39,9 @@ def get_home_content():
         .all()
     )
     latest_rfps = (
-        RFP.query.filter_by(status=RFPStatus.LIVE)
-        .filter(or_(RFP.date_closes == None, RFP.date_closes > datetime.now()))
+        RFP.query.options(*proposal_schema_loaders(selectinload(RFP.accepted_proposals)))
+        .filter_by(status=RFPStatus.LIVE)
+        .filter(open_rfps_filter())
         .order_by(RFP.date_opened)
         .limit(3)
         .all()
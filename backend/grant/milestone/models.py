@@ -1,10 +1,14 @@
 import datetime
 
-from grant.extensions import ma, db
+from sqlalchemy.orm import validates
+
+from grant.extensions import db
+from grant.utils.camel_case import CamelCaseSchema
 from grant.utils.enums import MilestoneStage
 from grant.utils.exceptions import ValidationException
 from grant.utils.ma_fields import UnixDate
-from grant.utils.misc import gen_random_id
+from grant.utils.money import FixedPoint, PERCENT_SCALE, normalize
+from grant.utils.ids import gen_random_id
 from grant.task.jobs import MilestoneDeadline
 
 
@@ -14,6 +18,10 @@ class MilestoneException(Exception):
 
 class Milestone(db.Model):
     __tablename__ = "milestone"
+    __table_args__ = (
+        db.Index("ix_milestone_proposal_id_stage", "proposal_id", "stage"),
+    )
+    __stamp_owners__ = (("proposal", "proposal_id"),)
 
     id = db.Column(db.Integer(), primary_key=True)
     index = db.Column(db.Integer(), nullable=False)
@@ -21,7 +29,7 @@ class Milestone(db.Model):
 
     title = db.Column(db.String(255), nullable=False)
     content = db.Column(db.Text, nullable=False)
-    payout_percent = db.Column(db.String(255), nullable=False)
+    payout_percent = db.Column(FixedPoint(PERCENT_SCALE), nullable=False)
     immediate_payout = db.Column(db.Boolean)
     date_estimated = db.Column(db.DateTime, nullable=True)
     days_estimated = db.Column(db.String(255), nullable=True)
@@ -59,12 +67,15 @@ class Milestone(db.Model):
         self.content = content[:255]
         self.stage = stage
         self.days_estimated = days_estimated[:255]
-        self.payout_percent = payout_percent[:255]
+        self.payout_percent = payout_percent
         self.immediate_payout = immediate_payout
         self.proposal_id = proposal_id
         self.date_created = datetime.datetime.now()
         self.index = index
 
+    @validates('payout_percent')
+    def validate_payout_percent(self, key, payout_percent):
+        return normalize(payout_percent, PERCENT_SCALE)
 
     @staticmethod
     def make(milestones_data, proposal):
@@ -76,7 +87,7 @@ class Milestone(db.Model):
                     title=milestone_data["title"][:255],
                     content=milestone_data["content"][:255],
                     days_estimated=str(milestone_data["days_estimated"])[:255],
-                    payout_percent=str(milestone_data["payout_percent"])[:255],
+                    payout_percent=str(milestone_data["payout_percent"]) or '0',
                     immediate_payout=milestone_data["immediate_payout"],
                     proposal_id=proposal.id,
                     index=i
@@ -102,7 +113,6 @@ class Milestone(db.Model):
             )
             db.session.add(new_ms)
 
-
     #  The purpose of this method is to set the `date_estimated` property on all milestones in a proposal. This works
     #  by figuring out a starting point for each milestone  (the `base_date` below) and adding `days_estimated`.
     #
@@ -192,7 +202,7 @@ class Milestone(db.Model):
         self.paid_tx_id = tx_id
 
 
-class MilestoneSchema(ma.Schema):
+class MilestoneSchema(CamelCaseSchema):
     class Meta:
         model = Milestone
         # Fields to expose
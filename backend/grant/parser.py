@@ -1,10 +1,11 @@
 import functools
 
-from animal_case import animalify
 from webargs.core import dict2schema
 from webargs.flaskparser import FlaskParser, abort
 from marshmallow import fields
 
+from grant.utils.camel_case import snakeize
+
 try:
     from collections.abc import Mapping
 except ImportError:
@@ -57,7 +58,7 @@ class Parser(FlaskParser):
                 if as_kwargs:
                     # !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
                     # ONLY CHANGE FROM ORIGINAL
-                    kwargs.update(animalify(parsed_args, types='snake'))
+                    kwargs.update(snakeize(parsed_args))
                     # !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
                     return func(*args, **kwargs)
                 else:
@@ -87,5 +88,6 @@ paginated_fields = {
     "page": fields.Int(required=False, missing=None),
     "filters": fields.List(fields.Str(), required=False, missing=None),
     "search": fields.Str(required=False, missing=None),
-    "sort": fields.Str(required=False, missing=None)
+    "sort": fields.Str(required=False, missing=None),
+    "cursor": fields.Str(required=False, missing=None)
 }
\ No newline at end of file
@@ -1,5 +1,7 @@
 import click
 import datetime
+import sys
+from decimal import Decimal
 from random import randint
 from math import floor
 from flask.cli import with_appcontext
@@ -194,3 +196,34 @@ def retire_v1_proposals(dry):
     print(f"Deleted {deleted_draft_count} stale 'DRAFT' proposals")
 
 
+@click.command()
+@click.option('--verify', is_flag=True, help='Only report proposals with stale totals, do not fix them')
+@with_appcontext
+def rebuild_funding_totals(verify):
+    mismatch_count = 0
+    proposals = Proposal.query.all()
+
+    for p in proposals:
+        contributed, staked = p.calculate_funding_totals()
+        if Decimal(contributed) == Decimal(p.contributed_total) and Decimal(staked) == Decimal(p.staked_total):
+            continue
+
+        mismatch_count += 1
+        print(f"Proposal {p.id} totals are stale: "
+              f"contributed {p.contributed_total} -> {contributed}, staked {p.staked_total} -> {staked}")
+        if not verify:
+            p.contributed_total = contributed
+            p.staked_total = staked
+            db.session.add(p)
+
+    if not verify:
+        db.session.commit()
+
+    print("")
+    print(f"Checked {len(proposals)} proposals")
+    if verify:
+        print(f"Found {mismatch_count} proposals with stale funding totals")
+    else:
+        print(f"Rebuilt funding totals on {mismatch_count} proposals")
+    if verify and mismatch_count:
+        sys.exit(1)
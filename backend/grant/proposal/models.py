@@ -2,19 +2,28 @@ import datetime
 import json
 from typing import Optional
 from decimal import Decimal, ROUND_DOWN
-from functools import reduce
 
 from marshmallow import post_dump
-from sqlalchemy import func, or_, select, ForeignKey
+from sqlalchemy import case, func, or_, ForeignKey
 from sqlalchemy.ext.hybrid import hybrid_property
-from sqlalchemy.orm import column_property
+from sqlalchemy.orm import joinedload, selectinload, validates
 
 from grant.comment.models import Comment
 from grant.milestone.models import Milestone
-from grant.email.send import send_email
+from grant.email.send import send_email, send_to_users
 from grant.extensions import ma, db
+from grant.proposal.revisions import (
+    CACHE_TIMEOUT,
+    PROPOSAL_FIELDS,
+    document_cache,
+    encode_snapshot,
+    is_keyframe,
+    keyframe_index,
+    make_document,
+    rebuild_documents
+)
+from grant.utils.camel_case import CamelCaseSchema
 from grant.settings import PROPOSAL_STAKING_AMOUNT, PROPOSAL_TARGET_MAX
-from grant.task.jobs import ContributionExpired
 from grant.utils.enums import (
     ProposalStatus,
     ProposalStage,
@@ -25,7 +34,13 @@ from grant.utils.enums import (
     ProposalChange
 )
 from grant.utils.exceptions import ValidationException
-from grant.utils.misc import dt_to_unix, make_url, make_admin_url, gen_random_id
+from grant.utils.ids import gen_random_id
+from grant.utils.misc import dt_to_unix, make_url, make_admin_url
+from grant.utils.money import FixedPoint, AMOUNT_SCALE, normalize
+from grant.utils.authed_loader import authed_has
+from grant.utils.counters import counter_column, set_associated
+from grant.utils.etag import stamp_column
+from grant.utils.search import SearchVector
 from grant.utils.requests import blockchain_get
 from grant.utils.stubs import anonymous_user
 from grant.utils.validate import is_z_address_valid
@@ -53,6 +68,7 @@ proposal_liker = db.Table(
 
 class ProposalTeamInvite(db.Model):
     __tablename__ = "proposal_team_invite"
+    __stamp_owners__ = (("proposal", "proposal_id"),)
 
     id = db.Column(db.Integer(), primary_key=True)
     date_created = db.Column(db.DateTime)
@@ -77,6 +93,7 @@ class ProposalTeamInvite(db.Model):
 
 class ProposalUpdate(db.Model):
     __tablename__ = "proposal_update"
+    __stamp_owners__ = (("proposal", "proposal_id"),)
 
     id = db.Column(db.Integer(), primary_key=True)
     date_created = db.Column(db.DateTime)
@@ -95,6 +112,14 @@ class ProposalUpdate(db.Model):
 
 class ProposalContribution(db.Model):
     __tablename__ = "proposal_contribution"
+    __table_args__ = (
+        # also serves the top contributions, by amount
+        db.Index("ix_proposal_contribution_proposal_id_status_staking_amount",
+                 "proposal_id", "status", "staking", "amount"),
+        # pending ones are swept by date, see grant.task.jobs.ContributionExpired
+        db.Index("ix_proposal_contribution_status_date_created", "status", "date_created"),
+    )
+    __stamp_owners__ = (("proposal", "proposal_id"),)
 
     id = db.Column(db.Integer(), primary_key=True)
     date_created = db.Column(db.DateTime, nullable=False)
@@ -102,7 +127,7 @@ class ProposalContribution(db.Model):
     proposal_id = db.Column(db.Integer, db.ForeignKey("proposal.id"), nullable=False)
     user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=True)
     status = db.Column(db.String(255), nullable=False)
-    amount = db.Column(db.String(255), nullable=False)
+    amount = db.Column(FixedPoint(AMOUNT_SCALE), nullable=False)
     tx_id = db.Column(db.String(255), nullable=True)
     refund_tx_id = db.Column(db.String(255), nullable=True)
     staking = db.Column(db.Boolean, nullable=False)
@@ -126,6 +151,10 @@ class ProposalContribution(db.Model):
         self.date_created = datetime.datetime.now()
         self.status = ContributionStatus.PENDING
 
+    @validates('amount')
+    def validate_amount(self, key, amount):
+        return normalize(amount, AMOUNT_SCALE)
+
     @staticmethod
     def get_existing_contribution(user_id: int, proposal_id: int, amount: str, private: bool = False):
         return ProposalContribution.query.filter_by(
@@ -187,10 +216,19 @@ class ProposalContribution(db.Model):
         else:
             raise ValidationException('Amount is required')
 
-    def confirm(self, tx_id: str, amount: str):
+    def confirm(self, tx_id: str, amount: str, update_totals: bool = True):
+        was_confirmed = self.status == ContributionStatus.CONFIRMED
         self.status = ContributionStatus.CONFIRMED
         self.tx_id = tx_id
         self.amount = amount
+        # keep the proposal's stored funding totals in step with this contribution,
+        # unless the caller recomputes them (e.g. once per proposal for a batch)
+        if not update_totals:
+            return
+        if was_confirmed:
+            self.proposal.update_funding_totals()
+        else:
+            self.proposal.add_to_funding_totals(amount, self.staking)
 
     @hybrid_property
     def refund_address(self):
@@ -199,6 +237,7 @@ class ProposalContribution(db.Model):
 
 class ProposalArbiter(db.Model):
     __tablename__ = "proposal_arbiter"
+    __stamp_owners__ = (("proposal", "proposal_id"),)
 
     id = db.Column(db.Integer(), primary_key=True)
     proposal_id = db.Column(db.Integer, db.ForeignKey("proposal.id"), nullable=False)
@@ -246,8 +285,8 @@ class ProposalRevision(db.Model):
     proposal_id = db.Column(db.Integer, db.ForeignKey("proposal.id"), nullable=False)
     proposal = db.relationship("Proposal", foreign_keys=[proposal_id], back_populates="revisions")
 
-    # the archived proposal id associated with these changes
-    proposal_archive_id = db.Column(db.Integer, db.ForeignKey("proposal.id"), nullable=False)
+    # the id the proposal as of this revision is served under, at /proposals/<proposal_archive_id>/archive
+    proposal_archive_id = db.Column(db.Integer, nullable=False, unique=True)
 
     # the detected changes as a JSON string
     changes = db.Column(db.Text, nullable=False)
@@ -255,7 +294,18 @@ class ProposalRevision(db.Model):
     # the placement of this revision in the total revisions
     revision_index = db.Column(db.Integer)
 
-    def __init__(self, author, proposal_id: int, proposal_archive_id: int, changes: str, revision_index: int):
+    # the proposal as of this revision, compressed & usually a delta, see grant.proposal.revisions
+    snapshot = db.Column(db.LargeBinary, nullable=False)
+
+    def __init__(
+            self,
+            author,
+            proposal_id: int,
+            proposal_archive_id: int,
+            changes: str,
+            revision_index: int,
+            snapshot: bytes
+    ):
         self.id = gen_random_id(ProposalRevision)
         self.date_created = datetime.datetime.now()
         self.author = author
@@ -263,6 +313,71 @@ class ProposalRevision(db.Model):
         self.proposal_archive_id = proposal_archive_id
         self.changes = changes
         self.revision_index = revision_index
+        self.snapshot = snapshot
+
+    @staticmethod
+    def create(author, proposal_id: int, proposal_archive_id: int, changes: list, revision_index: int,
+               document: dict, previous_document: dict = None):
+        revision = ProposalRevision(
+            author=author,
+            proposal_id=proposal_id,
+            proposal_archive_id=proposal_archive_id,
+            changes=json.dumps(changes),
+            revision_index=revision_index,
+            snapshot=encode_snapshot(document, None if is_keyframe(revision_index) else previous_document)
+        )
+        document_cache.set(revision.id, document, CACHE_TIMEOUT)
+        return revision
+
+    def document(self) -> dict:
+        document = document_cache.get(self.id)
+        if document is None:
+            chain = ProposalRevision.query \
+                .filter_by(proposal_id=self.proposal_id) \
+                .filter(ProposalRevision.revision_index.between(keyframe_index(self.revision_index),
+                                                                self.revision_index)) \
+                .order_by(ProposalRevision.revision_index)
+            document = rebuild_documents(chain)
+        return document
+
+    def archived_proposal(self):
+        """The proposal as of this revision, for ProposalSchema. It's transient, never add it to the session."""
+        from grant.user.models import User
+
+        document = self.document()
+        proposal = Proposal.__mapper__.class_manager.new_instance()
+        proposal.id = self.proposal_archive_id
+        proposal.date_created = self.date_created
+        proposal.status = ProposalStatus.ARCHIVED
+        proposal.stage = ProposalStage.PREVIEW
+        proposal.version = '2'
+        proposal.category = self.proposal.category
+        proposal.deadline_duration = self.proposal.deadline_duration
+        proposal.contribution_matching = 0
+        proposal.contribution_bounty = '0'
+        proposal.contributed_total = '0'
+        proposal.staked_total = '0'
+        proposal.followers_count = 0
+        proposal.likes_count = 0
+        for field in PROPOSAL_FIELDS:
+            setattr(proposal, field, document[field])
+
+        users = {u.id: u for u in User.query.filter(User.id.in_(document['team']))}
+        proposal.team = [users[id] for id in document['team'] if id in users]
+        milestones = []
+        for i, data in enumerate(document['milestones']):
+            milestone = Milestone.__mapper__.class_manager.new_instance()
+            for field, value in data.items():
+                setattr(milestone, field, value)
+            milestone.index = i
+            milestone.stage = MilestoneStage.IDLE
+            milestone.date_created = self.date_created
+            milestones.append(milestone)
+        proposal.milestones = milestones
+        proposal.updates = []
+        proposal.invites = []
+        proposal.contributions = []
+        return proposal
 
     @staticmethod
     def calculate_milestone_changes(old_milestones, new_milestones):
@@ -375,6 +490,13 @@ How much funding do you need, and how will it be allocated (e.g., compensation f
 
 class Proposal(db.Model):
     __tablename__ = "proposal"
+    __table_args__ = (
+        db.Index("ix_proposal_status_stage_date_published", "status", "stage", "date_published"),
+        # drafts are swept by date, see grant.task.jobs.PruneDraft
+        db.Index("ix_proposal_status_date_created", "status", "date_created"),
+        db.Index("ix_proposal_search_vector", "search_vector", postgresql_using="gin"),
+    )
+    __search_fields__ = (('A', 'title'), ('B', 'brief'), ('C', 'content'))
 
     id = db.Column(db.Integer(), primary_key=True)
     date_created = db.Column(db.DateTime)
@@ -388,6 +510,8 @@ class Proposal(db.Model):
     stage = db.Column(db.String(255), nullable=False)
     content = db.Column(db.Text, nullable=False, default=default_proposal_content())
     category = db.Column(db.String(255), nullable=True)
+    search_vector = db.deferred(db.Column(SearchVector, nullable=True))  # see grant.utils.search, only used in SQL
+    stamp = stamp_column()  # see grant.utils.etag
     date_approved = db.Column(db.DateTime)
     date_published = db.Column(db.DateTime)
     reject_reason = db.Column(db.String())
@@ -396,13 +520,15 @@ class Proposal(db.Model):
     changes_requested_discussion_reason = db.Column(db.String(255), nullable=True)
 
     # Payment info
-    target = db.Column(db.String(255), nullable=False)
+    target = db.Column(FixedPoint(AMOUNT_SCALE), nullable=False)
     payout_address = db.Column(db.String(255), nullable=False)
     deadline_duration = db.Column(db.Integer(), nullable=True)
     contribution_matching = db.Column(db.Float(), nullable=False, default=0, server_default=db.text("0"))
-    contribution_bounty = db.Column(db.String(255), nullable=False, default='0', server_default=db.text("'0'"))
+    contribution_bounty = db.Column(FixedPoint(AMOUNT_SCALE), nullable=False, default='0', server_default=db.text("0"))
     rfp_opt_in = db.Column(db.Boolean(), nullable=True)
-    contributed = db.column_property()
+    # sums of CONFIRMED contributions, maintained by add_to_funding_totals & update_funding_totals
+    contributed_total = db.Column(FixedPoint(AMOUNT_SCALE), nullable=False, default='0', server_default=db.text("0"))
+    staked_total = db.Column(FixedPoint(AMOUNT_SCALE), nullable=False, default='0', server_default=db.text("0"))
     tip_jar_address = db.Column(db.String(255), nullable=True)
     tip_jar_view_key = db.Column(db.String(255), nullable=True)
 
@@ -418,19 +544,11 @@ class Proposal(db.Model):
     followers = db.relationship(
         "User", secondary=proposal_follower, back_populates="followed_proposals"
     )
-    followers_count = column_property(
-        select([func.count(proposal_follower.c.proposal_id)])
-        .where(proposal_follower.c.proposal_id == id)
-        .correlate_except(proposal_follower)
-    )
+    followers_count = counter_column()  # see grant.utils.counters
     likes = db.relationship(
         "User", secondary=proposal_liker, back_populates="liked_proposals"
     )
-    likes_count = column_property(
-        select([func.count(proposal_liker.c.proposal_id)])
-        .where(proposal_liker.c.proposal_id == id)
-        .correlate_except(proposal_liker)
-    )
+    likes_count = counter_column()
     live_draft_parent_id = db.Column(db.Integer, ForeignKey('proposal.id'))
     live_draft = db.relationship("Proposal", uselist=False, backref=db.backref('live_draft_parent', remote_side=[id], uselist=False))
 
@@ -460,6 +578,12 @@ class Proposal(db.Model):
         self.deadline_duration = deadline_duration
         self.stage = stage
         self.version = '2'
+        self.contributed_total = '0'
+        self.staked_total = '0'
+
+    @validates('target', 'contribution_bounty', 'contributed_total', 'staked_total')
+    def validate_amount(self, key, amount):
+        return normalize(amount, AMOUNT_SCALE)
 
     @staticmethod
     def simple_validate(proposal):
@@ -600,7 +724,7 @@ class Proposal(db.Model):
         self.brief = brief[:255]
         self.category = category
         self.content = content[:300000]
-        self.target = target[:255] if target != '' else '0'
+        self.target = target if target != '' else '0'
         self.payout_address = payout_address[:255]
         self.tip_jar_address = tip_jar_address[:255] if tip_jar_address is not None else None
         self.deadline_duration = deadline_duration
@@ -624,10 +748,6 @@ class Proposal(db.Model):
             private=private
         )
         db.session.add(contribution)
-        db.session.flush()
-        if user_id:
-            task = ContributionExpired(contribution)
-            task.make_task()
         db.session.commit()
         return contribution
 
@@ -653,13 +773,10 @@ class Proposal(db.Model):
 
     def send_admin_email(self, type: str):
         from grant.user.models import User
-        admins = User.get_admins()
-        for a in admins:
-            send_email(a.email_address, type, {
-                'user': a,
-                'proposal': self,
-                'proposal_url': make_admin_url(f'/proposals/{self.id}'),
-            })
+        send_to_users(User.query.filter(User.is_admin == True), type, {
+            'proposal': self,
+            'proposal_url': make_admin_url(f'/proposals/{self.id}'),
+        })
 
     # state: status (DRAFT || REJECTED) -> (PENDING)
     def submit_for_approval(self):
@@ -811,60 +928,79 @@ class Proposal(db.Model):
         db.session.flush()
 
         # Send emails to team & contributors
-        for u in self.team:
-            send_email(u.email_address, 'proposal_canceled', {
-                'proposal': self,
-                'support_url': make_url('/contact'),
-            })
-        for u in self.contributors:
-            send_email(u.email_address, 'contribution_proposal_canceled', {
-                'proposal': self,
-                'refund_address': u.settings.refund_address,
-                'account_settings_url': make_url('/profile/settings?tab=account')
-            })
+        send_to_users(self.team_users(), 'proposal_canceled', {
+            'proposal': self,
+            'support_url': make_url('/contact'),
+        })
+        send_to_users(self.contributor_users(), 'contribution_proposal_canceled', {
+            'proposal': self,
+            'account_settings_url': make_url('/profile/settings?tab=account')
+        }, lambda u: {'refund_address': u.settings.refund_address})
 
     def follow(self, user, is_follow):
-        if is_follow:
-            self.followers.append(user)
-        else:
-            self.followers.remove(user)
-        db.session.flush()
+        set_associated(self, 'followers', 'followers_count', user, is_follow)
 
     def like(self, user, is_liked):
-        if is_liked:
-            self.likes.append(user)
-        else:
-            self.likes.remove(user)
-        db.session.flush()
+        set_associated(self, 'likes', 'likes_count', user, is_liked)
 
     def send_follower_email(self, type: str, email_args={}, url_suffix=""):
-        for u in self.followers:
-            send_email(
-                u.email_address,
-                type,
-                {
-                    "user": u,
-                    "proposal": self,
-                    "proposal_url": make_url(f"/proposals/{self.id}{url_suffix}"),
-                    **email_args,
-                },
-            )
+        from grant.user.models import User
+        followers = User.query.join(proposal_follower).filter(proposal_follower.c.proposal_id == self.id)
+        send_to_users(
+            followers,
+            type,
+            {
+                "proposal": self,
+                "proposal_url": make_url(f"/proposals/{self.id}{url_suffix}"),
+                **email_args,
+            },
+        )
+
+    def team_users(self):
+        from grant.user.models import User
+        return User.query.join(proposal_team).filter(proposal_team.c.proposal_id == self.id)
+
+    def contributor_users(self):
+        # like contributors, as a query of the users for fanning emails out to (see send_to_users)
+        from grant.user.models import User
+        contributed = db.session.query(ProposalContribution.user_id) \
+            .filter_by(proposal_id=self.id, status=ContributionStatus.CONFIRMED)
+        return User.query.filter(User.id.in_(contributed))
+
+    def calculate_funding_totals(self):
+        def total(staking):
+            amount = case([(ProposalContribution.staking == staking, ProposalContribution.amount)])
+            return func.coalesce(func.sum(amount), 0)
+
+        return db.session.query(total(False), total(True)) \
+            .filter(ProposalContribution.proposal_id == self.id) \
+            .filter(ProposalContribution.status == ContributionStatus.CONFIRMED) \
+            .one()
+
+    def lock_funding_totals(self):
+        # re-read the totals under a row lock so concurrent confirmations serialize on this proposal
+        db.session.refresh(self, attribute_names=['contributed_total', 'staked_total'], with_for_update=True)
+
+    def add_to_funding_totals(self, amount: str, staking: bool):
+        self.lock_funding_totals()
+        if staking:
+            self.staked_total = str(Decimal(self.staked_total) + Decimal(amount))
+        else:
+            self.contributed_total = str(Decimal(self.contributed_total) + Decimal(amount))
+        db.session.add(self)
+
+    def update_funding_totals(self):
+        self.lock_funding_totals()
+        self.contributed_total, self.staked_total = self.calculate_funding_totals()
+        db.session.add(self)
 
     @hybrid_property
     def contributed(self):
-        contributions = ProposalContribution.query \
-            .filter_by(proposal_id=self.id, status=ContributionStatus.CONFIRMED, staking=False) \
-            .all()
-        funded = reduce(lambda prev, c: prev + Decimal(c.amount), contributions, 0)
-        return str(funded)
+        return self.contributed_total
 
     @hybrid_property
     def amount_staked(self):
-        contributions = ProposalContribution.query \
-            .filter_by(proposal_id=self.id, status=ContributionStatus.CONFIRMED, staking=True) \
-            .all()
-        amount = reduce(lambda prev, c: prev + Decimal(c.amount), contributions, 0)
-        return str(amount)
+        return self.staked_total
 
     @hybrid_property
     def funded(self):
@@ -914,35 +1050,11 @@ class Proposal(db.Model):
 
     @hybrid_property
     def authed_follows(self):
-        from grant.utils.auth import get_authed_user
-
-        authed = get_authed_user()
-        if not authed:
-            return False
-        res = (
-            db.session.query(proposal_follower)
-            .filter_by(user_id=authed.id, proposal_id=self.id)
-            .count()
-        )
-        if res:
-            return True
-        return False
+        return authed_has(proposal_follower, 'proposal_id', self)
 
     @hybrid_property
     def authed_liked(self):
-        from grant.utils.auth import get_authed_user
-
-        authed = get_authed_user()
-        if not authed:
-            return False
-        res = (
-            db.session.query(proposal_liker)
-            .filter_by(user_id=authed.id, proposal_id=self.id)
-            .count()
-        )
-        if res:
-            return True
-        return False
+        return authed_has(proposal_liker, 'proposal_id', self)
 
     @hybrid_property
     def get_tip_jar_view_key(self):
@@ -1004,29 +1116,28 @@ class Proposal(db.Model):
 
         # if this is the first revision, create a base revision that's a snapshot of the original proposal
         if len(self.revisions) == 0:
-            base_draft = self.make_live_draft(self)
-            base_draft.status = ProposalStatus.ARCHIVED
-            base_draft.invites = []
-
-            db.session.add(base_draft)
-
-            base_revision = ProposalRevision(
+            base_revision = ProposalRevision.create(
                 author=author,
                 proposal_id=self.id,
-                proposal_archive_id=base_draft.id,
-                changes=json.dumps([]),
-                revision_index=0
+                # served like the live drafts of later revisions, so numbered like a proposal
+                proposal_archive_id=gen_random_id(Proposal),
+                changes=[],
+                revision_index=0,
+                document=make_document(self, self.milestones, [u.id for u in self.team])
             )
             self.revisions.append(base_revision)
 
         revision_index = len(self.revisions)
+        previous_revision = max(self.revisions, key=lambda r: r.revision_index)
 
-        revision = ProposalRevision(
+        revision = ProposalRevision.create(
             author=author,
             proposal_id=self.id,
             proposal_archive_id=live_draft.id,
-            changes=json.dumps(revision_changes),
-            revision_index=revision_index
+            changes=revision_changes,
+            revision_index=revision_index,
+            document=make_document(live_draft, live_draft.milestones, [u.id for u in live_draft.team]),
+            previous_document=previous_revision.document()
         )
 
         self.title = live_draft.title
@@ -1047,14 +1158,56 @@ class Proposal(db.Model):
         # copy milestones
         Milestone.clone(live_draft, self)
 
-        # archive live draft
-        live_draft.status = ProposalStatus.ARCHIVED
-        live_draft.invites = []
-        db.session.add(live_draft)
+        # the revision keeps the live draft's content
+        db.session.delete(live_draft)
         return True
 
 
-class ProposalSchema(ma.Schema):
+def user_schema_loaders(path):
+    # what UserSchema reads off each user
+    return [
+        path.joinedload('avatar'),
+        path.selectinload('social_medias'),
+        path.joinedload('email_verification'),
+        path.joinedload('settings'),
+    ]
+
+
+def proposal_schema_loaders(path=None, join_to_one=False):
+    # what ProposalSchema reads off each proposal, besides the rfp. Collections get one query each,
+    # to-one relationships either do too or are joined into the proposal query
+    selectin = path.selectinload if path else selectinload
+    joined = path.joinedload if path else joinedload
+    to_one = joined if join_to_one else selectin
+    return [
+        *user_schema_loaders(selectin(Proposal.team)),
+        selectin(Proposal.milestones),
+        selectin(Proposal.updates),
+        selectin(Proposal.invites),
+        selectin(Proposal.live_draft).load_only('id'),
+        *user_schema_loaders(to_one(Proposal.arbiter).joinedload('user')),
+    ]
+
+
+# Loader options for the queries feeding ProposalSchema, so dumping proposals loads each relationship with
+# one query for all of them rather than one per proposal. Use as Proposal.query.options(*PROPOSAL_LOADERS['list'])
+PROPOSAL_LOADERS = {
+    # pages of proposals
+    'list': [
+        *proposal_schema_loaders(),
+        *user_schema_loaders(selectinload('rfp').joinedload('ccr').joinedload('author')),
+    ],
+    # a single proposal
+    'detail': [
+        *proposal_schema_loaders(join_to_one=True),
+        *user_schema_loaders(joinedload('rfp').joinedload('ccr').joinedload('author')),
+    ],
+}
+# admin pages of proposals dump the same ProposalSchema as the public ones
+PROPOSAL_LOADERS['admin'] = PROPOSAL_LOADERS['list']
+
+
+class ProposalSchema(CamelCaseSchema):
     class Meta:
         model = Proposal
         # Fields to expose
@@ -1163,7 +1316,7 @@ user_proposal_schema = ProposalSchema(only=user_fields)
 user_proposals_schema = ProposalSchema(many=True, only=user_fields)
 
 
-class ProposalUpdateSchema(ma.Schema):
+class ProposalUpdateSchema(CamelCaseSchema):
     class Meta:
         model = ProposalUpdate
         # Fields to expose
@@ -1193,7 +1346,7 @@ proposal_update_schema = ProposalUpdateSchema()
 proposals_update_schema = ProposalUpdateSchema(many=True)
 
 
-class ProposalRevisionSchema(ma.Schema):
+class ProposalRevisionSchema(CamelCaseSchema):
     class Meta:
         model = ProposalRevision
         # Fields to expose
@@ -1227,7 +1380,7 @@ proposal_revision_schema = ProposalRevisionSchema()
 proposals_revisions_schema = ProposalRevisionSchema(many=True)
 
 
-class ProposalTeamInviteSchema(ma.Schema):
+class ProposalTeamInviteSchema(CamelCaseSchema):
     class Meta:
         model = ProposalTeamInvite
         fields = (
@@ -1247,7 +1400,7 @@ proposal_team_invite_schema = ProposalTeamInviteSchema()
 proposal_team_invites_schema = ProposalTeamInviteSchema(many=True)
 
 
-class InviteWithProposalSchema(ma.Schema):
+class InviteWithProposalSchema(CamelCaseSchema):
     class Meta:
         model = ProposalTeamInvite
         fields = (
@@ -1269,7 +1422,7 @@ invite_with_proposal_schema = InviteWithProposalSchema()
 invites_with_proposal_schema = InviteWithProposalSchema(many=True)
 
 
-class ProposalContributionSchema(ma.Schema):
+class ProposalContributionSchema(CamelCaseSchema):
     class Meta:
         model = ProposalContribution
         # Fields to expose
@@ -1321,7 +1474,7 @@ proposal_proposal_contribution_schema = ProposalContributionSchema(exclude=['pro
 proposal_proposal_contributions_schema = ProposalContributionSchema(many=True, exclude=['proposal', 'addresses'])
 
 
-class AdminProposalContributionSchema(ma.Schema):
+class AdminProposalContributionSchema(CamelCaseSchema):
     class Meta:
         model = ProposalContribution
         # Fields to expose
@@ -1356,7 +1509,7 @@ admin_proposal_contribution_schema = AdminProposalContributionSchema()
 admin_proposal_contributions_schema = AdminProposalContributionSchema(many=True)
 
 
-class ProposalArbiterSchema(ma.Schema):
+class ProposalArbiterSchema(CamelCaseSchema):
     class Meta:
         model = ProposalArbiter
         fields = (
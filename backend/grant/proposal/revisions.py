@@ -0,0 +1,118 @@
+"""
+Content of proposal revisions, stored as compressed deltas rather than a copy of the proposal per revision.
+
+A revision's document is the proposal as of that revision (see make_document). ProposalRevision.snapshot holds it
+zlib-compressed, either in full ("keyframes", every KEYFRAME_INTERVAL revisions) or as the fields that changed since
+the previous revision, with content as a line diff. Reading a revision rebuilds its document from the last keyframe,
+at most KEYFRAME_INTERVAL rows, and documents are kept in an LRU per process as revisions never change.
+"""
+import json
+import zlib
+from difflib import SequenceMatcher
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from grant.utils.cache import LRUBackend
+
+KEYFRAME_INTERVAL = 10
+PROPOSAL_FIELDS = (
+    'title',
+    'brief',
+    'content',
+    'target',
+    'payout_address',
+    'tip_jar_address',
+    'rfp_opt_in',
+    'changes_requested_discussion_reason',
+)
+MILESTONE_FIELDS = ('title', 'content', 'days_estimated', 'payout_percent', 'immediate_payout')
+CACHE_TIMEOUT = 24 * 60 * 60
+
+document_cache = LRUBackend(1000)
+
+
+def make_document(proposal, milestones, team_ids) -> dict:
+    # attributes are read, so proposal & milestones can be models or rows
+    document = {field: getattr(proposal, field) for field in PROPOSAL_FIELDS}
+    document['milestones'] = [{field: getattr(ms, field) for field in MILESTONE_FIELDS} for ms in milestones]
+    document['team'] = list(team_ids)
+    return document
+
+
+def diff_lines(old: str, new: str) -> list:
+    # ints copy (> 0) or skip (< 0) that many lines of old, lists are lines to insert
+    old_lines, new_lines = old.splitlines(keepends=True), new.splitlines(keepends=True)
+    ops = []
+    for tag, i1, i2, j1, j2 in SequenceMatcher(None, old_lines, new_lines, autojunk=False).get_opcodes():
+        if tag == 'equal':
+            ops.append(i2 - i1)
+            continue
+        if i2 > i1:
+            ops.append(i1 - i2)
+        if j2 > j1:
+            ops.append(new_lines[j1:j2])
+    return ops
+
+
+def patch_lines(old: str, ops: list) -> str:
+    old_lines = old.splitlines(keepends=True)
+    new_lines = []
+    position = 0
+    for op in ops:
+        if isinstance(op, list):
+            new_lines.extend(op)
+        elif op > 0:
+            new_lines.extend(old_lines[position:position + op])
+            position += op
+        else:
+            position -= op
+    return ''.join(new_lines)
+
+
+def encode_snapshot(document: dict, previous: dict = None) -> bytes:
+    """Compressed document, in full without a previous one to diff against."""
+    if previous is None:
+        delta = {'full': document}
+    else:
+        delta = {'set': {k: v for k, v in document.items() if k != 'content' and v != previous.get(k)}}
+        if document['content'] != previous['content']:
+            delta['content'] = diff_lines(previous['content'], document['content'])
+    return zlib.compress(json.dumps(delta, separators=(',', ':')).encode('utf-8'))
+
+
+def decode_snapshot(snapshot: bytes, previous: dict = None) -> dict:
+    delta = json.loads(zlib.decompress(snapshot).decode('utf-8'))
+    if 'full' in delta:
+        return delta['full']
+    document = dict(previous, **delta['set'])
+    if 'content' in delta:
+        document['content'] = patch_lines(previous['content'], delta['content'])
+    return document
+
+
+def is_keyframe(revision_index: int) -> bool:
+    return revision_index % KEYFRAME_INTERVAL == 0
+
+
+def keyframe_index(revision_index: int) -> int:
+    return revision_index - revision_index % KEYFRAME_INTERVAL
+
+
+def rebuild_documents(revisions) -> dict:
+    """
+    Document of the last of revisions, consecutive ones of a proposal from a keyframe on. Documents are cached
+    by revision id along the way, cached documents are shared so must not be modified.
+    """
+    document = None
+    for revision in revisions:
+        cached = document_cache.get(revision.id)
+        document = cached if cached is not None else decode_snapshot(revision.snapshot, document)
+        document_cache.set(revision.id, document, CACHE_TIMEOUT)
+    return document
+
+
+@event.listens_for(Session, 'after_rollback')
+def forget_documents(session):
+    # rolled back revisions' ids may be handed out again (see grant.utils.ids)
+    document_cache.invalidate()
@@ -4,17 +4,18 @@ from datetime import datetime
 from flask import Blueprint, g, request, current_app
 from marshmallow import fields, validate
 from sqlalchemy import or_
+from sqlalchemy.orm import joinedload
 from sentry_sdk import capture_message
 from webargs import validate
 
-from grant.extensions import limiter
+from grant.extensions import limiter, response_cache
+from grant.blockchain.models import BlockchainSync
 from grant.comment.models import Comment, comment_schema, comments_schema
-from grant.email.send import send_email
+from grant.email.send import send_email, send_emails
 from grant.milestone.models import Milestone
 from grant.parser import body, query, paginated_fields
 from grant.rfp.models import RFP
 from grant.settings import PROPOSAL_STAKING_AMOUNT
-from grant.task.jobs import ProposalDeadline, PruneDraft
 from grant.user.models import User
 from grant.utils import pagination
 from grant.utils.auth import (
@@ -27,15 +28,19 @@ from grant.utils.auth import (
 )
 from grant.utils.validate import is_z_address_valid
 from grant.utils.enums import Category
+from grant.utils.etag import conditional
 from grant.utils.enums import ProposalStatus, ProposalStage, ContributionStatus, RFPStatus
 from grant.utils.exceptions import ValidationException
-from grant.utils.misc import is_email, make_url, from_zat, make_explore_url
+from grant.utils.misc import is_email, make_url, make_explore_url
+from grant.utils.money import from_units, AMOUNT_SCALE
 from .models import (
     Proposal,
+    ProposalSchema,
     proposals_schema,
     proposal_schema,
     ProposalUpdate,
     proposal_update_schema,
+    ProposalRevision,
     proposals_revisions_schema,
     ProposalContribution,
     proposal_contribution_schema,
@@ -44,15 +49,27 @@ from .models import (
     proposal_team_invite_schema,
     proposal_team_invites_schema,
     proposal_proposal_contributions_schema,
+    PROPOSAL_LOADERS,
+    user_schema_loaders,
     db,
 )
 
 blueprint = Blueprint("proposal", __name__, url_prefix="/api/v1/proposals")
 
 
+def proposal_stamps(proposal_id):
+    # the detail includes the rfp, and its ccr which bumps the rfp's stamp
+    return db.session.query(Proposal.stamp, RFP.stamp) \
+        .outerjoin(RFP, Proposal.rfp_id == RFP.id) \
+        .filter(Proposal.id == proposal_id) \
+        .first()
+
+
 @blueprint.route("/<proposal_id>", methods=["GET"])
+@conditional(proposal_stamps)
+@response_cache.cached('proposal', {'proposal': 'proposal_id', 'rfp': None})
 def get_proposal(proposal_id):
-    proposal = Proposal.query.filter_by(id=proposal_id).first()
+    proposal = Proposal.query.options(*PROPOSAL_LOADERS['detail']).filter_by(id=proposal_id).first()
     if proposal:
         if proposal.status == ProposalStatus.ARCHIVED:
             return {"message": "Proposal has been archived"}, 401
@@ -70,26 +87,25 @@ def get_proposal(proposal_id):
 
 @blueprint.route("/<proposal_id>/archive", methods=["GET"])
 def get_archived_proposal(proposal_id):
-    proposal = Proposal.query.get(proposal_id)
+    revision = ProposalRevision.query.filter_by(proposal_archive_id=proposal_id).first()
 
-    if not proposal:
-        return {"message": "No proposal matching id"}, 404
+    if not revision:
+        return {"message": "No archived proposal matching id"}, 404
 
-    if proposal.status != ProposalStatus.ARCHIVED:
-        return {"message": "Proposal is not archived"}, 401
-
-    return proposal_schema.dump(proposal)
+    return proposal_schema.dump(revision.archived_proposal())
 
 
 @blueprint.route("/<proposal_id>/comments", methods=["GET"])
 @query(paginated_fields)
-def get_proposal_comments(proposal_id, page, filters, search, sort):
+def get_proposal_comments(proposal_id, page, filters, search, sort, cursor):
     # only using page, currently
     filters_workaround = request.args.getlist('filters[]')
     page = pagination.comment(
         schema=comments_schema,
-        query=Comment.query.filter_by(proposal_id=proposal_id, parent_comment_id=None, hidden=False),
+        query=Comment.query.options(*user_schema_loaders(joinedload(Comment.author)))
+            .filter_by(proposal_id=proposal_id, parent_comment_id=None, hidden=False),
         page=page,
+        cursor=cursor,
         filters=filters_workaround,
         search=search,
         sort=sort,
@@ -177,11 +193,16 @@ def post_proposal_comments(proposal_id, comment, parent_comment_id):
     return dumped_comment, 201
 
 
+def is_first_page(page, search, cursor, **kwargs):
+    return page in (None, 1) and not search and not cursor
+
+
 @blueprint.route("/", methods=["GET"])
 @query(paginated_fields)
-def get_proposals(page, filters, search, sort):
+@response_cache.cached('proposals', {'proposal': None, 'rfp': None}, when=is_first_page)
+def get_proposals(page, filters, search, sort, cursor):
     filters_workaround = request.args.getlist('filters[]')
-    query = Proposal.query.filter(or_(
+    query = Proposal.query.options(*PROPOSAL_LOADERS['list']).filter(or_(
             Proposal.status == ProposalStatus.LIVE,
             Proposal.status == ProposalStatus.DISCUSSION
          )) \
@@ -191,6 +212,7 @@ def get_proposals(page, filters, search, sort):
         schema=proposals_schema,
         query=query,
         page=page,
+        cursor=cursor,
         filters=filters_workaround,
         search=search,
         sort=sort,
@@ -219,9 +241,6 @@ def make_proposal_draft(rfp_id):
         rfp.proposals.append(proposal)
         db.session.add(rfp)
 
-    task = PruneDraft(proposal)
-    task.make_task()
-
     db.session.add(proposal)
     db.session.commit()
     return proposal_schema.dump(proposal), 201
@@ -385,10 +404,6 @@ def publish_proposal(proposal_id):
     except ValidationException as e:
         return {"message": "{}".format(str(e))}, 400
     db.session.add(g.current_proposal)
-
-    task = ProposalDeadline(g.current_proposal)
-    task.make_task()
-
     db.session.commit()
     return proposal_schema.dump(g.current_proposal), 200
 
@@ -507,8 +522,9 @@ def post_proposal_update(proposal_id, title, content):
 
 @blueprint.route("/<proposal_id>/invites", methods=["GET"])
 @requires_team_member_auth
+@conditional(lambda proposal_id: (g.current_proposal.stamp,))
 def get_proposal_team_invites(proposal_id):
-    proposal_dump = proposal_schema.dump(g.current_proposal)
+    proposal_dump = ProposalSchema(only=["team", "invites"]).dump(g.current_proposal)
     return {
         "team": proposal_dump["team"],
         "invites": proposal_dump["invites"]
@@ -649,6 +665,39 @@ def post_proposal_contribution(proposal_id, amount, private):
     return dumped_contribution, code
 
 
+def contribution_confirmed_emails(contribution, txid, staking):
+    if staking:
+        # email progress of staking, partial or complete
+        return [(contribution.user.email_address, 'staking_contribution_confirmed', {
+            'contribution': contribution,
+            'proposal': contribution.proposal,
+            'tx_explorer_url': make_explore_url(txid),
+            'fully_staked': contribution.proposal.is_staked,
+            'stake_target': str(PROPOSAL_STAKING_AMOUNT.normalize()),
+        })]
+
+    emails = []
+    # Send to the user
+    if contribution.user:
+        emails.append((contribution.user.email_address, 'contribution_confirmed', {
+            'contribution': contribution,
+            'proposal': contribution.proposal,
+            'tx_explorer_url': make_explore_url(txid),
+        }))
+
+    # Send to the full proposal gang
+    for member in contribution.proposal.team:
+        emails.append((member.email_address, 'proposal_contribution', {
+            'proposal': contribution.proposal,
+            'contribution': contribution,
+            'contributor': contribution.user,
+            'funded': contribution.proposal.funded,
+            'proposal_url': make_url(f'/proposals/{contribution.proposal.id}'),
+            'contributor_url': make_url(f'/profile/{contribution.user.id}') if contribution.user else '',
+        }))
+    return emails
+
+
 # Can't use <proposal_id> since webhook doesn't know proposal id
 @blueprint.route("/contribution/<contribution_id>/confirm", methods=["POST"])
 @internal_webhook
@@ -656,8 +705,9 @@ def post_proposal_contribution(proposal_id, amount, private):
     "to": fields.Str(required=True),
     "amount": fields.Str(required=True),
     "txid": fields.Str(required=True),
+    "height": fields.Int(required=False, missing=None),
 })
-def post_contribution_confirmation(contribution_id, to, amount, txid):
+def post_contribution_confirmation(contribution_id, to, amount, txid, height):
     contribution = ProposalContribution.query.filter_by(
         id=contribution_id).first()
 
@@ -672,46 +722,91 @@ def post_contribution_confirmation(contribution_id, to, amount, txid):
         return {"message": "ok"}, 200
 
     # Convert to whole zcash coins from zats
-    zec_amount = str(from_zat(int(amount)))
+    zec_amount = from_units(int(amount), AMOUNT_SCALE)
 
     contribution.confirm(tx_id=txid, amount=zec_amount)
     db.session.add(contribution)
     db.session.flush()
 
-    if contribution.proposal.status == ProposalStatus.STAKING:
+    staking = contribution.proposal.status == ProposalStatus.STAKING
+    if staking:
         contribution.proposal.set_pending_when_ready()
+    send_emails(contribution_confirmed_emails(contribution, txid, staking))
+    if height is not None:
+        BlockchainSync.record_confirmation(txid, height)
 
-        # email progress of staking, partial or complete
-        send_email(contribution.user.email_address, 'staking_contribution_confirmed', {
-            'contribution': contribution,
-            'proposal': contribution.proposal,
-            'tx_explorer_url': make_explore_url(txid),
-            'fully_staked': contribution.proposal.is_staked,
-            'stake_target': str(PROPOSAL_STAKING_AMOUNT.normalize()),
-        })
+    db.session.commit()
+    return {"message": "ok"}, 200
 
-    else:
-        # Send to the user
-        if contribution.user:
-            send_email(contribution.user.email_address, 'contribution_confirmed', {
-                'contribution': contribution,
-                'proposal': contribution.proposal,
-                'tx_explorer_url': make_explore_url(txid),
-            })
 
-        # Send to the full proposal gang
-        for member in contribution.proposal.team:
-            send_email(member.email_address, 'proposal_contribution', {
-                'proposal': contribution.proposal,
-                'contribution': contribution,
-                'contributor': contribution.user,
-                'funded': contribution.proposal.funded,
-                'proposal_url': make_url(f'/proposals/{contribution.proposal.id}'),
-                'contributor_url': make_url(f'/profile/{contribution.user.id}') if contribution.user else '',
-            })
+@blueprint.route("/contributions/confirm/batch", methods=["POST"])
+@internal_webhook
+@body({
+    # [{contributionId, to, amount, txid, height?}, ...]
+    "contributions": fields.List(fields.Dict(), required=True, validate=validate.Length(max=1000)),
+})
+def post_contribution_confirmations(contributions):
+    confirmations = {}
+    latest = None
+    for c in contributions:
+        try:
+            contribution_id, amount, txid = int(c['contribution_id']), int(c['amount']), str(c['txid'])
+            str(c['to'])
+            height = int(c['height']) if c.get('height') is not None else None
+        except (KeyError, TypeError, ValueError):
+            return {"message": f"Invalid confirmation {c}"}, 400
+        if height is not None and (latest is None or height >= latest[1]):
+            latest = (txid, height)
+        # the same transaction may be reported twice, the first one counts
+        confirmations.setdefault(contribution_id, (txid, from_units(amount, AMOUNT_SCALE)))
+    if not confirmations:
+        return {"confirmed": [], "duplicates": [], "unknown": []}, 200
+
+    # row locks, in id order so overlapping batches don't deadlock
+    found = ProposalContribution.query \
+        .filter(ProposalContribution.id.in_(confirmations.keys())) \
+        .options(joinedload(ProposalContribution.proposal)) \
+        .order_by(ProposalContribution.id) \
+        .with_for_update(of=ProposalContribution) \
+        .all()
+    found_ids = {c.id for c in found}
+    unknown = sorted(i for i in confirmations if i not in found_ids)
+    for contribution_id in unknown:
+        txid, amount = confirmations[contribution_id]
+        msg = f'Unknown contribution {contribution_id} confirmed with txid {txid}, amount {amount}'
+        capture_message(msg)
+        current_app.logger.warn(msg)
+
+    # duplicates can happen, they're just skipped
+    duplicates = [c.id for c in found if c.status == ContributionStatus.CONFIRMED]
+    confirmed = [c for c in found if c.status != ContributionStatus.CONFIRMED]
+    staking = {c.proposal_id: c.proposal.status == ProposalStatus.STAKING for c in confirmed}
+    for contribution in confirmed:
+        contribution.confirm(*confirmations[contribution.id], update_totals=False)
+    db.session.flush()
+
+    # totals are recomputed once for each proposal
+    proposals = {c.proposal_id: c.proposal for c in confirmed}
+    for proposal_id in sorted(proposals):
+        proposal = proposals[proposal_id]
+        proposal.update_funding_totals()
+        if staking[proposal_id]:
+            proposal.set_pending_when_ready()
+
+    emails = []
+    for contribution in confirmed:
+        txid, _ = confirmations[contribution.id]
+        emails.extend(contribution_confirmed_emails(contribution, txid, staking[contribution.proposal_id]))
+    send_emails(emails)
+    if latest:
+        BlockchainSync.record_confirmation(*latest)
 
     db.session.commit()
-    return {"message": "ok"}, 200
+    return {
+        "confirmed": [c.id for c in confirmed],
+        "duplicates": duplicates,
+        "unknown": unknown,
+    }, 200
 
 
 @blueprint.route("/contribution/<contribution_id>", methods=["DELETE"])
@@ -1,11 +1,14 @@
 from datetime import datetime
-from decimal import Decimal
 from grant.extensions import ma, db
+from grant.utils.camel_case import CamelCaseSchema
 from sqlalchemy.ext.hybrid import hybrid_property
-from sqlalchemy import func, select
-from sqlalchemy.orm import column_property
 from grant.utils.enums import RFPStatus
-from grant.utils.misc import dt_to_unix, gen_random_id
+from grant.utils.authed_loader import authed_has
+from grant.utils.counters import counter_column, set_associated
+from grant.utils.etag import stamp_column
+from grant.utils.ids import gen_random_id
+from grant.utils.misc import dt_to_unix
+from grant.utils.money import FixedPoint, AMOUNT_SCALE, normalize, to_units
 from grant.utils.enums import Category
 
 rfp_liker = db.Table(
@@ -28,11 +31,12 @@ class RFP(db.Model):
     category = db.Column(db.String(255), nullable=True)
     status = db.Column(db.String(255), nullable=False)
     matching = db.Column(db.Boolean, default=False, nullable=False)
-    _bounty = db.Column("bounty", db.String(255), nullable=True)
+    _bounty = db.Column("bounty", FixedPoint(AMOUNT_SCALE), nullable=True)
     date_closes = db.Column(db.DateTime, nullable=True)
     date_opened = db.Column(db.DateTime, nullable=True)
     date_closed = db.Column(db.DateTime, nullable=True)
     version = db.Column(db.String(255), nullable=True)
+    stamp = stamp_column()  # see grant.utils.etag
 
     ccr = db.relationship("CCR", uselist=False, back_populates="rfp")
 
@@ -53,11 +57,7 @@ class RFP(db.Model):
     likes = db.relationship(
         "User", secondary=rfp_liker, back_populates="liked_rfps"
     )
-    likes_count = column_property(
-        select([func.count(rfp_liker.c.rfp_id)])
-        .where(rfp_liker.c.rfp_id == id)
-        .correlate_except(rfp_liker)
-    )
+    likes_count = counter_column()  # see grant.utils.counters
 
     @hybrid_property
     def bounty(self):
@@ -65,33 +65,17 @@ class RFP(db.Model):
 
     @bounty.setter
     def bounty(self, bounty: str):
-        if bounty and Decimal(bounty) > 0:
-            self._bounty = bounty
+        if bounty and to_units(bounty, AMOUNT_SCALE) > 0:
+            self._bounty = normalize(bounty, AMOUNT_SCALE)
         else:
             self._bounty = None
 
     @hybrid_property
     def authed_liked(self):
-        from grant.utils.auth import get_authed_user
-
-        authed = get_authed_user()
-        if not authed:
-            return False
-        res = (
-            db.session.query(rfp_liker)
-            .filter_by(user_id=authed.id, rfp_id=self.id)
-            .count()
-        )
-        if res:
-            return True
-        return False
+        return authed_has(rfp_liker, 'rfp_id', self)
 
     def like(self, user, is_liked):
-        if is_liked:
-            self.likes.append(user)
-        else:
-            self.likes.remove(user)
-        db.session.flush()
+        set_associated(self, 'likes', 'likes_count', user, is_liked)
 
     def __init__(
         self,
@@ -116,7 +100,7 @@ class RFP(db.Model):
         self.version = '2'
 
 
-class RFPSchema(ma.Schema):
+class RFPSchema(CamelCaseSchema):
     class Meta:
         model = RFP
         # Fields to expose
@@ -170,7 +154,7 @@ rfp_schema = RFPSchema()
 rfps_schema = RFPSchema(many=True)
 
 
-class AdminRFPSchema(ma.Schema):
+class AdminRFPSchema(CamelCaseSchema):
     class Meta:
         model = RFP
         # Fields to expose
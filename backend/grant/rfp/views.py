@@ -1,16 +1,29 @@
 from flask import Blueprint, g
-from sqlalchemy import or_
+from sqlalchemy import func, or_
 
 from grant.utils.enums import RFPStatus
 from grant.utils.auth import requires_auth
+from grant.extensions import response_cache
+from grant.utils.etag import conditional
 from grant.parser import body
+from grant.proposal.models import Proposal
 from .models import RFP, rfp_schema, rfps_schema, db
 from marshmallow import fields
 
 blueprint = Blueprint("rfp", __name__, url_prefix="/api/v1/rfps")
 
 
+def rfps_stamps():
+    # rfps are dumped with their accepted proposals
+    return db.session.query(
+        db.session.query(func.max(RFP.stamp), func.count(RFP.id)).subquery(),
+        db.session.query(func.max(Proposal.stamp)).subquery(),
+    ).one()
+
+
 @blueprint.route("/", methods=["GET"])
+@conditional(rfps_stamps)
+@response_cache.cached('rfps', {'rfp': None, 'proposal': None})
 def get_rfps():
     rfps = RFP.query \
         .filter(or_(
@@ -22,11 +22,25 @@ SQLALCHEMY_DATABASE_URI = E2E_DATABASE_URL if E2E_TESTING else env.str("DATABASE
 SQLALCHEMY_ECHO = False  # True will print queries to log
 QUEUES = ["default"]
 SECRET_KEY = env.str("SECRET_KEY")
+# keys the permutation that makes row ids look random (see grant.utils.ids)
+ID_PERMUTATION_KEY = env.str("ID_PERMUTATION_KEY", default=SECRET_KEY)
 BCRYPT_LOG_ROUNDS = env.int("BCRYPT_LOG_ROUNDS", default=13)
 DEBUG_TB_ENABLED = DEBUG
 DEBUG_TB_INTERCEPT_REDIRECTS = False
-CACHE_TYPE = "simple"  # Can be "memcached", "redis", etc.
+# public responses cache (see grant.utils.cache), "simple" is an in-process LRU, or "redis" or "null"
+CACHE_TYPE = env.str("CACHE_TYPE", default="simple")
+CACHE_REDIS_URL = env.str("REDISTOGO_URL", default=None)
+CACHE_DEFAULT_TIMEOUT = env.int("CACHE_DEFAULT_TIMEOUT", default=60)
+CACHE_THRESHOLD = env.int("CACHE_THRESHOLD", default=500)
+# compiled templates are cached here across restarts & workers, defaults to a directory in the system's tmp
+JINJA_BYTECODE_CACHE_DIR = env.str("JINJA_BYTECODE_CACHE_DIR", default=None)
+# response body encoder (see grant.utils.json_encoder), "orjson" or "json" for the stdlib one
+JSON_ENCODER = env.str("JSON_ENCODER", default="orjson")
 SQLALCHEMY_TRACK_MODIFICATIONS = False
+# rate limits are counted here, "memory://" is per worker process so use redis (or memcached) with several workers
+RATELIMIT_STORAGE_URL = env.str("RATELIMIT_STORAGE_URL", default="memory://")
+# number of proxies in front of the app (e.g. 1 for the heroku router), limits are keyed by the client address
+PROXY_FIX_X_FOR = env.int("PROXY_FIX_X_FOR", default=0)
 
 # so backend session cookies are first-party
 SESSION_COOKIE_DOMAIN = env.str('SESSION_COOKIE_DOMAIN', default=None)
@@ -61,6 +75,14 @@ LINKEDIN_CLIENT_SECRET = env.str("LINKEDIN_CLIENT_SECRET")
 
 BLOCKCHAIN_REST_API_URL = env.str("BLOCKCHAIN_REST_API_URL")
 BLOCKCHAIN_API_SECRET = env.str("BLOCKCHAIN_API_SECRET")
+# watcher client (see grant.utils.requests), seconds
+BLOCKCHAIN_CONNECT_TIMEOUT = env.float("BLOCKCHAIN_CONNECT_TIMEOUT", default=3)
+BLOCKCHAIN_READ_TIMEOUT = env.float("BLOCKCHAIN_READ_TIMEOUT", default=10)
+BLOCKCHAIN_RETRIES = env.int("BLOCKCHAIN_RETRIES", default=2)
+BLOCKCHAIN_POOL_SIZE = env.int("BLOCKCHAIN_POOL_SIZE", default=10)
+# consecutive failed calls before failing fast, and for how long
+BLOCKCHAIN_CIRCUIT_THRESHOLD = env.int("BLOCKCHAIN_CIRCUIT_THRESHOLD", default=5)
+BLOCKCHAIN_CIRCUIT_RESET = env.int("BLOCKCHAIN_CIRCUIT_RESET", default=30)
 
 STAGING_PASSWORD = env.str("STAGING_PASSWORD", default=None)
 
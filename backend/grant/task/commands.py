@@ -5,6 +5,7 @@ import click
 from flask.cli import with_appcontext
 
 from .models import Task, db
+from . import worker
 
 
 @click.command()
@@ -15,3 +16,15 @@ def create_task(job_type, blob):
     task = Task(ast.literal_eval(job_type), ast.literal_eval(blob), datetime.now())
     db.session.add(task)
     db.session.commit()
+
+
+@click.command()
+@click.option('--concurrency', default=4, help='Number of tasks to run in parallel')
+@click.option('--batch-size', default=None, type=int, help='Tasks claimed per round, defaults to 2x concurrency')
+@click.option('--poll-interval', default=5.0, help='Seconds to wait when no tasks are due')
+@click.option('--once', is_flag=True, help='Exit once there are no more due tasks')
+@with_appcontext
+def run_worker(concurrency, batch_size, poll_interval, once):
+    print(f'Running task worker with concurrency {concurrency}')
+    processed, failed = worker.run_worker(concurrency, batch_size, poll_interval, once)
+    print(f'Ran {processed} task(s), {failed} failed')
@@ -1,7 +1,10 @@
 from datetime import datetime, timedelta
 
+from sqlalchemy import or_
+from sqlalchemy.orm import joinedload
+
 from grant.extensions import db
-from grant.email.send import send_email
+from grant.email.send import send_email, send_emails
 from grant.utils.enums import ProposalStage, ContributionStatus, ProposalStatus
 from grant.utils.misc import make_url
 from flask import current_app
@@ -37,141 +40,62 @@ class ProposalReminder:
         db.session.commit()
 
 
-class ProposalDeadline:
-    JOB_TYPE = 2
-
-    def __init__(self, proposal):
-        self.proposal = proposal
-
-    def blobify(self):
-        return {
-            "proposal_id": self.proposal.id,
-        }
-
-    def make_task(self):
-        from .models import Task
-        task = Task(
-            job_type=self.JOB_TYPE,
-            blob=self.blobify(),
-            execute_after=self.proposal.date_published + timedelta(seconds=self.proposal.deadline_duration),
-        )
-        db.session.add(task)
-        db.session.commit()
-
-    @staticmethod
-    def process_task(task):
-        from grant.proposal.models import Proposal
-        proposal = Proposal.query.filter_by(id=task.blob["proposal_id"]).first()
-
-        # If it was deleted, canceled, or successful, just noop out
-        if not proposal or proposal.is_funded or proposal.stage != ProposalStage.FUNDING_REQUIRED:
-            return
-
-        # Otherwise, mark it as failed and inform everyone
-        proposal.stage = ProposalStage.FAILED
-        db.session.add(proposal)
-        db.session.commit()
-
-        # Send emails to team & contributors
-        for u in proposal.team:
-            send_email(u.email_address, 'proposal_failed', {
-                'proposal': proposal,
-            })
-        for u in proposal.contributors:
-            send_email(u.email_address, 'contribution_proposal_failed', {
-                'proposal': proposal,
-                'refund_address': u.settings.refund_address,
-                'account_settings_url': make_url('/profile/settings?tab=account')
-            })
-
-
 class ContributionExpired:
+    """Sweep telling users about their contributions that are still pending a day later."""
     JOB_TYPE = 3
-
-    def __init__(self, contribution):
-        self.contribution = contribution
-
-    def blobify(self):
-        return {
-            "contribution_id": self.contribution.id,
-        }
-
-    def make_task(self):
-        from .models import Task
-        task = Task(
-            job_type=self.JOB_TYPE,
-            blob=self.blobify(),
-            execute_after=self.contribution.date_created + timedelta(hours=24),
-        )
-        db.session.add(task)
-        db.session.commit()
+    EXPIRE_TIME = 86400  # 24 hours in seconds
 
     @staticmethod
-    def process_task(task):
+    def sweep(since, now):
         from grant.proposal.models import ProposalContribution
-        contribution = ProposalContribution.query.filter_by(id=task.blob["contribution_id"]).first()
-
-        # If it's missing or not pending, noop out
-        if not contribution or contribution.status != ContributionStatus.PENDING:
-            return
-
-        # Otherwise, inform the user (if not anonymous)
-        if contribution.user:
-            send_email(contribution.user.email_address, 'contribution_expired', {
+        expire_time = timedelta(seconds=ContributionExpired.EXPIRE_TIME)
+        # anonymous contributions have no one to inform
+        query = ProposalContribution.query \
+            .filter_by(status=ContributionStatus.PENDING) \
+            .filter(ProposalContribution.user_id != None) \
+            .filter(ProposalContribution.date_created <= now - expire_time) \
+            .options(joinedload(ProposalContribution.user), joinedload(ProposalContribution.proposal))
+        if since:
+            query = query.filter(ProposalContribution.date_created > since - expire_time)
+
+        send_emails([
+            (contribution.user.email_address, 'contribution_expired', {
                 'contribution': contribution,
                 'proposal': contribution.proposal,
                 'contact_url': make_url('/contact'),
                 'profile_url': make_url(f'/profile/{contribution.user.id}'),
                 'proposal_url': make_url(f'/proposals/{contribution.proposal.id}'),
             })
+            for contribution in query.all()
+        ])
 
 
 class PruneDraft:
+    """Sweep deleting drafts that were left empty."""
     JOB_TYPE = 4
     PRUNE_TIME = 259200  # 72 hours in seconds
 
-    def __init__(self, proposal):
-        self.proposal = proposal
-
-    def blobify(self):
-        return {
-            "proposal_id": self.proposal.id,
-        }
-
-    def make_task(self):
-        from .models import Task
-
-        task = Task(
-            job_type=self.JOB_TYPE,
-            blob=self.blobify(),
-            execute_after=self.proposal.date_created + timedelta(seconds=self.PRUNE_TIME),
-        )
-        db.session.add(task)
-        db.session.commit()
-
     @staticmethod
-    def process_task(task):
+    def sweep(since, now):
         from grant.proposal.models import Proposal, default_proposal_content
-        proposal = Proposal.query.filter_by(id=task.blob["proposal_id"]).first()
-
-        # If it was deleted or moved out of a draft, noop out
-        if not proposal or proposal.status != ProposalStatus.DRAFT:
-            return
-
-        # If proposal content deviates from the default, noop out
-        if proposal.content != default_proposal_content():
-            return
-
-        # If any of the remaining proposal fields are filled, noop out
-        if proposal.title or proposal.brief or proposal.category or proposal.target != "0":
-            return
-
-        if proposal.payout_address or proposal.milestones:
-            return
-
-        # Otherwise, delete the empty proposal
-        db.session.delete(proposal)
-        db.session.commit()
+        prune_time = timedelta(seconds=PruneDraft.PRUNE_TIME)
+        # drafts with the default content & none of the remaining fields filled in
+        query = Proposal.query \
+            .filter_by(status=ProposalStatus.DRAFT) \
+            .filter(Proposal.date_created <= now - prune_time) \
+            .filter(Proposal.content == default_proposal_content()) \
+            .filter(or_(Proposal.title == None, Proposal.title == '')) \
+            .filter(or_(Proposal.brief == None, Proposal.brief == '')) \
+            .filter(or_(Proposal.category == None, Proposal.category == '')) \
+            .filter(Proposal.target == '0') \
+            .filter(or_(Proposal.payout_address == None, Proposal.payout_address == '')) \
+            .filter(~Proposal.milestones.any())
+        if since:
+            query = query.filter(Proposal.date_created > since - prune_time)
+
+        # deleted through the session, so their team, arbiter etc. go with them
+        for proposal in query.all():
+            db.session.delete(proposal)
 
 
 class MilestoneDeadline:
@@ -193,12 +117,13 @@ class MilestoneDeadline:
 
     def make_task(self):
         from .models import Task
-        task = Task(
+        # one per proposal, re-estimating dates replaces the pending deadline
+        Task.schedule(
             job_type=self.JOB_TYPE,
             blob=self.blobify(),
             execute_after=self.milestone.date_estimated,
+            entity_id=self.proposal.id,
         )
-        db.session.add(task)
         db.session.commit()
 
     @staticmethod
@@ -233,10 +158,35 @@ class MilestoneDeadline:
         })
 
 
+class ArchiveTasks:
+    """Sweep moving tasks completed over ARCHIVE_TIME ago out of the task table, into task_archive."""
+    JOB_TYPE = 6
+    ARCHIVE_TIME = 2592000  # 30 days in seconds
+
+    @staticmethod
+    def sweep(since, now):
+        from .models import Task, task_archive
+        archive_time = timedelta(seconds=ArchiveTasks.ARCHIVE_TIME)
+        archived = db.session.query(*Task.__table__.columns) \
+            .filter(Task.completed == True) \
+            .filter(Task.date_completed <= now - archive_time)
+        if since:
+            archived = archived.filter(Task.date_completed > since - archive_time)
+
+        db.session.execute(task_archive.insert().from_select(list(task_archive.columns), archived.statement))
+        db.session.execute(Task.__table__.delete().where(Task.id.in_(archived.with_entities(Task.id).statement)))
+
+
 JOBS = {
     1: ProposalReminder.process_task,
-    2: ProposalDeadline.process_task,
-    3: ContributionExpired.process_task,
-    4: PruneDraft.process_task,
     5: MilestoneDeadline.process_task
 }
+
+# run periodically over everything that became due since the last run, rather than as a task per row
+# (see grant.task.worker.run_sweeps), job types 3 & 4 were tasks before. Job type 2 was ProposalDeadline, dropped
+# along with the FUNDING_REQUIRED stage, published proposals go straight to WIP
+SWEEPS = [
+    ContributionExpired,
+    PruneDraft,
+    ArchiveTasks,
+]
@@ -1,26 +1,34 @@
 import json
 
-from grant.extensions import ma, db
+from grant.extensions import db
+from grant.utils.camel_case import CamelCaseSchema
+from grant.utils.search import is_postgres
+from sqlalchemy import and_, event, func, or_
+from sqlalchemy.dialects.postgresql import JSONB, insert
 from sqlalchemy.ext import mutable
+from sqlalchemy.orm import Session
 
 from .jobs import JOBS
 
 
 class JsonEncodedDict(db.TypeDecorator):
-    """Enables JSON storage by encoding and decoding on the fly."""
+    """JSONB on Postgres, so it can be indexed & queried (see Task.for_proposals), encoded as text anywhere else."""
     impl = db.Text
 
+    def load_dialect_impl(self, dialect):
+        if dialect.name == 'postgresql':
+            return dialect.type_descriptor(JSONB())
+        return dialect.type_descriptor(db.Text())
+
     def process_bind_param(self, value, dialect):
         if value is None:
-            return '{}'
-        else:
-            return json.dumps(value)
+            value = {}
+        return value if dialect.name == 'postgresql' else json.dumps(value)
 
     def process_result_value(self, value, dialect):
         if value is None:
             return {}
-        else:
-            return json.loads(value)
+        return value if dialect.name == 'postgresql' else json.loads(value)
 
 
 mutable.MutableDict.associate_with(JsonEncodedDict)
@@ -28,30 +36,147 @@ mutable.MutableDict.associate_with(JsonEncodedDict)
 
 class Task(db.Model):
     __tablename__ = 'task'
+    __table_args__ = (
+        db.Index('ix_task_completed_execute_after', 'completed', 'execute_after'),
+        # only pending tasks are ever polled, keeps the index small as completed tasks pile up
+        db.Index('ix_task_pending_execute_after', 'execute_after', postgresql_where=db.text('completed = false')),
+        # at most one pending task per key, see Task.schedule
+        db.Index('ix_task_pending_idempotency_key', 'idempotency_key', unique=True,
+                 postgresql_where=db.text('completed = false'), sqlite_where=db.text('completed = 0')),
+        db.Index('ix_task_blob', 'blob', postgresql_using='gin'),
+    )
 
     id = db.Column(db.Integer(), primary_key=True)
     job_type = db.Column(db.Integer(), nullable=False)
+    idempotency_key = db.Column(db.String(255), nullable=True)
     blob = db.Column(JsonEncodedDict, nullable=False)
     execute_after = db.Column(db.DateTime, nullable=False)
     completed = db.Column(db.Boolean, default=False)
+    date_completed = db.Column(db.DateTime, nullable=True)
+    attempts = db.Column(db.Integer(), nullable=False, default=0, server_default=db.text("0"))
+    last_error = db.Column(db.Text, nullable=True)
 
-    def __init__(self, job_type, blob, execute_after):
+    def __init__(self, job_type, blob, execute_after, idempotency_key=None):
         assert job_type in list(JOBS.keys()), "Not a valid job"
         self.job_type = job_type
+        self.idempotency_key = idempotency_key
         self.blob = blob
         self.execute_after = execute_after
-
-
-class TaskSchema(ma.Schema):
+        self.attempts = 0
+
+    @staticmethod
+    def schedule(job_type, blob, execute_after, entity_id=None):
+        """
+        Adds a task. With an entity_id it's keyed by job type & entity, and replaces the pending task with the
+        same key rather than adding another.
+        """
+        key = f'{job_type}:{entity_id}' if entity_id is not None else None
+        if key and is_postgres():
+            # two schedules of a key at once would both miss the pending task and one insert would then violate
+            # ix_task_pending_idempotency_key, an upsert settles it in the database
+            db.session.flush()
+            stmt = insert(Task.__table__).values(
+                job_type=job_type,
+                idempotency_key=key,
+                blob=blob,
+                execute_after=execute_after,
+                completed=False,
+                attempts=0,
+            )
+            stmt = stmt.on_conflict_do_update(
+                index_elements=['idempotency_key'],
+                index_where=db.text('completed = false'),
+                set_=dict(blob=stmt.excluded.blob, execute_after=stmt.excluded.execute_after, attempts=0,
+                          last_error=None),
+            ).returning(Task.__table__.c.id)
+            task_id = db.session.execute(stmt).scalar()
+            return Task.query.populate_existing().get(task_id)
+        # sqlite takes a database lock for writes, so the lookup below can't race there
+        task = key and Task.query.filter_by(idempotency_key=key, completed=False).with_for_update().first()
+        if task:
+            task.blob = blob
+            task.execute_after = execute_after
+            task.attempts = 0
+            task.last_error = None
+        else:
+            task = Task(job_type=job_type, blob=blob, execute_after=execute_after, idempotency_key=key)
+        db.session.add(task)
+        return task
+
+    @staticmethod
+    def for_proposals(proposal_ids, bind=None):
+        """Filter on tasks about any of the proposals, each a lookup in the GIN index of blob on Postgres."""
+        if is_postgres(bind):
+            return or_(*(Task.blob.op('@>', is_comparison=True)({'proposal_id': i}) for i in proposal_ids))
+        return func.json_extract(Task.blob, '$.proposal_id').in_(proposal_ids)
+
+    @staticmethod
+    def cancel_for_proposals(proposal_ids, session=None):
+        """Deletes the pending tasks of the proposals, in one statement."""
+        session = session or db.session
+        return session.execute(
+            Task.__table__.delete().where(and_(
+                Task.completed == False,
+                Task.for_proposals(proposal_ids, session.connection()),
+            ))
+        ).rowcount
+
+
+# completed tasks are moved here after a while, see grant.task.jobs.ArchiveTasks
+task_archive = db.Table(
+    'task_archive', db.Model.metadata,
+    *(column.copy() for column in Task.__table__.columns),
+    db.Index('ix_task_archive_date_completed', 'date_completed'),
+)
+
+
+@event.listens_for(Session, 'after_flush')
+def cancel_tasks_of_deleted_proposals(session, flush_context):
+    # whichever way proposals get deleted, their tasks would only noop
+    from grant.proposal.models import Proposal
+    proposal_ids = [obj.id for obj in session.deleted if isinstance(obj, Proposal)]
+    if proposal_ids:
+        Task.cancel_for_proposals(proposal_ids, session)
+
+
+class TaskWatermark(db.Model):
+    """
+    Up to when each sweep in grant.task.jobs.SWEEPS has run, so the next run only scans what became due since.
+    Without a row the first run scans everything.
+    """
+    __tablename__ = 'task_watermark'
+
+    job_type = db.Column(db.Integer(), primary_key=True, autoincrement=False)
+    date_swept = db.Column(db.DateTime, nullable=True)
+
+    @staticmethod
+    def claim(job_type):
+        """The sweep's watermark, locked until committed. None while another worker holds it (no-op on sqlite)."""
+        watermark = TaskWatermark.query \
+            .filter_by(job_type=job_type) \
+            .with_for_update(skip_locked=True) \
+            .first()
+        if not watermark and not TaskWatermark.query.filter_by(job_type=job_type).count():
+            watermark = TaskWatermark(job_type=job_type)
+            db.session.add(watermark)
+            db.session.flush()
+        return watermark
+
+
+class TaskSchema(CamelCaseSchema):
     class Meta:
         model = Task
         # Fields to expose
         fields = (
             "id",
             "job_type",
+            "idempotency_key",
             "blob",
             "execute_after",
-            "completed"
+            "completed",
+            "date_completed",
+            "attempts",
+            "last_error",
         )
 
 
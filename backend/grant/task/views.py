@@ -1,25 +1,18 @@
 from datetime import datetime
-from flask import Blueprint, jsonify, current_app
-from sentry_sdk import capture_exception
-from traceback import format_exc
+from flask import Blueprint, jsonify
 
-from grant.task.jobs import JOBS
-from grant.task.models import Task, tasks_schema
-from grant.extensions import db
+from grant.task.models import tasks_schema
+from grant.task.worker import claim_tasks, run_sweeps, run_task
 
 blueprint = Blueprint("task", __name__, url_prefix="/api/v1/task")
 
 
 @blueprint.route("/", methods=["GET"])
 def task():
-    tasks = Task.query.filter(Task.execute_after <= datetime.now()).filter_by(completed=False).all()
+    # prefer `flask run-worker`, this runs the due tasks serially inside the request
+    now = datetime.now()
+    run_sweeps(now=now)
+    tasks = claim_tasks(now=now)
     for each_task in tasks:
-        try:
-            JOBS[each_task.job_type](each_task)
-            each_task.completed = True
-            db.session.add(each_task)
-        except Exception as e:
-            current_app.logger.info("Task #{} failed: {}".format(each_task.id, e))
-            capture_exception(e)
-    db.session.commit()
+        run_task(each_task)
     return jsonify(tasks_schema.dump(tasks))
@@ -0,0 +1,128 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from traceback import format_exc
+
+from flask import current_app
+from sentry_sdk import capture_exception
+
+from grant.extensions import db
+from .jobs import JOBS, SWEEPS
+from .models import Task, TaskWatermark
+
+MAX_ATTEMPTS = 5
+RETRY_DELAY = 60  # seconds, doubled after every failed attempt
+MAX_RETRY_DELAY = 6 * 60 * 60  # 6 hours
+# claimed tasks are pushed this far into the future, so they get picked up again if a worker dies mid-task
+CLAIM_TIMEOUT = 15 * 60  # 15 minutes
+SWEEP_INTERVAL = 60  # seconds
+
+
+def retry_delay(attempts):
+    return timedelta(seconds=min(RETRY_DELAY * 2 ** max(attempts - 1, 0), MAX_RETRY_DELAY))
+
+
+def due_tasks(limit=None, now=None):
+    query = Task.query \
+        .filter(Task.execute_after <= (now or datetime.now())) \
+        .filter_by(completed=False) \
+        .order_by(Task.execute_after, Task.id)
+    if limit:
+        query = query.limit(limit)
+    # other workers skip rows we have locked rather than waiting on them (no-op on sqlite)
+    return query.with_for_update(skip_locked=True)
+
+
+def claim_tasks(limit=None, now=None):
+    now = now or datetime.now()
+    tasks = []
+    for task in due_tasks(limit, now):
+        if task.attempts >= MAX_ATTEMPTS:
+            # a worker died during its last attempt
+            give_up(task, now)
+            continue
+        task.attempts += 1
+        task.execute_after = now + timedelta(seconds=CLAIM_TIMEOUT)
+        db.session.add(task)
+        tasks.append(task)
+    db.session.commit()
+    return tasks
+
+
+def give_up(task, now):
+    # failed for good, completed with its last_error so it leaves the pending indexes & gets archived
+    task.completed = True
+    task.date_completed = now
+    db.session.add(task)
+
+
+def run_task(task):
+    try:
+        JOBS[task.job_type](task)
+        task.completed = True
+        task.date_completed = datetime.now()
+        task.last_error = None
+        db.session.add(task)
+        db.session.commit()
+        return True
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.info("Task #{} failed (attempt {}/{}): {}".format(task.id, task.attempts, MAX_ATTEMPTS, e))
+        capture_exception(e)
+        task.last_error = format_exc()
+        if task.attempts >= MAX_ATTEMPTS:
+            give_up(task, datetime.now())
+        else:
+            task.execute_after = datetime.now() + retry_delay(task.attempts)
+            db.session.add(task)
+        db.session.commit()
+        return False
+
+
+def run_sweeps(now=None):
+    """Runs each sweep over what became due since its watermark, committing it together with the new watermark."""
+    now = now or datetime.now()
+    for job in SWEEPS:
+        watermark = TaskWatermark.claim(job.JOB_TYPE)
+        if not watermark or (watermark.date_swept and watermark.date_swept >= now):
+            db.session.commit()
+            continue
+        try:
+            job.sweep(watermark.date_swept, now)
+            watermark.date_swept = now
+            db.session.add(watermark)
+            db.session.commit()
+        except Exception as e:
+            # the watermark stays put, so the next run sweeps the same range again
+            db.session.rollback()
+            current_app.logger.info("Sweep {} failed: {}".format(job.__name__, e))
+            capture_exception(e)
+
+
+def run_task_by_id(app, task_id):
+    # every thread gets its own app context, and with it its own db session
+    with app.app_context():
+        task = Task.query.get(task_id)
+        return run_task(task)
+
+
+def run_worker(concurrency=4, batch_size=None, poll_interval=5, once=False):
+    app = current_app._get_current_object()
+    batch_size = batch_size or concurrency * 2
+    processed = 0
+    failed = 0
+    last_swept = None
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        while True:
+            if not last_swept or time.monotonic() - last_swept >= SWEEP_INTERVAL:
+                run_sweeps()
+                last_swept = time.monotonic()
+            task_ids = [t.id for t in claim_tasks(limit=batch_size)]
+            db.session.remove()
+            results = list(pool.map(lambda task_id: run_task_by_id(app, task_id), task_ids))
+            processed += len(results)
+            failed += results.count(False)
+            if once and not task_ids:
+                return processed, failed
+            if not task_ids:
+                time.sleep(poll_interval)
@@ -12,7 +12,10 @@ from grant.email.subscription_settings import (
     email_subscriptions_to_dict
 )
 from grant.extensions import ma, db, security
-from grant.utils.misc import make_url, gen_random_id, is_email
+from grant.utils.camel_case import CamelCaseSchema
+from grant.utils.ids import gen_random_id
+from grant.utils.misc import make_url, is_email
+from grant.utils.search import SearchVector
 from grant.utils.social import generate_social_url
 from grant.utils.upload import extract_avatar_filename, construct_avatar_url
 from grant.utils import totp_2fa
@@ -107,12 +110,17 @@ class Avatar(db.Model):
 
 class User(db.Model, UserMixin):
     __tablename__ = "user"
+    __table_args__ = (
+        db.Index("ix_user_search_vector", "search_vector", postgresql_using="gin"),
+    )
+    __search_fields__ = (('A', 'display_name'), ('B', 'email_address'))
 
     id = db.Column(db.Integer(), primary_key=True)
     email_address = db.Column(db.String(255), unique=True, nullable=False)
     password = db.Column(db.String(255), unique=False, nullable=False)
     display_name = db.Column(db.String(255), unique=False, nullable=True)
     title = db.Column(db.String(255), unique=False, nullable=True)
+    search_vector = db.deferred(db.Column(SearchVector, nullable=True))  # see grant.utils.search, only used in SQL
     active = db.Column(db.Boolean, default=True)
     is_admin = db.Column(db.Boolean, default=False, nullable=False, server_default=db.text("FALSE"))
     totp_secret = db.Column(db.String(255), nullable=True)
@@ -309,7 +317,7 @@ class User(db.Model, UserMixin):
         return len(totp_2fa.deserialize_backup_codes(self.backup_codes))
 
 
-class SelfUserSchema(ma.Schema):
+class SelfUserSchema(CamelCaseSchema):
     class Meta:
         model = User
         # Fields to expose
@@ -349,7 +357,7 @@ admin_user_schema = self_user_schema
 admin_users_schema = self_users_schema
 
 
-class UserSchema(ma.Schema):
+class UserSchema(CamelCaseSchema):
     class Meta:
         model = User
         # Fields to expose
@@ -383,7 +391,7 @@ user_schema = UserSchema()
 users_schema = UserSchema(many=True)
 
 
-class SocialMediaSchema(ma.Schema):
+class SocialMediaSchema(CamelCaseSchema):
     class Meta:
         model = SocialMedia
         # Fields to expose
@@ -403,7 +411,7 @@ social_media_schema = SocialMediaSchema()
 social_media_schemas = SocialMediaSchema(many=True)
 
 
-class AvatarSchema(ma.Schema):
+class AvatarSchema(CamelCaseSchema):
     class Meta:
         model = SocialMedia
         # Fields to expose
@@ -414,7 +422,7 @@ avatar_schema = AvatarSchema()
 avatar_schemas = AvatarSchema(many=True)
 
 
-class UserSettingsSchema(ma.Schema):
+class UserSettingsSchema(CamelCaseSchema):
     class Meta:
         model = UserSettings
         fields = (
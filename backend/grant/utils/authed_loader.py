@@ -0,0 +1,40 @@
+from flask import g, has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from grant.extensions import db
+
+
+def authed_has(table: db.Table, column: str, target) -> bool:
+    """
+    Whether the authed user has a row in an association table (user_id, <column>) for target, e.g. if they
+    like a comment. The first lookup for a table fetches the user's rows for every instance of the target's
+    model in the session at once, as those are the ones being serialized, and caches them for the request.
+    """
+    from grant.utils.auth import get_authed_user
+
+    authed = get_authed_user()
+    if not authed:
+        return False
+
+    cache = g.setdefault('authed_associations', {})
+    loaded, has = cache.setdefault((authed.id, table.name), (set(), set()))
+    if target.id not in loaded:
+        # identity keys rather than the instances, reading ids off expired instances would refresh each one
+        model = type(target)
+        ids = {key[1][0] for key in db.session.identity_map.keys() if key[0] is model}
+        ids = (ids | {target.id}) - loaded
+        rows = db.session.query(table.c[column]) \
+            .filter(table.c.user_id == authed.id) \
+            .filter(table.c[column].in_(ids)) \
+            .all()
+        has.update(row[0] for row in rows)
+        loaded.update(ids)
+    return target.id in has
+
+
+@event.listens_for(Session, 'after_flush')
+def clear_authed_associations(session, flush_context):
+    # likes & follows may have just changed
+    if has_app_context():
+        g.pop('authed_associations', None)
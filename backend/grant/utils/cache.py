@@ -0,0 +1,214 @@
+"""
+Read-through cache of serialized responses for hot public endpoints.
+
+Only anonymous requests are cached, as responses carry per-user fields like authed_liked. Entries are tagged
+with the rows they show, by table and id for a detail or just by table for a list, and dropped once a session
+commits writes to those rows. Written rows are those of the models that carry or bump a `stamp` (see
+grant.utils.etag), so a milestone counts as its proposal. Anything else, like nested user profiles, is only as
+fresh as CACHE_DEFAULT_TIMEOUT.
+
+CACHE_TYPE picks the backend: "simple" is an LRU per worker process, so other workers only see
+invalidations once their entries time out, "redis" is shared by all workers and "null" turns caching off.
+"""
+import threading
+import time
+from collections import OrderedDict, Counter
+from functools import wraps
+from urllib.parse import urlencode
+
+from flask import request, current_app
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+
+class LRUBackend:
+    name = 'simple'
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.counters = Counter()
+        self.lock = threading.Lock()
+
+    def get(self, key, tags=()):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            value, expires, _ = entry
+            if expires < time.time():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, timeout, tags=()):
+        with self.lock:
+            self.entries[key] = (value, time.time() + timeout, frozenset(tags))
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def invalidate(self, tags=None):
+        with self.lock:
+            if tags is None:
+                self.entries.clear()
+                return
+            for key in [key for key, (_, _, entry_tags) in self.entries.items() if not entry_tags.isdisjoint(tags)]:
+                del self.entries[key]
+
+    def count(self, counter):
+        with self.lock:
+            self.counters[counter] += 1
+
+    def stats(self):
+        with self.lock:
+            return {'entries': len(self.entries), 'counters': dict(self.counters)}
+
+
+class RedisBackend:
+    name = 'redis'
+    prefix = 'grant:cache:'
+
+    def __init__(self, url):
+        import redis
+        self.redis = redis.StrictRedis.from_url(url)
+
+    def generation(self, tags=()):
+        # the global one and each tag's are bumped to invalidate, entries of older generations are left to expire
+        keys = [self.prefix + 'generation'] + [f'{self.prefix}generation:{tag}' for tag in sorted(tags)]
+        return '.'.join(str(int(value or 0)) for value in self.redis.mget(keys))
+
+    def get(self, key, tags=()):
+        return self.redis.get(f'{self.prefix}{self.generation(tags)}:{key}')
+
+    def set(self, key, value, timeout, tags=()):
+        self.redis.setex(f'{self.prefix}{self.generation(tags)}:{key}', timeout, value)
+
+    def invalidate(self, tags=None):
+        if tags is None:
+            self.redis.incr(self.prefix + 'generation')
+            return
+        pipeline = self.redis.pipeline()
+        for tag in tags:
+            pipeline.incr(f'{self.prefix}generation:{tag}')
+        pipeline.execute()
+
+    def count(self, counter):
+        self.redis.hincrby(self.prefix + 'counters', counter, 1)
+
+    def stats(self):
+        counters = self.redis.hgetall(self.prefix + 'counters')
+        return {
+            'generation': self.generation(),
+            'counters': {k.decode('utf-8'): int(v) for k, v in counters.items()},
+        }
+
+
+class ResponseCache:
+    def __init__(self):
+        self.backend = None
+        self.timeout = 60
+
+    def init_app(self, app):
+        cache_type = app.config.get('CACHE_TYPE', 'simple')
+        self.timeout = app.config.get('CACHE_DEFAULT_TIMEOUT', 60)
+        if cache_type == 'simple':
+            self.backend = LRUBackend(app.config.get('CACHE_THRESHOLD', 500))
+        elif cache_type == 'redis':
+            self.backend = RedisBackend(app.config['CACHE_REDIS_URL'])
+        elif cache_type == 'null':
+            self.backend = None
+        else:
+            raise ValueError(f'Unknown CACHE_TYPE {cache_type}')
+
+    def cached(self, name, tables, when=None):
+        """
+        Serve the view's 200 responses from the cache for anonymous requests, keyed by name, path & query
+        args. `tables` maps each table the response shows to the view kwarg with the id of the one row it shows,
+        or None if it may show any, e.g. a list. `when`, if given, is called with the view's kwargs and decides
+        if the request is cacheable.
+        """
+        def decorator(f):
+            @wraps(f)
+            def decorated(*args, **kwargs):
+                from grant.utils.auth import get_authed_user
+
+                if not self.backend or get_authed_user() or (when and not when(**kwargs)):
+                    return f(*args, **kwargs)
+                try:
+                    tags = [table if arg is None else f'{table}:{int(kwargs[arg])}' for table, arg in tables.items()]
+                except ValueError:
+                    # not an id, so nothing to find
+                    return f(*args, **kwargs)
+
+                key = f'{name}:{request.path}?{urlencode(sorted(request.args.items(multi=True)))}'
+                body = self.backend.get(key, tags)
+                if body is not None:
+                    self.backend.count(f'{name}:hits')
+                    return current_app.response_class(body, mimetype='application/json')
+
+                self.backend.count(f'{name}:misses')
+                response = current_app.make_response(f(*args, **kwargs))
+                if response.status_code == 200:
+                    self.backend.set(key, response.get_data(), self.timeout, tags)
+                return response
+
+            return decorated
+
+        return decorator
+
+    def invalidate(self, tags=None):
+        """Drops the entries with any of tags, or all of them."""
+        if self.backend:
+            self.backend.invalidate(tags)
+
+    def stats(self):
+        if not self.backend:
+            return {'backend': None}
+        stats = self.backend.stats()
+        endpoints = {}
+        for counter, value in stats.pop('counters').items():
+            name, kind = counter.rsplit(':', 1)
+            endpoints.setdefault(name, {'hits': 0, 'misses': 0})[kind] = value
+        return {'backend': self.backend.name, 'endpoints': endpoints, **stats}
+
+
+def mark_stale(session, table: str, id: int):
+    """Responses showing the row go stale once the session commits."""
+    session.info.setdefault('stale_rows', {}).setdefault(table, set()).add(id)
+
+
+def stale_tags(rows: dict) -> set:
+    # a written row stales the responses showing it, and those showing any row of its table
+    return {tag for table, ids in rows.items() for tag in [table] + [f'{table}:{id}' for id in ids]}
+
+
+@event.listens_for(Session, 'after_flush')
+def collect_stale_rows(session, flush_context):
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if obj in session.dirty and not session.is_modified(obj):
+            continue
+        # only read what's loaded, like grant.utils.etag.collect_stamps
+        state = inspect(obj)
+        values = state.dict
+        if hasattr(type(obj), 'stamp'):
+            id = state.identity[0] if state.identity else values.get('id')
+            if id:
+                mark_stale(session, obj.__tablename__, id)
+        for table, attr in getattr(obj, '__stamp_owners__', ()):
+            if values.get(attr):
+                mark_stale(session, table, values[attr])
+
+
+@event.listens_for(Session, 'after_commit')
+def invalidate_on_commit(session):
+    rows = session.info.pop('stale_rows', None)
+    if rows:
+        from grant.extensions import response_cache
+        response_cache.invalidate(stale_tags(rows))
+
+
+@event.listens_for(Session, 'after_rollback')
+def forget_stale_rows(session):
+    session.info.pop('stale_rows', None)
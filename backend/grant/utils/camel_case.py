@@ -0,0 +1,65 @@
+"""
+Responses use camelCase keys, the models and views snake_case. Schemas extending CamelCaseSchema dump camelCase
+keys directly and mark their output as converted, so `camelize` (run on every response, see app.py) only has to
+walk what views put around schema dumps rather than the whole payload.
+"""
+from functools import lru_cache
+
+from animal_case import to_camel_case as _to_camel_case, to_snake_case as _to_snake_case
+
+from marshmallow import post_dump
+
+from grant.extensions import ma
+
+# a few hundred distinct field & argument names in all
+to_camel_case = lru_cache(maxsize=None)(_to_camel_case)
+to_snake_case = lru_cache(maxsize=None)(_to_snake_case)
+
+
+class CamelCaseDict(dict):
+    """Output of a CamelCaseSchema, its keys & values are already camelCase"""
+
+
+class CamelCaseList(list):
+    """Output of a CamelCaseSchema with many=True"""
+
+
+def convert_keys(data, convert):
+    # same as animal_case.animalify, minus the already converted schema output
+    if isinstance(data, (CamelCaseDict, CamelCaseList)):
+        return data
+    if isinstance(data, dict):
+        return {
+            convert(key) if isinstance(key, str) else key: convert_keys(value, convert)
+            for key, value in data.items()
+        }
+    if isinstance(data, list):
+        return [convert_keys(value, convert) for value in data]
+    return data
+
+
+def camelize(data):
+    return convert_keys(data, to_camel_case)
+
+
+def snakeize(data):
+    return convert_keys(data, to_snake_case)
+
+
+class CamelCaseSchema(ma.Schema):
+    def on_bind_field(self, field_name, field_obj):
+        # once per field when the schema is instantiated, i.e. on import for the module level schemas
+        if not field_obj.data_key:
+            field_obj.data_key = to_camel_case(field_name)
+
+    @post_dump(pass_many=True)
+    def mark_camel_case(self, data, many):
+        # runs after the schemas' own post_dump hooks. Nested schemas are converted already, dicts from methods,
+        # defaults & hooks aren't
+        for item in (data if many else [data]):
+            for key, value in item.items():
+                if isinstance(value, (dict, list)):
+                    item[key] = camelize(value)
+        if many:
+            return CamelCaseList(data)
+        return CamelCaseDict(data)
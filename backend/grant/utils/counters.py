@@ -0,0 +1,65 @@
+"""
+Stored counts of many-to-many relationships with users, e.g. Proposal.likes_count for Proposal.likes, so listing
+rows doesn't count their likes & follows with a subquery each.
+
+Counted relationships are only changed through set_associated, which writes the association row directly, rather
+than loading the whole collection to append to it, and moves the counter by the rows written with an atomic
+`UPDATE ... SET n = n + k`. Concurrent requests can't lose counts that way, `flask rebuild-counters` fixes any
+made stale by writes from elsewhere.
+"""
+from sqlalchemy import and_, func, select
+
+from grant.extensions import db
+from grant.utils.cache import mark_stale
+
+
+def counter_column():
+    return db.Column(db.Integer, nullable=False, default=0, server_default=db.text("0"))
+
+
+def association(model, relationship):
+    # the association table & its column for the model's side, e.g. (proposal_liker, proposal_liker.c.proposal_id)
+    table = getattr(model, relationship).property.secondary
+    return table, table.c[f'{model.__tablename__}_id']
+
+
+def set_associated(target, relationship: str, counter: str, user, present: bool):
+    """Add user to or remove them from target's relationship, e.g. a like, keeping the counter in step."""
+    model = type(target)
+    table, column = association(model, relationship)
+    where = and_(table.c.user_id == user.id, column == target.id)
+    if present:
+        exists = db.session.query(table.c.user_id).filter(where).first()
+        changed = 0 if exists else db.session.execute(
+            table.insert().values({table.c.user_id: user.id, column: target.id})
+        ).rowcount
+    else:
+        changed = -db.session.execute(table.delete().where(where)).rowcount
+
+    # collections loaded before don't know about the row
+    db.session.expire(target, [relationship])
+    back_populates = getattr(model, relationship).property.back_populates
+    if back_populates:
+        db.session.expire(user, [back_populates])
+
+    if changed:
+        # the session doesn't count an expression or raw writes as changing target, so bump its stamp (if it has
+        # one, comments don't) and stale cached responses explicitly (see grant.utils.etag & grant.utils.cache)
+        if 'stamp' in model.__table__.c:
+            db.session.info.setdefault('stamp_ids', {}).setdefault(model.__tablename__, set()).add(target.id)
+        mark_stale(db.session, model.__tablename__, target.id)
+        # flushed as UPDATE ... SET n = n + changed
+        setattr(target, counter, getattr(model, counter) + changed)
+        db.session.flush()
+
+
+def rebuild_counters(model, relationship: str, counter: str, verify: bool = False) -> int:
+    """Recounts counter from the association table, returns how many rows were stale."""
+    table, column = association(model, relationship)
+    count = select([func.count()]).where(column == model.id).correlate_except(table).as_scalar()
+    stale = model.query.filter(getattr(model, counter) != count)
+    if verify:
+        return stale.count()
+    updated = stale.update({getattr(model, counter): count}, synchronize_session=False)
+    db.session.commit()
+    return updated
@@ -124,3 +124,11 @@ class ProposalChangeEnum(CustomEnum):
 
 ProposalChange = ProposalChangeEnum()
 
+
+class EmailOutboxStatusEnum(CustomEnum):
+    PENDING = 'PENDING'
+    SENT = 'SENT'
+    DEAD = 'DEAD'
+
+
+EmailOutboxStatus = EmailOutboxStatusEnum()
@@ -0,0 +1,98 @@
+"""
+Conditional GETs for polled read endpoints.
+
+Proposals, RFPs and CCRs carry a `stamp` that moves forward whenever the row, or a row declared as theirs in
+`__stamp_owners__` (milestones, invites etc.), is written through the session. Views decorated with
+`conditional` compute an ETag from cheap stamp queries and answer a matching If-None-Match with a 304 before
+loading or serializing anything, otherwise the ETag is sent along with the response (see app.py).
+"""
+import hashlib
+import time
+from functools import wraps
+
+from flask import g, request, current_app
+from sqlalchemy import case, event, inspect
+from sqlalchemy.orm import Session
+
+from grant.extensions import db
+
+
+def new_stamp():
+    # microseconds, so stamps also order changes across rows & tables
+    return int(time.time() * 1000000)
+
+
+def stamp_column():
+    return db.Column(db.BigInteger, nullable=False, default=new_stamp, server_default=db.text("0"), index=True)
+
+
+@event.listens_for(Session, 'after_flush')
+def collect_stamps(session, flush_context):
+    # new/dirty/deleted still describe what was just flushed here, but not in after_flush_postexec
+    ids = session.info.setdefault('stamp_ids', {})
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if obj in session.dirty and not session.is_modified(obj):
+            continue
+        # only read what's loaded, deleted rows can't load expired attributes (e.g. a stamp bumped earlier)
+        values = inspect(obj).dict
+        if hasattr(type(obj), 'stamp') and obj not in session.new and obj not in session.deleted:
+            ids.setdefault(obj.__tablename__, set()).add(inspect(obj).identity[0])
+        for table, attr in getattr(obj, '__stamp_owners__', ()):
+            if values.get(attr):
+                ids.setdefault(table, set()).add(values[attr])
+
+
+@event.listens_for(Session, 'after_flush_postexec')
+def bump_stamps(session, flush_context):
+    ids_by_table = session.info.pop('stamp_ids', None)
+    if not ids_by_table:
+        return
+    now = new_stamp()
+    for name, ids in ids_by_table.items():
+        table = db.metadata.tables[name]
+        session.execute(
+            table.update()
+            .where(table.c.id.in_(ids))
+            .values(stamp=case([(table.c.stamp + 1 > now, table.c.stamp + 1)], else_=now))
+        )
+    # loaded instances read their new stamp on next access
+    for key, obj in list(session.identity_map.items()):
+        if key[0].__tablename__ in ids_by_table and key[1][0] in ids_by_table[key[0].__tablename__]:
+            session.expire(obj, ['stamp'])
+
+
+def make_etag(*stamps):
+    from grant.utils.auth import get_authed_user
+
+    # responses include per-user fields like authed_liked
+    authed = get_authed_user()
+    key = repr((request.full_path, authed.id if authed else None) + tuple(stamps))
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+
+def conditional(get_stamps):
+    """
+    get_stamps is called with the view's kwargs and returns the stamps the response depends on, or None to
+    skip the check (e.g. when there is nothing to find and the view should 404).
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            stamps = get_stamps(**kwargs)
+            if stamps is not None:
+                g.etag = make_etag(*stamps)
+                if request.if_none_match.contains(g.etag):
+                    response = current_app.response_class(status=304)
+                    set_etag(response)
+                    return response
+            return f(*args, **kwargs)
+
+        return decorated
+
+    return decorator
+
+
+def set_etag(response):
+    response.set_etag(g.etag)
+    response.vary.add('Cookie')
+    return response
@@ -1,2 +1,10 @@
 class ValidationException(Exception):
     pass
+
+
+class BlockchainException(Exception):
+    pass
+
+
+class BlockchainNotFound(BlockchainException):
+    pass
@@ -0,0 +1,98 @@
+"""
+Public ids for new rows, without looking them up first. Each process reserves blocks of BLOCK_SIZE counters (one
+insert into id_block, whose serial id numbers the block) and hands them out in memory. Counters are mapped onto
+[MIN_ID, MAX_ID] by a keyed permutation, so ids look random but two counters never share one. Ids of rows from
+before (random, or permuted with another key) are skipped with one query per block.
+"""
+import hashlib
+import hmac
+import threading
+
+from flask import current_app
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from grant.extensions import db
+
+MIN_ID = 100000
+MAX_ID = pow(2, 31) - 1
+# fixed, changing it would number blocks differently and reuse counters
+BLOCK_SIZE = 100
+HALF_BITS = 16
+ROUNDS = 4
+
+id_block = db.Table(
+    'id_block', db.Model.metadata,
+    db.Column('id', db.Integer(), primary_key=True),
+)
+
+
+def permute(counter: int, key: bytes, tweak: str) -> int:
+    """Feistel network over 32 bits, cycle-walked into the id range, i.e. a bijection of [0, MAX_ID - MIN_ID]."""
+    domain = MAX_ID - MIN_ID + 1
+    mask = (1 << HALF_BITS) - 1
+    value = counter
+    while True:
+        left, right = value >> HALF_BITS, value & mask
+        for i in range(ROUNDS):
+            digest = hmac.new(key, f'{tweak}:{i}:{right}'.encode('utf-8'), hashlib.sha256).digest()
+            left, right = right, left ^ (int.from_bytes(digest[:4], 'big') & mask)
+        value = (left << HALF_BITS) | right
+        if value < domain:
+            return MIN_ID + value
+
+
+class IdAllocator:
+    def __init__(self):
+        self.lock = threading.Lock()
+        # model name -> ids left in its current block
+        self.blocks = {}
+
+    def reserve_block(self, model):
+        block = db.session.execute(id_block.insert()).inserted_primary_key[0]
+        # not committed yet, see forget_blocks
+        db.session.info.setdefault('id_blocks', set()).add(model.__tablename__)
+        key = current_app.config['ID_PERMUTATION_KEY'].encode('utf-8')
+        ids = [permute(counter, key, model.__tablename__)
+               for counter in range(block * BLOCK_SIZE, (block + 1) * BLOCK_SIZE)
+               if counter <= MAX_ID - MIN_ID]
+        with db.session.no_autoflush:
+            taken = {id for (id,) in db.session.query(model.id).filter(model.id.in_(ids))}
+        # popped from the end
+        return [id for id in reversed(ids) if id not in taken]
+
+    def next_id(self, model):
+        with self.lock:
+            ids = self.blocks.get(model.__tablename__)
+            while not ids:
+                ids = self.reserve_block(model)
+                self.blocks[model.__tablename__] = ids
+            return ids.pop()
+
+    def reset(self, tablenames=None):
+        with self.lock:
+            if tablenames is None:
+                self.blocks = {}
+            for tablename in tablenames or ():
+                self.blocks.pop(tablename, None)
+
+
+id_allocator = IdAllocator()
+
+
+def gen_random_id(model):
+    return id_allocator.next_id(model)
+
+
+@event.listens_for(Session, 'after_commit')
+def keep_blocks(session):
+    session.info.pop('id_blocks', None)
+
+
+@event.listens_for(Session, 'after_rollback')
+def forget_blocks(session):
+    # where id_block's ids are rolled back (sqlite), the blocks reserved in the transaction could be handed out
+    # again, blocks from committed transactions stay
+    tablenames = session.info.pop('id_blocks', None)
+    if tablenames:
+        id_allocator.reset(tablenames)
@@ -0,0 +1,40 @@
+"""
+Response body encoding. JSON_ENCODER picks "orjson" (the default, if it's installed) or "json", the stdlib
+encoder as used by flask.jsonify. Both produce the same documents as jsonify did.
+"""
+from flask import current_app, json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def stdlib_dumps(data):
+    return json.dumps(data, separators=(',', ':')).encode('utf-8')
+
+
+def orjson_default(obj):
+    # anything orjson doesn't handle itself, like Decimals, or datetimes which flask sends as http dates
+    return current_app.json_encoder().default(obj)
+
+
+def orjson_dumps(data):
+    option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+    if current_app.config['JSON_SORT_KEYS']:
+        option |= orjson.OPT_SORT_KEYS
+    return orjson.dumps(data, default=orjson_default, option=option)
+
+
+def dumps(data):
+    if orjson and current_app.config.get('JSON_ENCODER', 'orjson') == 'orjson':
+        return orjson_dumps(data)
+    return stdlib_dumps(data)
+
+
+def json_response(data, status=200):
+    return current_app.response_class(
+        dumps(data) + b'\n',
+        status=status,
+        mimetype=current_app.config['JSONIFY_MIMETYPE'],
+    )
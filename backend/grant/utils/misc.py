@@ -49,14 +49,6 @@ def is_email(email: str):
     return bool(re.match(r"[^@]+@[^@]+\.[^@]+", email))
 
 
-def from_zat(zat: int):
-    return zat / 100000000
-
-
-def to_zat(zec: float):
-    return zec * 100000000
-
-
 def make_preview(content: str, max_length: int):
     truncated = False
 
@@ -74,14 +66,3 @@ def make_preview(content: str, max_length: int):
     return content + '...' if truncated else content
 
 
-def gen_random_id(model):
-    min_id = 100000
-    max_id = pow(2, 31) - 1
-    random_id = random.randint(min_id, max_id)
-
-    # If it already exists, generate a new one (recursively)
-    existing = model.query.filter_by(id=random_id).first()
-    if existing:
-        random_id = gen_random_id(model)
-
-    return random_id
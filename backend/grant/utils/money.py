@@ -0,0 +1,62 @@
+"""
+Amounts in fixed point. Models and the API keep handling them as decimal strings ("1.5"), but columns store whole
+units of the smallest denomination, so sums, comparisons and sorts run natively in SQL and can use indexes:
+ZEC amounts & targets in zatoshi (AMOUNT_SCALE) and percentages in basis points (PERCENT_SCALE).
+
+Assigned values are normalized right away by the models' validators (see normalize), so what's read back after
+a commit is what was set. Digits past the scale are truncated.
+"""
+from decimal import Decimal, InvalidOperation, ROUND_DOWN
+
+from sqlalchemy.types import TypeDecorator, BigInteger
+
+from grant.utils.exceptions import ValidationException
+
+AMOUNT_SCALE = 8
+PERCENT_SCALE = 2
+
+
+def to_units(value, scale: int) -> int:
+    try:
+        amount = Decimal(str(value).strip())
+    except InvalidOperation:
+        raise ValidationException(f'"{value}" is not a number')
+    if not amount.is_finite():
+        raise ValidationException(f'"{value}" is not a number')
+    return int(amount.scaleb(scale).to_integral_value(rounding=ROUND_DOWN))
+
+
+def from_units(units: int, scale: int) -> str:
+    # "200" rather than "2E+2"
+    return '{:f}'.format(Decimal(units).scaleb(-scale).normalize())
+
+
+def normalize(value, scale: int):
+    if value is None:
+        return None
+    return from_units(to_units(value, scale), scale)
+
+
+def is_number(value: str) -> bool:
+    try:
+        to_units(value, 0)
+        return True
+    except ValidationException:
+        return False
+
+
+class FixedPoint(TypeDecorator):
+    impl = BigInteger
+
+    def __init__(self, scale: int):
+        super().__init__()
+        self.scale = scale
+
+    def process_bind_param(self, value, dialect):
+        return None if value is None else to_units(value, self.scale)
+
+    def process_literal_param(self, value, dialect):
+        return self.process_bind_param(value, dialect)
+
+    def process_result_value(self, value, dialect):
+        return None if value is None else from_units(value, self.scale)
@@ -1,6 +1,12 @@
 import abc
+import base64
+import json
+import operator
+from datetime import datetime
 
-from sqlalchemy import or_
+from sqlalchemy import or_, and_, inspect
+from sqlalchemy.sql import operators
+from sqlalchemy.sql.elements import UnaryExpression
 
 from grant.ccr.models import CCR
 from grant.comment.models import Comment, comments_schema
@@ -9,6 +15,8 @@ from grant.proposal.models import db, ma, Proposal, ProposalContribution, Propos
 from grant.user.models import User, UserSettings, users_schema
 from .enums import CCRStatus, ProposalStatus, ProposalStage, Category, ContributionStatus, ProposalArbiterStatus, \
     MilestoneStage
+from .money import is_number
+from .search import RELEVANCE_SORT, search_filter, relevance_order
 
 
 def extract_filters(sw, strings):
@@ -21,22 +29,153 @@ class PaginationException(Exception):
     pass
 
 
+def encode_cursor(sort: str, direction: str, value, id: int):
+    if isinstance(value, datetime):
+        value = {'dt': value.isoformat()}
+    data = json.dumps({'sort': sort, 'dir': direction, 'value': value, 'id': id})
+    return base64.urlsafe_b64encode(data.encode('utf-8')).decode('utf-8')
+
+
+def decode_cursor(cursor: str):
+    data = json.loads(base64.urlsafe_b64decode(cursor.encode('utf-8')).decode('utf-8'))
+    value = data['value']
+    if isinstance(value, dict):
+        value = datetime.fromisoformat(value['dt'])
+    return data['sort'], data['dir'], value, data['id']
+
+
+def split_sort(clause):
+    # SORT_MAP values are either a column or column.desc()
+    if isinstance(clause, UnaryExpression) and clause.modifier in (operators.desc_op, operators.asc_op):
+        return clause.element, clause.modifier == operators.desc_op
+    return clause.__clause_element__(), False
+
+
+def estimate_count(query: db.Query):
+    # the planner's row estimate, a full COUNT(*) is what cursor mode is avoiding
+    if db.engine.dialect.name != 'postgresql':
+        return None
+    statement = query.order_by(None).statement.compile(dialect=db.engine.dialect)
+    cursor = db.session.connection().connection.cursor()
+    cursor.execute('EXPLAIN (FORMAT JSON) ' + str(statement), statement.params)
+    return int(cursor.fetchone()[0][0]['Plan']['Plan Rows'])
+
+
 class Pagination(abc.ABC):
+    # the model searched by its search_vector, which also enables the RELEVANCE sort when searching
+    SEARCH_MODEL = None
+
     def validate_filters(self, filters: list):
         if self.FILTERS:
             for f in filters:
                 if f not in self.FILTERS:
                     self._raise(f'unsupported filter: {f}')
 
-    def validate_sort(self, sort: str):
+    def validate_sort(self, sort: str, search: str = None):
+        if sort == RELEVANCE_SORT and self.SEARCH_MODEL:
+            if not search:
+                self._raise(f'sort {sort} requires a search')
+            return
         if self.SORT_MAP:
             if sort not in self.SORT_MAP:
                 self._raise(f'unsupported sort: {sort}')
 
+    def sort_clauses(self, sort: str, search: str):
+        if sort == RELEVANCE_SORT:
+            return relevance_order(self.SEARCH_MODEL, search)
+        return [self.SORT_MAP[sort]]
+
     def _raise(self, desc: str):
         name = self.__class__.__name__
         raise PaginationException(f'{name} {desc}')
 
+    def make_page(self, schema: ma.Schema, query: db.Query, page: int, cursor: str, filters: list, search: str,
+                  sort: str):
+        """
+        Pages by number with OFFSET and a COUNT(*), unless a cursor is given ('' for the first page).
+        Cursor pages are fetched by keyset from the SORT_MAP column & id of the first/last items,
+        and come with next/prev cursors and an estimated total (where the database can estimate).
+        """
+        result = {
+            'page_size': self.PAGE_SIZE,
+            'filters': filters,
+            'search': search,
+            'sort': sort
+        }
+        if cursor is None:
+            res = query.paginate(page, self.PAGE_SIZE, False)
+            return {
+                **result,
+                'page': res.page,
+                'total': res.total,
+                'items': schema.dump(res.items),
+            }
+
+        items, prev_cursor, next_cursor = self.seek(query, sort, cursor)
+        return {
+            **result,
+            'page': None,
+            'total': estimate_count(query),
+            'items': schema.dump(items),
+            'cursor': cursor,
+            'prev_cursor': prev_cursor,
+            'next_cursor': next_cursor,
+        }
+
+    def seek(self, query: db.Query, sort: str, cursor: str):
+        if sort not in self.SORT_MAP:
+            self._raise(f'unsupported sort for cursor: {sort}')
+        model = query.column_descriptions[0]['entity']
+        column, desc = split_sort(self.SORT_MAP[sort])
+        id_column = inspect(model).primary_key[0]
+        attr = inspect(model).get_property_by_column(column).key
+        direction, value, id = 'next', None, None
+        if cursor:
+            try:
+                cursor_sort, direction, value, id = decode_cursor(cursor)
+            except Exception:
+                self._raise('invalid cursor')
+            if cursor_sort != sort:
+                self._raise(f'cursor is for sort {cursor_sort}, not {sort}')
+
+        # nulls always sort last in cursor mode, so paging doesn't depend on the database's null ordering
+        backwards = direction == 'prev'
+        if backwards:
+            # walk the same order in reverse, the page is flipped back afterwards
+            order = [column.asc().nullsfirst(), id_column.asc()] if desc else \
+                [column.desc().nullsfirst(), id_column.desc()]
+        else:
+            order = [column.desc().nullslast(), id_column.desc()] if desc else \
+                [column.asc().nullslast(), id_column.asc()]
+        query = query.order_by(None).order_by(*order)
+
+        if cursor:
+            op = operator.lt if desc != backwards else operator.gt
+            if value is None:
+                seek = and_(column.is_(None), op(id_column, id))
+                if backwards:
+                    seek = or_(column.isnot(None), seek)
+            else:
+                seek = or_(op(column, value), and_(column == value, op(id_column, id)))
+                if not backwards:
+                    seek = or_(seek, column.is_(None))
+            query = query.filter(seek)
+
+        items = query.limit(self.PAGE_SIZE + 1).all()
+        has_more = len(items) > self.PAGE_SIZE
+        items = items[:self.PAGE_SIZE]
+        if backwards:
+            items.reverse()
+
+        def make_cursor(item, direction):
+            return encode_cursor(sort, direction, getattr(item, attr), getattr(item, id_column.key))
+
+        has_prev = has_more if backwards else bool(cursor)
+        has_next = bool(cursor) if backwards else has_more
+        prev_cursor = make_cursor(items[0], 'prev') if items and has_prev else None
+        next_cursor = make_cursor(items[-1], 'next') if items and has_next else None
+        return items, prev_cursor, next_cursor
+
     # if we ever want to do more interacting from outside
     # consider moving these args into __init__ and attaching to self
     @abc.abstractmethod
@@ -48,12 +187,14 @@ class Pagination(abc.ABC):
             filters: list,
             search: str,
             sort: str,
+            cursor: str,
     ):
         pass
 
 
 class ProposalPagination(Pagination):
     def __init__(self):
+        self.SEARCH_MODEL = Proposal
         self.FILTERS = [f'STATUS_{s}' for s in ProposalStatus.list()]
         self.FILTERS.extend([f'STAGE_{s}' for s in ProposalStage.list()])
         self.FILTERS.extend([f'STAGE_NOT_{s}' for s in ProposalStage.list()])
@@ -77,6 +218,7 @@ class ProposalPagination(Pagination):
             filters: list = None,
             search: str = None,
             sort: str = 'PUBLISHED:DESC',
+            cursor: str = None,
     ):
         query = query or Proposal.query
         sort = sort or 'PUBLISHED:DESC'
@@ -110,25 +252,16 @@ class ProposalPagination(Pagination):
             if 'ACCEPTED_WITHOUT_FUNDING' in filters:
                 query = query.filter(Proposal.accepted_with_funding == False)
 
-        # SORT (see self.SORT_MAP)
+        # SORT (see self.SORT_MAP, or RELEVANCE when searching)
         if sort:
-            self.validate_sort(sort)
-            query = query.order_by(self.SORT_MAP[sort])
+            self.validate_sort(sort, search)
+            query = query.order_by(*self.sort_clauses(sort, search))
 
         # SEARCH
         if search:
-            query = query.filter(Proposal.title.ilike(f'%{search}%'))
+            query = search_filter(query, Proposal, search)
 
-        res = query.paginate(page, self.PAGE_SIZE, False)
-        return {
-            'page': res.page,
-            'total': res.total,
-            'page_size': self.PAGE_SIZE,
-            'items': schema.dump(res.items),
-            'filters': filters,
-            'search': search,
-            'sort': sort
-        }
+        return self.make_page(schema, query, page, cursor, filters, search, sort)
 
 
 class ContributionPagination(Pagination):
@@ -151,6 +284,7 @@ class ContributionPagination(Pagination):
             filters: list = None,
             search: str = None,
             sort: str = 'PUBLISHED:DESC',
+            cursor: str = None,
     ):
         query = query or ProposalContribution.query
         sort = sort or 'CREATED:DESC'
@@ -193,27 +327,19 @@ class ContributionPagination(Pagination):
             self.validate_sort(sort)
             query = query.order_by(self.SORT_MAP[sort])
 
-        # SEARCH can match txids or amounts
+        # SEARCH can match txids or, exactly, amounts
         if search:
-            query = query.filter(or_(
-                ProposalContribution.amount.ilike(f'%{search}%'),
-                ProposalContribution.tx_id.ilike(f'%{search}%'),
-            ))
+            matches = [ProposalContribution.tx_id.ilike(f'%{search}%')]
+            if is_number(search):
+                matches.append(ProposalContribution.amount == search)
+            query = query.filter(or_(*matches))
 
-        res = query.paginate(page, self.PAGE_SIZE, False)
-        return {
-            'page': res.page,
-            'total': res.total,
-            'page_size': self.PAGE_SIZE,
-            'items': schema.dump(res.items),
-            'filters': filters,
-            'search': search,
-            'sort': sort
-        }
+        return self.make_page(schema, query, page, cursor, filters, search, sort)
 
 
 class UserPagination(Pagination):
     def __init__(self):
+        self.SEARCH_MODEL = User
         self.FILTERS = ['BANNED', 'SILENCED', 'ARBITER']
         self.PAGE_SIZE = 9
         self.SORT_MAP = {
@@ -231,6 +357,7 @@ class UserPagination(Pagination):
             filters: list = None,
             search: str = None,
             sort: str = 'EMAIL:DESC',
+            cursor: str = None,
     ):
         query = query or Proposal.query
         sort = sort or 'EMAIL:DESC'
@@ -246,32 +373,21 @@ class UserPagination(Pagination):
                 query = query.join(User.arbiter_proposals) \
                     .filter(ProposalArbiter.status == ProposalArbiterStatus.ACCEPTED)
 
-        # SORT (see self.SORT_MAP)
+        # SORT (see self.SORT_MAP, or RELEVANCE when searching)
         if sort:
-            self.validate_sort(sort)
-            query = query.order_by(self.SORT_MAP[sort])
+            self.validate_sort(sort, search)
+            query = query.order_by(*self.sort_clauses(sort, search))
 
         # SEARCH
         if search:
-            query = query.filter(
-                User.email_address.ilike(f'%{search}%') |
-                User.display_name.ilike(f'%{search}%')
-            )
+            query = search_filter(query, User, search)
 
-        res = query.paginate(page, self.PAGE_SIZE, False)
-        return {
-            'page': res.page,
-            'total': res.total,
-            'page_size': self.PAGE_SIZE,
-            'items': schema.dump(res.items),
-            'filters': filters,
-            'search': search,
-            'sort': sort
-        }
+        return self.make_page(schema, query, page, cursor, filters, search, sort)
 
 
 class CommentPagination(Pagination):
     def __init__(self):
+        self.SEARCH_MODEL = Comment
         self.FILTERS = ['REPORTED', 'HIDDEN']
         self.PAGE_SIZE = 10
         self.SORT_MAP = {
@@ -287,6 +403,7 @@ class CommentPagination(Pagination):
             filters: list = None,
             search: str = None,
             sort: str = 'CREATED:DESC',
+            cursor: str = None,
     ):
         query = query or Comment.query
         sort = sort or 'CREATED:DESC'
@@ -299,31 +416,21 @@ class CommentPagination(Pagination):
             if 'HIDDEN' in filters:
                 query = query.filter(Comment.hidden == True)
 
-        # SORT (see self.SORT_MAP)
+        # SORT (see self.SORT_MAP, or RELEVANCE when searching)
         if sort:
-            self.validate_sort(sort)
-            query = query.order_by(self.SORT_MAP[sort])
+            self.validate_sort(sort, search)
+            query = query.order_by(*self.sort_clauses(sort, search))
 
         # SEARCH
         if search:
-            query = query.filter(
-                Comment.content.ilike(f'%{search}%')
-            )
+            query = search_filter(query, Comment, search)
 
-        res = query.paginate(page, self.PAGE_SIZE, False)
-        return {
-            'page': res.page,
-            'total': res.total,
-            'page_size': self.PAGE_SIZE,
-            'items': schema.dump(res.items),
-            'filters': filters,
-            'search': search,
-            'sort': sort
-        }
+        return self.make_page(schema, query, page, cursor, filters, search, sort)
 
 
 class CCRPagination(Pagination):
     def __init__(self):
+        self.SEARCH_MODEL = CCR
         self.FILTERS = [f'STATUS_{s}' for s in CCRStatus.list()]
         self.PAGE_SIZE = 9
         self.SORT_MAP = {
@@ -339,6 +446,7 @@ class CCRPagination(Pagination):
             filters: list = None,
             search: str = None,
             sort: str = 'CREATED:DESC',
+            cursor: str = None,
     ):
         query = query or CCR.query
         sort = sort or 'CREATED:DESC'
@@ -351,25 +459,16 @@ class CCRPagination(Pagination):
             if status_filters:
                 query = query.filter(CCR.status.in_(status_filters))
 
-        # SORT (see self.SORT_MAP)
+        # SORT (see self.SORT_MAP, or RELEVANCE when searching)
         if sort:
-            self.validate_sort(sort)
-            query = query.order_by(self.SORT_MAP[sort])
+            self.validate_sort(sort, search)
+            query = query.order_by(*self.sort_clauses(sort, search))
 
         # SEARCH
         if search:
-            query = query.filter(CCR.title.ilike(f'%{search}%'))
+            query = search_filter(query, CCR, search)
 
-        res = query.paginate(page, self.PAGE_SIZE, False)
-        return {
-            'page': res.page,
-            'total': res.total,
-            'page_size': self.PAGE_SIZE,
-            'items': schema.dump(res.items),
-            'filters': filters,
-            'search': search,
-            'sort': sort
-        }
+        return self.make_page(schema, query, page, cursor, filters, search, sort)
 
 
 # expose pagination methods here
@@ -1,8 +1,160 @@
+"""
+Client for the blockchain watcher microservice. Calls share a keep-alive connection pool and time out, GETs are
+retried with jittered backoff, and once the watcher keeps failing the circuit opens and calls fail fast until it's
+tried again BLOCKCHAIN_CIRCUIT_RESET seconds later. Latencies per path are served at GET /api/v1/admin/blockchain.
+"""
+import os
+import random
+import threading
+import time
+from collections import defaultdict
+
 import requests
 from flask import current_app
+from requests.adapters import HTTPAdapter
+
+from grant.settings import E2E_TESTING
+from grant.utils.exceptions import BlockchainException, BlockchainNotFound
+
+# upper bounds in ms
+LATENCY_BUCKETS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class LatencyHistogram:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.total_ms = 0.0
+
+    def observe(self, ms):
+        index = next((i for i, bound in enumerate(LATENCY_BUCKETS) if ms <= bound), len(LATENCY_BUCKETS))
+        with self.lock:
+            self.counts[index] += 1
+            self.total_ms += ms
+
+    def stats(self):
+        with self.lock:
+            count = sum(self.counts)
+            labels = [f'<={bound}' for bound in LATENCY_BUCKETS] + [f'>{LATENCY_BUCKETS[-1]}']
+            return {
+                'count': count,
+                'mean_ms': round(self.total_ms / count, 2) if count else None,
+                'buckets': dict(zip(labels, self.counts)),
+            }
+
+
+class CircuitBreaker:
+    def __init__(self, threshold, reset_timeout):
+        self.lock = threading.Lock()
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+
+    @property
+    def is_open(self):
+        return self.opened_at is not None
+
+    def allow(self):
+        with self.lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at >= self.reset_timeout:
+                # half-open, let this one call through and keep the rest failing fast until it's back
+                self.opened_at = time.monotonic()
+                return True
+            return False
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.failures >= self.threshold:
+                self.opened_at = time.monotonic()
+
+
+class BlockchainClient:
+    def __init__(self):
+        self.config = {}
+        self.session = None
+        self.pid = None
+        self.breaker = CircuitBreaker(5, 30)
+        self.latencies = defaultdict(LatencyHistogram)
 
-from grant.settings import BLOCKCHAIN_REST_API_URL, BLOCKCHAIN_API_SECRET, E2E_TESTING
-from grant.utils.exceptions import ValidationException
+    def init_app(self, app):
+        self.config = {
+            'url': app.config['BLOCKCHAIN_REST_API_URL'],
+            'secret': app.config['BLOCKCHAIN_API_SECRET'],
+            'timeout': (app.config.get('BLOCKCHAIN_CONNECT_TIMEOUT', 3), app.config.get('BLOCKCHAIN_READ_TIMEOUT', 10)),
+            'retries': app.config.get('BLOCKCHAIN_RETRIES', 2),
+            'retry_backoff': app.config.get('BLOCKCHAIN_RETRY_BACKOFF', 0.1),
+            'pool_size': app.config.get('BLOCKCHAIN_POOL_SIZE', 10),
+        }
+        self.session = None
+        self.breaker = CircuitBreaker(
+            app.config.get('BLOCKCHAIN_CIRCUIT_THRESHOLD', 5),
+            app.config.get('BLOCKCHAIN_CIRCUIT_RESET', 30),
+        )
+        self.latencies = defaultdict(LatencyHistogram)
+
+    def get_session(self):
+        # not shared with forked processes (e.g. gunicorn workers of a preloaded app)
+        if self.session is None or self.pid != os.getpid():
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.config['pool_size'])
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            session.headers['authorization'] = self.config['secret']
+            self.session, self.pid = session, os.getpid()
+        return self.session
+
+    def is_retryable(self, method, error):
+        if isinstance(error, requests.ConnectTimeout):
+            # never got to send the request
+            return True
+        # POSTs may have been received, only GETs are safe to repeat
+        return method == 'GET' and isinstance(error, (requests.ConnectionError, requests.Timeout, BlockchainException))
+
+    def request(self, method, path, **kwargs):
+        if not self.breaker.allow():
+            raise BlockchainException(f'Blockchain watcher is unavailable, not calling {path}')
+        session = self.get_session()
+        attempt = 0
+        while True:
+            start = time.perf_counter()
+            try:
+                res = session.request(method, f"{self.config['url']}{path}", timeout=self.config['timeout'], **kwargs)
+                if res.status_code >= 500:
+                    raise BlockchainException(f'Blockchain API Error: HTTP {res.status_code}')
+                break
+            except (requests.RequestException, BlockchainException) as e:
+                if attempt < self.config['retries'] and self.is_retryable(method, e):
+                    attempt += 1
+                    time.sleep(random.uniform(0, self.config['retry_backoff'] * 2 ** attempt))
+                    continue
+                self.breaker.record_failure()
+                raise
+            finally:
+                self.latencies[path].observe((time.perf_counter() - start) * 1000)
+        self.breaker.record_success()
+        if res.status_code == 404:
+            # e.g. an older watcher without the path
+            raise BlockchainNotFound(f'Blockchain API Error: {path} not found')
+        return handle_res(res)
+
+    def stats(self):
+        # per process, like the counters of the "simple" response cache
+        return {
+            'circuit': {'open': self.breaker.is_open, 'failures': self.breaker.failures},
+            'latencies': {path: histogram.stats() for path, histogram in list(self.latencies.items())},
+        }
+
+
+blockchain_client = BlockchainClient()
 
 
 ### REST API ###
@@ -10,7 +162,7 @@ from grant.utils.exceptions import ValidationException
 def handle_res(res):
     j = res.json()
     if j.get('error'):
-        raise Exception('Blockchain API Error: {}'.format(j['error']))
+        raise BlockchainException('Blockchain API Error: {}'.format(j['error']))
     return j['data']
 
 
@@ -18,12 +170,7 @@ def blockchain_get(path, params=None):
     if E2E_TESTING:
         return blockchain_rest_e2e(path, params)
     try:
-        res = requests.get(
-            f'{BLOCKCHAIN_REST_API_URL}{path}',
-            headers={'authorization': BLOCKCHAIN_API_SECRET},
-            params=params,
-        )
-        return handle_res(res)
+        return blockchain_client.request('GET', path, params=params)
     except Exception as e:
         current_app.logger.error(f"Unable to contact node: {e}")
         raise e
@@ -33,22 +180,18 @@ def blockchain_post(path, data=None):
     if E2E_TESTING:
         return blockchain_rest_e2e(path, data)
     try:
-        res = requests.post(
-            f'{BLOCKCHAIN_REST_API_URL}{path}',
-            headers={'authorization': BLOCKCHAIN_API_SECRET},
-            json=data,
-        )
-        return handle_res(res)
+        return blockchain_client.request('POST', path, json=data)
     except Exception as e:
         current_app.logger.error(f"Unable to contact node: {e}")
         raise e
 
 
 def blockchain_rest_e2e(path, data):
-    if '/bootstrap' in path:
+    if '/bootstrap' in path or '/sync' in path:
         return {
             'startHeight': 123,
             'currentHeight': 456,
+            'paged': True,
         }
     if '/contribution/addresses' in path:
         return {
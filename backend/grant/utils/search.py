@@ -0,0 +1,102 @@
+"""
+Full-text search over a model's `search_vector` column.
+
+On Postgres `search_vector` is a weighted tsvector with a GIN index. Anywhere else (sqlite in the tests) it
+holds the lowercased text and searches fall back to LIKE. Models opt in by declaring the column along with
+`__search_fields__`, a tuple of (weight, attribute) pairs, and the vector is kept up to date on every flush.
+"""
+import re
+from functools import reduce
+
+from sqlalchemy import event, func, false, inspect, literal_column
+from sqlalchemy.dialects.postgresql import TSVECTOR
+
+from grant.extensions import db
+
+SEARCH_CONFIG = literal_column("'english'::regconfig")
+RELEVANCE_SORT = 'RELEVANCE'
+
+SearchVector = db.Text().with_variant(TSVECTOR(), 'postgresql')
+
+
+def is_postgres(bind=None):
+    return (bind or db.engine).dialect.name == 'postgresql'
+
+
+def search_document(fields, postgres: bool):
+    """
+    Builds the search_vector value from (weight, value) pairs. Values are plain values, or columns when
+    rebuilding in bulk on Postgres.
+    """
+    if postgres:
+        vectors = [
+            func.setweight(func.to_tsvector(SEARCH_CONFIG, func.translate(func.coalesce(value, ''), '@', ' ')),
+                           weight)
+            for weight, value in fields
+        ]
+        return reduce(lambda a, b: a.op('||')(b), vectors)
+    return ' '.join((value or '').replace('@', ' ').lower() for _, value in fields)
+
+
+def update_search_vector(target, postgres: bool, force: bool = False):
+    fields = target.__search_fields__
+    if not force:
+        state = inspect(target)
+        if not any(state.attrs[attr].history.has_changes() for _, attr in fields):
+            return
+    target.search_vector = search_document([(weight, getattr(target, attr)) for weight, attr in fields], postgres)
+
+
+@event.listens_for(db.Model, 'before_insert', propagate=True)
+def set_search_vector_on_insert(mapper, connection, target):
+    if hasattr(target, '__search_fields__'):
+        update_search_vector(target, is_postgres(connection), force=True)
+
+
+@event.listens_for(db.Model, 'before_update', propagate=True)
+def set_search_vector_on_update(mapper, connection, target):
+    if hasattr(target, '__search_fields__'):
+        update_search_vector(target, is_postgres(connection))
+
+
+def search_terms(search: str):
+    # emails are indexed as "name domain", see search_document
+    words = re.findall(r'[\w.\-]+', search.lower().replace('@', ' '))
+    return [w for w in (w.strip('.-') for w in words) if w]
+
+
+def make_tsquery(terms: list):
+    # every term must match, as a prefix so partially typed words & emails still find results
+    return func.to_tsquery(SEARCH_CONFIG, ' & '.join(f"'{t}':*" for t in terms))
+
+
+def search_filter(query: db.Query, model, search: str):
+    terms = search_terms(search)
+    if not terms:
+        return query.filter(false())
+    if is_postgres():
+        return query.filter(model.search_vector.op('@@')(make_tsquery(terms)))
+    for term in terms:
+        query = query.filter(model.search_vector.contains(term, autoescape=True))
+    return query
+
+
+def relevance_order(model, search: str):
+    terms = search_terms(search)
+    if terms and is_postgres():
+        return [func.ts_rank_cd(model.search_vector, make_tsquery(terms)).desc(), model.id.desc()]
+    return [model.id.desc()]
+
+
+def rebuild_search_vectors(model):
+    fields = model.__search_fields__
+    if is_postgres():
+        document = search_document([(weight, getattr(model, attr)) for weight, attr in fields], True)
+        count = model.query.update({model.search_vector: document}, synchronize_session=False)
+    else:
+        items = model.query.all()
+        for item in items:
+            update_search_vector(item, False, force=True)
+        count = len(items)
+    db.session.commit()
+    return count
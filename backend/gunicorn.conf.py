@@ -0,0 +1,49 @@
+"""Gunicorn settings for the web process, see the Procfile.
+
+    gunicorn -c gunicorn.conf.py "grant.app:create_app()"
+
+With more than one worker (or dyno) RATELIMIT_STORAGE_URL has to point at a shared store, otherwise every worker
+keeps its own counters and each @limiter.limit budget is multiplied by the number of workers. Likewise CACHE_TYPE,
+the "simple" response cache is per worker and only invalidated in the worker that made the change.
+"""
+import multiprocessing
+import os
+
+rate_limits_shared = not os.environ.get('RATELIMIT_STORAGE_URL', 'memory://').startswith('memory://')
+cache_shared = os.environ.get('CACHE_TYPE', 'simple') != 'simple'
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+# WEB_CONCURRENCY is set by heroku according to the dyno size, without it a single worker unless the stores are shared
+default_workers = multiprocessing.cpu_count() * 2 + 1 if rate_limits_shared and cache_shared else 1
+workers = int(os.environ.get('WEB_CONCURRENCY', default_workers))
+# "sync", or "gthread" with GUNICORN_THREADS threads per worker
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'sync')
+threads = int(os.environ.get('GUNICORN_THREADS', 1))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+# recycle workers now and then, staggered so they don't all restart at once
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 1000))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', 100))
+# import the app once in the master, workers fork with it loaded
+preload_app = True
+accesslog = '-'
+
+
+def when_ready(server):
+    if workers > 1 and not rate_limits_shared:
+        server.log.warning(
+            f'{workers} workers with in-memory rate limits, each worker counts separately. '
+            'Set RATELIMIT_STORAGE_URL to a redis:// or memcached:// url.'
+        )
+    if workers > 1 and not cache_shared:
+        server.log.warning(
+            f'{workers} workers with the in-process response cache, workers serve stale responses after changes '
+            'made in another. Set CACHE_TYPE to redis (or null).'
+        )
+
+
+def post_fork(server, worker):
+    # connections opened while preloading must not be shared by the forked workers
+    from grant.extensions import db
+    app = server.app.wsgi()
+    with app.app_context():
+        db.engine.dispose()
@@ -0,0 +1,232 @@
+"""move ARCHIVED proposal copies into proposal_revision.snapshot, see grant.proposal.revisions
+
+Revision ID: 7c2e9a4b1d05
+Revises: 4d8a1f6e2b93
+Create Date: 2026-10-18 21:03:15.508214
+
+"""
+import json
+import zlib
+from difflib import SequenceMatcher
+from itertools import groupby
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7c2e9a4b1d05'
+down_revision = '4d8a1f6e2b93'
+branch_labels = None
+depends_on = None
+
+proposal = sa.table(
+    'proposal',
+    sa.column('id', sa.Integer), sa.column('date_created', sa.DateTime), sa.column('status', sa.String),
+    sa.column('stage', sa.String), sa.column('version', sa.String), sa.column('title', sa.String),
+    sa.column('brief', sa.String), sa.column('content', sa.Text), sa.column('target', sa.String),
+    sa.column('payout_address', sa.String), sa.column('tip_jar_address', sa.String),
+    sa.column('rfp_opt_in', sa.Boolean), sa.column('changes_requested_discussion_reason', sa.String),
+    sa.column('deadline_duration', sa.Integer),
+)
+milestone = sa.table(
+    'milestone',
+    sa.column('id', sa.Integer), sa.column('proposal_id', sa.Integer), sa.column('index', sa.Integer),
+    sa.column('date_created', sa.DateTime), sa.column('title', sa.String), sa.column('content', sa.Text),
+    sa.column('days_estimated', sa.String), sa.column('payout_percent', sa.String),
+    sa.column('immediate_payout', sa.Boolean), sa.column('stage', sa.String),
+)
+proposal_arbiter = sa.table(
+    'proposal_arbiter',
+    sa.column('id', sa.Integer), sa.column('proposal_id', sa.Integer), sa.column('user_id', sa.Integer),
+    sa.column('status', sa.String),
+)
+proposal_team = sa.table('proposal_team', sa.column('user_id', sa.Integer), sa.column('proposal_id', sa.Integer))
+proposal_team_invite = sa.table('proposal_team_invite', sa.column('proposal_id', sa.Integer))
+proposal_revision = sa.table(
+    'proposal_revision',
+    sa.column('id', sa.Integer), sa.column('date_created', sa.DateTime), sa.column('proposal_id', sa.Integer),
+    sa.column('proposal_archive_id', sa.Integer), sa.column('revision_index', sa.Integer),
+    sa.column('snapshot', sa.LargeBinary),
+)
+
+
+# the snapshot format of grant.proposal.revisions as of this migration, copied so later changes don't affect it
+KEYFRAME_INTERVAL = 10
+PROPOSAL_FIELDS = (
+    'title',
+    'brief',
+    'content',
+    'target',
+    'payout_address',
+    'tip_jar_address',
+    'rfp_opt_in',
+    'changes_requested_discussion_reason',
+)
+MILESTONE_FIELDS = ('title', 'content', 'days_estimated', 'payout_percent', 'immediate_payout')
+
+
+def make_document(proposal, milestones, team_ids):
+    document = {field: getattr(proposal, field) for field in PROPOSAL_FIELDS}
+    document['milestones'] = [{field: getattr(ms, field) for field in MILESTONE_FIELDS} for ms in milestones]
+    document['team'] = list(team_ids)
+    return document
+
+
+def diff_lines(old, new):
+    old_lines, new_lines = old.splitlines(keepends=True), new.splitlines(keepends=True)
+    ops = []
+    for tag, i1, i2, j1, j2 in SequenceMatcher(None, old_lines, new_lines, autojunk=False).get_opcodes():
+        if tag == 'equal':
+            ops.append(i2 - i1)
+            continue
+        if i2 > i1:
+            ops.append(i1 - i2)
+        if j2 > j1:
+            ops.append(new_lines[j1:j2])
+    return ops
+
+
+def patch_lines(old, ops):
+    old_lines = old.splitlines(keepends=True)
+    new_lines = []
+    position = 0
+    for op_ in ops:
+        if isinstance(op_, list):
+            new_lines.extend(op_)
+        elif op_ > 0:
+            new_lines.extend(old_lines[position:position + op_])
+            position += op_
+        else:
+            position -= op_
+    return ''.join(new_lines)
+
+
+def encode_snapshot(document, previous=None):
+    if previous is None:
+        delta = {'full': document}
+    else:
+        delta = {'set': {k: v for k, v in document.items() if k != 'content' and v != previous.get(k)}}
+        if document['content'] != previous['content']:
+            delta['content'] = diff_lines(previous['content'], document['content'])
+    return zlib.compress(json.dumps(delta, separators=(',', ':')).encode('utf-8'))
+
+
+def decode_snapshot(snapshot, previous=None):
+    delta = json.loads(zlib.decompress(snapshot).decode('utf-8'))
+    if 'full' in delta:
+        return delta['full']
+    document = dict(previous, **delta['set'])
+    if 'content' in delta:
+        document['content'] = patch_lines(previous['content'], delta['content'])
+    return document
+
+
+def is_keyframe(revision_index):
+    return revision_index % KEYFRAME_INTERVAL == 0
+
+
+def revisions(conn):
+    # grouped by proposal, in order
+    rows = conn.execute(
+        sa.select([proposal_revision])
+        .order_by(proposal_revision.c.proposal_id, proposal_revision.c.revision_index)
+    )
+    return groupby(rows, key=lambda r: r.proposal_id)
+
+
+def upgrade():
+    # ### commands auto generated by Alembic - please adjust! ###
+    op.add_column('proposal_revision', sa.Column('snapshot', sa.LargeBinary(), nullable=True))
+    op.drop_constraint('proposal_revision_proposal_archive_id_fkey', 'proposal_revision', type_='foreignkey')
+    # ### end Alembic commands ###
+
+    conn = op.get_bind()
+    archive_ids = []
+    for _, group in revisions(conn):
+        previous = None
+        for revision in group:
+            archived = conn.execute(sa.select([proposal]).where(proposal.c.id == revision.proposal_archive_id)).first()
+            milestones = conn.execute(
+                sa.select([milestone])
+                .where(milestone.c.proposal_id == revision.proposal_archive_id)
+                .order_by(milestone.c.index)
+            ).fetchall()
+            team_ids = [r.user_id for r in conn.execute(
+                sa.select([proposal_team.c.user_id]).where(proposal_team.c.proposal_id == revision.proposal_archive_id)
+            )]
+            document = make_document(archived, milestones, team_ids)
+            conn.execute(
+                proposal_revision.update()
+                .where(proposal_revision.c.id == revision.id)
+                .values(snapshot=encode_snapshot(document, None if is_keyframe(revision.revision_index) else previous))
+            )
+            previous = document
+            archive_ids.append(revision.proposal_archive_id)
+
+    # the archived copies, nothing but their revision points to them
+    for i in range(0, len(archive_ids), 500):
+        ids = archive_ids[i:i + 500]
+        conn.execute(milestone.delete().where(milestone.c.proposal_id.in_(ids)))
+        conn.execute(proposal_team.delete().where(proposal_team.c.proposal_id.in_(ids)))
+        conn.execute(proposal_team_invite.delete().where(proposal_team_invite.c.proposal_id.in_(ids)))
+        conn.execute(proposal_arbiter.delete().where(proposal_arbiter.c.proposal_id.in_(ids)))
+        conn.execute(proposal.delete().where(proposal.c.id.in_(ids)).where(proposal.c.status == 'ARCHIVED'))
+
+    # ### commands auto generated by Alembic - please adjust! ###
+    op.alter_column('proposal_revision', 'snapshot', existing_type=sa.LargeBinary(), nullable=False)
+    op.create_unique_constraint(
+        'proposal_revision_proposal_archive_id_key', 'proposal_revision', ['proposal_archive_id']
+    )
+    # ### end Alembic commands ###
+
+
+def downgrade():
+    # ### commands auto generated by Alembic - please adjust! ###
+    op.drop_constraint('proposal_revision_proposal_archive_id_key', 'proposal_revision', type_='unique')
+    # ### end Alembic commands ###
+
+    # re-create the archived copies
+    conn = op.get_bind()
+    milestone_id = conn.execute(sa.select([sa.func.coalesce(sa.func.max(milestone.c.id), 0)])).scalar()
+    arbiter_id = conn.execute(sa.select([sa.func.coalesce(sa.func.max(proposal_arbiter.c.id), 0)])).scalar()
+    for proposal_id, group in revisions(conn):
+        live = conn.execute(sa.select([proposal]).where(proposal.c.id == proposal_id)).first()
+        document = None
+        for revision in group:
+            document = decode_snapshot(revision.snapshot, document)
+            conn.execute(proposal.insert().values(
+                id=revision.proposal_archive_id,
+                date_created=revision.date_created,
+                status='ARCHIVED',
+                stage='PREVIEW',
+                version='2',
+                deadline_duration=live.deadline_duration,
+                **{k: v for k, v in document.items() if k not in ('milestones', 'team')}
+            ))
+            for i, data in enumerate(document['milestones']):
+                milestone_id += 1
+                conn.execute(milestone.insert().values(
+                    id=milestone_id,
+                    proposal_id=revision.proposal_archive_id,
+                    index=i,
+                    date_created=revision.date_created,
+                    stage='IDLE',
+                    **data
+                ))
+            # every proposal, archived copies included, got an arbiter row
+            arbiter_id += 1
+            conn.execute(proposal_arbiter.insert().values(
+                id=arbiter_id,
+                proposal_id=revision.proposal_archive_id,
+                status='MISSING',
+            ))
+            for user_id in document['team']:
+                conn.execute(proposal_team.insert().values(user_id=user_id, proposal_id=revision.proposal_archive_id))
+
+    # ### commands auto generated by Alembic - please adjust! ###
+    op.create_foreign_key(
+        'proposal_revision_proposal_archive_id_fkey', 'proposal_revision', 'proposal', ['proposal_archive_id'], ['id']
+    )
+    op.drop_column('proposal_revision', 'snapshot')
+    # ### end Alembic commands ###
@@ -1,5 +1,11 @@
 import json
-from grant.utils.enums import ProposalStatus, CCRStatus
+from datetime import datetime
+from decimal import Decimal, ROUND_HALF_DOWN
+
+from animal_case import animalify
+from grant.admin.financials import invalidate_financials
+from grant.milestone.models import Milestone
+from grant.utils.enums import ProposalStatus, CCRStatus, ProposalStage, MilestoneStage
 import grant.utils.admin as admin
 from grant.utils import totp_2fa
 from grant.user.models import admin_user_schema
@@ -8,7 +14,7 @@ from grant.ccr.models import CCR
 from mock import patch
 
 from ..config import BaseProposalCreatorConfig, BaseCCRCreatorConfig
-from ..test_data import mock_blockchain_api_requests, test_ccr
+from ..test_data import test_ccr
 
 json_checklogin = {
     "isLoggedIn": False,
@@ -18,6 +24,67 @@ json_checklogin_true = {
     "isLoggedIn": True,
     "is2faAuthed": True,
 }
+
+
+def legacy_financials():
+    """The original per-quarter /admin/financials implementation, with its SQL sums done in Python."""
+
+    def ms_sum(predicate):
+        total = Decimal(0)
+        for ms in Milestone.query.all():
+            if ms.proposal.version == '2' and predicate(ms):
+                total += Decimal(ms.payout_percent) / 100 * Decimal(ms.proposal.target)
+        return total.normalize()
+
+    po_due = ms_sum(lambda ms: ms.stage == 'ACCEPTED')
+    po_paid = ms_sum(lambda ms: ms.stage == 'PAID')
+    po_future = ms_sum(lambda ms: ms.stage in ('IDLE', 'REJECTED', 'REQUESTED') and
+                                  ms.proposal.stage in ('WIP', 'COMPLETED'))
+
+    quarter_ranges = {1: ((1, 1), (3, 31)), 2: ((4, 1), (6, 30)), 3: ((7, 1), (9, 30)), 4: ((10, 1), (12, 31))}
+    payouts_by_quarter = {}
+    for year in range(2019, datetime.now().year + 1):
+        payouts_by_quarter[f"{year}"] = {}
+        year_total = 0
+        for quarter in range(1, 5):
+            (bm, bd), (em, ed) = quarter_ranges[quarter]
+            begin, end = datetime(year, bm, bd), datetime(year, em, ed)
+            payouts = ms_sum(lambda ms: ms.stage == 'PAID' and begin <= ms.date_paid <= end)
+            payouts_by_quarter[f"{year}"][f"q{quarter}"] = str(payouts)
+            year_total += payouts
+        payouts_by_quarter[f"{year}"]["year_total"] = str(year_total)
+
+    grants = {'total': '0', 'matching': '0', 'bounty': '0'}
+
+    def add_str_dec(a, b):
+        return str((Decimal(a) + Decimal(b)).quantize(Decimal('0.001'), rounding=ROUND_HALF_DOWN))
+
+    for p in Proposal.query.filter_by(version='2'):
+        if p.stage in [ProposalStage.WIP, ProposalStage.COMPLETED]:
+            matching = Decimal(p.contributed) * Decimal(p.contribution_matching)
+            remaining = max(Decimal(p.target) - Decimal(p.contributed), Decimal('0.0'))
+            if matching > remaining:
+                matching = remaining
+            bounty = Decimal(p.contribution_bounty)
+            remaining = max(Decimal(p.target) - (matching + Decimal(p.contributed)), Decimal('0.0'))
+            if bounty > remaining:
+                bounty = remaining
+            grants['matching'] = add_str_dec(grants['matching'], matching)
+            grants['bounty'] = add_str_dec(grants['bounty'], bounty)
+            grants['total'] = add_str_dec(grants['total'], matching + bounty)
+
+    return {
+        'grants': grants,
+        'payouts': {
+            'total': str(po_due + po_paid + po_future),
+            'due': str(po_due),
+            'paid': str(po_paid),
+            'future': str(po_future),
+        },
+        'payouts_by_quarter': payouts_by_quarter,
+    }
+
+
 json_2fa = {
     "isLoginFresh": True,
     "has2fa": False,
@@ -622,6 +689,98 @@ class TestAdminAPI(BaseProposalCreatorConfig):
         )
         self.assert200(resp)
 
+    def test_edit_contribution_updates_funding_totals(self):
+        self.login_admin()
+
+        # create a confirmed contribution
+        resp = self.app.post(
+            "/api/v1/admin/contributions",
+            data=json.dumps({
+                "proposalId": self.proposal.id,
+                "userId": self.user.id,
+                "status": "CONFIRMED",
+                "amount": "1.5",
+            })
+        )
+        self.assert200(resp)
+        contribution_id = resp.json["id"]
+        self.assertEqual(self.proposal.contributed, "1.5")
+
+        # change the amount
+        resp = self.app.put(
+            f"/api/v1/admin/contributions/{contribution_id}",
+            data=json.dumps({"amount": "2.25"})
+        )
+        self.assert200(resp)
+        self.assertEqual(self.proposal.contributed, "2.25")
+
+        # unconfirm it
+        resp = self.app.put(
+            f"/api/v1/admin/contributions/{contribution_id}",
+            data=json.dumps({"status": "DELETED"})
+        )
+        self.assert200(resp)
+        self.assertEqual(self.proposal.contributed, "0")
+
+        # confirm it on another proposal
+        resp = self.app.put(
+            f"/api/v1/admin/contributions/{contribution_id}",
+            data=json.dumps({"proposalId": self.other_proposal.id, "status": "CONFIRMED"})
+        )
+        self.assert200(resp)
+        self.assertEqual(self.proposal.contributed, "0")
+        self.assertEqual(self.other_proposal.contributed, "2.25")
+
+    def seed_financials(self):
+        self.proposal.stage = ProposalStage.WIP
+        self.proposal.contributed_total = '40.5'
+        self.proposal.contribution_matching = 1
+        self.proposal.contribution_bounty = '100'
+        paid, accepted = self.proposal.milestones
+        paid.stage = MilestoneStage.PAID
+        paid.date_paid = datetime(2019, 5, 10, 12)
+        accepted.stage = MilestoneStage.ACCEPTED
+
+        self.other_proposal.stage = ProposalStage.COMPLETED
+        self.other_proposal.target = '1000.25'
+        self.other_proposal.contributed_total = '999'
+        self.other_proposal.contribution_bounty = '5'
+        Milestone.make([
+            {"title": "a", "content": "a", "days_estimated": "10", "payout_percent": 30, "immediate_payout": True},
+            {"title": "b", "content": "b", "days_estimated": "10", "payout_percent": 25, "immediate_payout": False},
+            {"title": "c", "content": "c", "days_estimated": "10", "payout_percent": 45, "immediate_payout": False},
+        ], self.other_proposal)
+        a, b, c = self.other_proposal.milestones
+        a.stage = MilestoneStage.PAID
+        a.date_paid = datetime(2020, 11, 20)
+        b.stage = MilestoneStage.PAID
+        b.date_paid = datetime(2020, 12, 1, 8, 30)
+        db.session.commit()
+        invalidate_financials()
+
+    def test_financials_matches_legacy(self):
+        self.login_admin()
+        self.seed_financials()
+
+        resp = self.app.get("/api/v1/admin/financials")
+        self.assert200(resp)
+        self.assertEqual(resp.json, animalify(legacy_financials()))
+        self.assertEqual(resp.json['payoutsByQuarter']['2020']['q4'], '550.1375')
+
+    def test_financials_cache_cleared_when_milestone_paid(self):
+        self.login_admin()
+        self.seed_financials()
+        resp = self.app.get("/api/v1/admin/financials")
+        self.assertEqual(resp.json['payouts']['due'], '6172.5')
+
+        accepted = self.proposal.milestones[1]
+        accepted.mark_paid('tx')
+        db.session.commit()
+
+        resp = self.app.get("/api/v1/admin/financials")
+        self.assertEqual(resp.json['payouts']['due'], '0')
+        self.assertEqual(resp.json, animalify(legacy_financials()))
+
     def test_create_rfp_succeeds(self):
         self.login_admin()
 
@@ -0,0 +1,88 @@
+import json
+
+from mock import patch
+
+from grant.blockchain.bootstrap import send_bootstrap_data
+from grant.blockchain.models import BlockchainSync
+from grant.settings import BLOCKCHAIN_API_SECRET
+
+from ..config import BaseProposalCreatorConfig
+
+
+@patch('grant.blockchain.bootstrap.CHUNK_SIZE', 2)
+class TestBlockchainSync(BaseProposalCreatorConfig):
+    def contribute(self, count):
+        return [self.proposal.create_contribution(amount="1", user_id=self.user.id).id for _ in range(count)]
+
+    def sent(self):
+        return [(path, data['page'], data['final'], [c['id'] for c in data['pendingContributions']])
+                for path, data in self.watcher.posted]
+
+    def test_bootstrap_in_pages(self):
+        ids = self.contribute(3)
+        send_bootstrap_data()
+        self.assertEqual(self.sent(), [
+            ('/bootstrap', 0, False, ids[:2]),
+            ('/bootstrap', 1, True, ids[2:]),
+        ])
+        self.assertIsNotNone(BlockchainSync.get().date_synced)
+
+    def test_sync_since_checkpoint(self):
+        self.contribute(3)
+        send_bootstrap_data()
+        self.watcher.posted = []
+
+        new_ids = self.contribute(1)
+        send_bootstrap_data()
+        self.assertEqual(self.sent(), [('/sync', 0, True, new_ids)])
+
+        self.watcher.posted = []
+        send_bootstrap_data()
+        self.assertEqual(self.sent(), [('/sync', 0, True, [])])
+
+    def test_sync_falls_back_to_bootstrap(self):
+        ids = self.contribute(1)
+        send_bootstrap_data()
+        self.watcher.posted = []
+        self.watcher.routes['/sync'] = {'bootstrapRequired': True}
+
+        send_bootstrap_data()
+        self.assertEqual(self.sent(), [
+            ('/sync', 0, True, []),
+            ('/bootstrap', 0, True, ids),
+        ])
+
+    def test_unpaged_watcher_bootstrapped_in_one_request(self):
+        ids = self.contribute(3)
+        send_bootstrap_data()
+        self.watcher.posted = []
+        # a watcher from before /sync and pages
+        self.watcher.routes['/sync'] = 404
+        self.watcher.routes['/bootstrap'] = {'startHeight': 123, 'currentHeight': 456}
+
+        send_bootstrap_data()
+        self.assertEqual([path for path, _ in self.watcher.posted], ['/sync', '/bootstrap', '/bootstrap'])
+        path, data = self.watcher.posted[-1]
+        self.assertNotIn('page', data)
+        self.assertEqual([c['id'] for c in data['pendingContributions']], ids)
+
+    def test_confirmations_move_checkpoint(self):
+        first, second = self.contribute(2)
+
+        def confirm(contribution_id, txid, height):
+            res = self.app.post(
+                f"/api/v1/proposals/contribution/{contribution_id}/confirm",
+                data=json.dumps({"to": "t123", "amount": "100000000", "txid": txid, "height": height}),
+                headers={"authorization": BLOCKCHAIN_API_SECRET},
+                content_type='application/json'
+            )
+            self.assert200(res)
+
+        confirm(first, "tx1", 100)
+        confirm(second, "tx2", 99)
+        checkpoint = BlockchainSync.get()
+        self.assertEqual((checkpoint.latest_tx_id, checkpoint.height), ("tx1", 100))
+
+        send_bootstrap_data()
+        self.assertEqual(self.watcher.posted[0][1]['latestTxId'], "tx1")
+        self.assertEqual(self.watcher.posted[0][1]['height'], 100)
@@ -1,9 +1,11 @@
 import json
+from contextlib import contextmanager
 from datetime import datetime
 from datetime import timedelta
 
 from flask_testing import TestCase
 from mock import patch
+from sqlalchemy import event
 
 from grant.app import create_app
 from grant.ccr.models import CCR
@@ -14,7 +16,15 @@ from grant.settings import PROPOSAL_STAKING_AMOUNT
 from grant.task.jobs import ProposalReminder
 from grant.user.models import User, SocialMedia, db, Avatar
 from grant.utils.enums import ProposalStatus
-from .test_data import test_user, test_other_user, test_proposal, mock_blockchain_api_requests, test_ccr
+from grant.proposal.revisions import document_cache
+from grant.utils.ids import id_allocator
+from grant.utils.requests import blockchain_client
+from .mocks import FakeWatcher
+from .test_data import test_user, test_other_user, test_proposal, mock_blockchain_api_requests, test_ccr, \
+    blockchain_api_responses
+
+# one for the whole run, reset for each test
+fake_watcher = FakeWatcher()
 
 
 class BaseTestConfig(TestCase):
@@ -22,11 +32,18 @@ class BaseTestConfig(TestCase):
     def create_app(self):
         app = create_app(['grant.settings', 'tests.settings'])
         app.config.from_object('tests.settings')
+        app.config['BLOCKCHAIN_REST_API_URL'] = fake_watcher.url
+        blockchain_client.init_app(app)
         limiter.enabled = False
         return app
 
     def setUp(self):
         db.drop_all()
+        # id_block starts over with the tables
+        id_allocator.reset()
+        document_cache.invalidate()
+        fake_watcher.reset(blockchain_api_responses)
+        self.watcher = fake_watcher
         self.app = self.create_app().test_client()
         db.create_all()
 
@@ -45,6 +62,27 @@ class BaseTestConfig(TestCase):
 
     assert_status = assertStatus
 
+    @contextmanager
+    def assertMaxQueries(self, max_count):
+        """
+        Fails if more than max_count SQL statements run inside the block, to catch N+1 queries.
+        """
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+        try:
+            yield statements
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+        message = '%s SQL statements expected at most, but got %s:\n%s' \
+                  % (max_count, len(statements), '\n\n'.join(statements))
+        self.assertLessEqual(len(statements), max_count, message)
+
+    assert_max_queries = assertMaxQueries
+
 
 class BaseUserConfig(BaseTestConfig):
     def setUp(self):
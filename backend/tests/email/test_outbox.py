@@ -0,0 +1,193 @@
+import json
+from datetime import datetime, timedelta
+
+from flask import current_app
+from grant.admin.example_emails import example_email_args
+from grant.email import outbox
+from grant.email.models import EmailOutbox
+from grant.email.send import (
+    commit_late_emails, send_email, send_to_users, subscribed_users, render_template, user_unsubscribe_url,
+    UNSUBSCRIBE_URL_TAG,
+)
+from grant.email.subscription_settings import EmailSubscription
+from grant.user.models import db, User
+from grant.utils.enums import EmailOutboxStatus
+from mock import patch
+
+from ..config import BaseUserConfig
+
+
+def make_outbox_email(to, html='<p>Hi</p>'):
+    email = EmailOutbox(
+        to_address=to,
+        type='recover',
+        subject='Recover your account',
+        html=html,
+        text='Hi',
+        substitutions={UNSUBSCRIBE_URL_TAG: f'http://unsubscribe/{to}'},
+    )
+    db.session.add(email)
+    return email
+
+
+class TestEmailOutbox(BaseUserConfig):
+    def test_send_email_queues_in_current_transaction(self):
+        args = {'display_name': 'Ron', 'recover_url': 'http://recover'}
+        with patch.dict(current_app.config, {'TESTING': False}):
+            send_email(self.user.email_address, 'recover', args)
+            db.session.rollback()
+            self.assertEqual(EmailOutbox.query.count(), 0)
+
+            send_email(self.user.email_address, 'recover', args)
+            db.session.commit()
+
+        email = EmailOutbox.query.one()
+        self.assertEqual(email.status, EmailOutboxStatus.PENDING)
+        self.assertEqual(email.to_address, self.user.email_address)
+        self.assertIn(UNSUBSCRIBE_URL_TAG, email.html)
+        self.assertIn(self.user.email_verification.code, email.substitutions[UNSUBSCRIBE_URL_TAG])
+
+    def test_fan_out_renders_once(self):
+        followers = [
+            User.create(email_address=f'follower{i}@example.com', password='password', display_name=f'F{i}', title='')
+            for i in range(3)
+        ]
+        args = example_email_args['followed_proposal_update']
+        with patch.dict(current_app.config, {'TESTING': False}), \
+                patch('grant.email.send.render_template', wraps=render_template) as mock_render:
+            for u in followers:
+                send_email(u.email_address, 'followed_proposal_update', {**args, 'user': u})
+            db.session.commit()
+
+        # body html & txt, layout html & txt
+        self.assertEqual(mock_render.call_count, 4)
+        emails = EmailOutbox.query.all()
+        self.assertEqual(len(emails), 3)
+        self.assertEqual(len(set(e.content_hash for e in emails)), 1)
+        self.assertEqual(
+            [e.substitutions[UNSUBSCRIBE_URL_TAG] for e in emails],
+            [user_unsubscribe_url(u) for u in followers]
+        )
+
+    def test_fan_out_resolves_recipients_in_one_query(self):
+        followers = [
+            User.create(email_address=f'follower{i}@example.com', password='password', display_name=f'F{i}', title='')
+            for i in range(3)
+        ]
+        followers[1].settings.unsubscribe_emails()
+        db.session.commit()
+        db.session.expire_all()
+        users = User.query.filter(User.id.in_([u.id for u in followers]))
+
+        with self.assertMaxQueries(1):
+            recipients = subscribed_users(users, EmailSubscription.FOLLOWED_PROPOSAL)
+            codes = [user_unsubscribe_url(u) for u in recipients]
+        self.assertEqual(sorted(u.id for u in recipients), [followers[0].id, followers[2].id])
+        self.assertEqual(len(codes), 2)
+
+        args = example_email_args['followed_proposal_update']
+        with patch.dict(current_app.config, {'TESTING': False}):
+            send_to_users(users, 'followed_proposal_update', args)
+            db.session.commit()
+        self.assertEqual(
+            sorted(e.to_address for e in EmailOutbox.query.all()),
+            ['follower0@example.com', 'follower2@example.com']
+        )
+
+    def test_display_name_is_spliced_per_recipient(self):
+        args = {'confirm_url': 'http://confirm'}
+        with patch.dict(current_app.config, {'TESTING': False}), \
+                patch('grant.email.send.render_template', wraps=render_template) as mock_render:
+            send_email('a@example.com', 'change_email', {**args, 'display_name': 'Ann'})
+            send_email('b@example.com', 'change_email', {**args, 'display_name': '<b>Bob</b>'})
+            db.session.commit()
+
+        self.assertEqual(mock_render.call_count, 4)
+        ann, bob = EmailOutbox.query.order_by(EmailOutbox.id).all()
+        self.assertIn('Ann', ann.html)
+        self.assertNotIn('Bob', ann.html)
+        self.assertIn('&lt;b&gt;Bob&lt;/b&gt;', bob.html)
+        self.assertIn('<b>Bob</b>', bob.text)
+
+    def test_emails_sent_after_commit_are_committed_with_request(self):
+        with patch.dict(self.app.application.config, {'TESTING': False}):
+            resp = self.app.post(
+                "/api/v1/users/recover",
+                data=json.dumps({'email': self.user.email_address}),
+                content_type='application/json'
+            )
+        self.assert200(resp)
+        db.session.expire_all()
+        email = EmailOutbox.query.one()
+        self.assertEqual(email.type, 'recover')
+
+    def test_late_emails_are_committed_without_the_rest(self):
+        with patch.dict(current_app.config, {'TESTING': False}):
+            self.user.display_name = 'Not committed'
+            send_email(self.user.email_address, 'recover', {'display_name': 'Ron', 'recover_url': 'http://recover'})
+            self.assertEqual(commit_late_emails(), 1)
+
+        db.session.expire_all()
+        self.assertEqual(EmailOutbox.query.count(), 1)
+        self.assertNotEqual(User.query.get(self.user.id).display_name, 'Not committed')
+        # nothing left over for the next request
+        self.assertEqual(commit_late_emails(), 0)
+
+    @patch('grant.email.outbox.sendgrid.SendGridAPIClient')
+    def test_send_pending_emails_batches_by_content(self, mock_client):
+        post = mock_client.return_value.client.mail.send.post
+        for to in ['a@example.com', 'b@example.com', 'c@example.com']:
+            make_outbox_email(to)
+        make_outbox_email('d@example.com', html='<p>Something else</p>')
+        db.session.commit()
+
+        self.assertEqual(outbox.send_pending_emails(), (4, 0))
+        self.assertEqual(post.call_count, 2)
+        body = post.call_args_list[0][1]['request_body']
+        self.assertEqual([p['to'][0]['email'] for p in body['personalizations']],
+                         ['a@example.com', 'b@example.com', 'c@example.com'])
+        self.assertEqual(body['personalizations'][1]['substitutions'],
+                         {UNSUBSCRIBE_URL_TAG: 'http://unsubscribe/b@example.com'})
+        for email in EmailOutbox.query.all():
+            self.assertEqual(email.status, EmailOutboxStatus.SENT)
+            self.assertIsNotNone(email.date_sent)
+
+        # nothing left to send
+        self.assertEqual(outbox.send_pending_emails(), (0, 0))
+
+    @patch('grant.email.outbox.MAX_RECIPIENTS', 2)
+    @patch('grant.email.outbox.sendgrid.SendGridAPIClient')
+    def test_send_pending_emails_splits_large_batches(self, mock_client):
+        post = mock_client.return_value.client.mail.send.post
+        for i in range(5):
+            make_outbox_email(f'{i}@example.com')
+        db.session.commit()
+
+        outbox.send_pending_emails()
+        self.assertEqual([len(c[1]['request_body']['personalizations']) for c in post.call_args_list], [2, 2, 1])
+
+    @patch('grant.email.outbox.sendgrid.SendGridAPIClient')
+    def test_failed_send_is_retried_then_dead_lettered(self, mock_client):
+        mock_client.return_value.client.mail.send.post.side_effect = Exception('sendgrid down')
+        make_outbox_email('a@example.com')
+        db.session.commit()
+
+        self.assertEqual(outbox.send_pending_emails(), (1, 1))
+        email = EmailOutbox.query.one()
+        self.assertEqual(email.status, EmailOutboxStatus.PENDING)
+        self.assertEqual(email.attempts, 1)
+        self.assertIn('sendgrid down', email.last_error)
+        self.assertGreater(email.send_after, datetime.now())
+
+        # last attempt
+        email.attempts = outbox.MAX_ATTEMPTS - 1
+        email.send_after = datetime.now() - timedelta(seconds=1)
+        db.session.commit()
+        outbox.send_pending_emails()
+        email = EmailOutbox.query.one()
+        self.assertEqual(email.status, EmailOutboxStatus.DEAD)
+        self.assertEqual(outbox.send_pending_emails(), (0, 0))
+
+        self.assertEqual(outbox.requeue_dead_emails(), 1)
+        email = EmailOutbox.query.one()
+        self.assertEqual((email.status, email.attempts), (EmailOutboxStatus.PENDING, 0))
@@ -146,3 +146,9 @@ class TestMilestoneMethods(BaseUserConfig):
 
         # ensure `date_estimated` was recalculated as expected
         self.assertEqual(third_ms.date_estimated, expected_date_estimated)
+
+        # ensure the pending deadline task was replaced rather than duplicated
+        tasks = Task.query.filter_by(job_type=MilestoneDeadline.JOB_TYPE).all()
+        self.assertEqual(len(tasks), 1)
+        self.assertEqual(tasks[0].blob['milestone_id'], third_ms.id)
+        self.assertEqual(tasks[0].execute_after, expected_date_estimated)
@@ -1,3 +1,10 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+
 def mock_request(response):
     def mock_request_func(*args, **kwargs):
         class MockResponse:
@@ -7,3 +14,66 @@ def mock_request(response):
         return MockResponse()
 
     return mock_request_func
+
+
+class FakeWatcher:
+    """
+    Stands in for the blockchain watcher microservice on a local port. Responses are set per path in `routes`,
+    POSTed bodies are kept in `posted`,
+    as the `data` to send back or as an HTTP status code to fail with. `delay` (seconds) slows every response down.
+    """
+
+    def __init__(self):
+        self.routes = {}
+        self.calls = []
+        self.posted = []
+        self.delay = 0
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), self.make_handler())
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    @property
+    def url(self):
+        return 'http://127.0.0.1:{}'.format(self.server.server_address[1])
+
+    def reset(self, routes):
+        self.routes = dict(routes)
+        self.calls = []
+        self.posted = []
+        self.delay = 0
+
+    def make_handler(self):
+        watcher = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def respond(self):
+                path = urlparse(self.path).path
+                watcher.calls.append((self.command, path))
+                if watcher.delay:
+                    time.sleep(watcher.delay)
+                response = watcher.routes.get(path)
+                if response is None:
+                    status, body = 200, {'error': 'No mock data defined for path {}'.format(path)}
+                elif isinstance(response, int):
+                    status, body = response, {'error': 'HTTP {}'.format(response)}
+                else:
+                    status, body = 200, {'data': response}
+                payload = json.dumps(body).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def do_GET(self):
+                self.respond()
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+                watcher.posted.append((urlparse(self.path).path, json.loads(body or 'null')))
+                self.respond()
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
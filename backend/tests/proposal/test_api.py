@@ -2,7 +2,8 @@ import json
 
 from mock import patch
 
-from grant.proposal.models import Proposal, db
+from grant.proposal.models import Proposal, ProposalRevision, db
+from grant.proposal.revisions import make_document
 from grant.settings import PROPOSAL_STAKING_AMOUNT
 from grant.utils.enums import ProposalStatus
 from ..config import BaseProposalCreatorConfig
@@ -169,17 +170,32 @@ class TestProposalAPI(BaseProposalCreatorConfig):
         )
         self.assert404(resp)
 
+        # only revisions are archived
         resp = self.app.get(
             f"/api/v1/proposals/{self.proposal.id}/archive"
         )
-        self.assert401(resp)
+        self.assert404(resp)
 
-        self.proposal.status = ProposalStatus.ARCHIVED
+        archive_id = 123456
+        revision = ProposalRevision.create(
+            author=self.user,
+            proposal_id=self.proposal.id,
+            proposal_archive_id=archive_id,
+            changes=[],
+            revision_index=0,
+            document=make_document(self.proposal, self.proposal.milestones, [self.user.id])
+        )
+        db.session.add(revision)
+        db.session.commit()
         resp = self.app.get(
-            f"/api/v1/proposals/{self.proposal.id}/archive"
+            f"/api/v1/proposals/{archive_id}/archive"
         )
         self.assert200(resp)
-        self.assertEqual(self.proposal.id, resp.json["proposalId"])
+        self.assertEqual(resp.json["proposalId"], archive_id)
+        self.assertEqual(resp.json["status"], ProposalStatus.ARCHIVED)
+        self.assertEqual(resp.json["title"], self.proposal.title)
+        self.assertEqual(len(resp.json["milestones"]), len(self.proposal.milestones))
+        self.assertEqual(resp.json["team"][0]["userid"], self.user.id)
 
     # /
     def test_get_proposals(self):
@@ -445,10 +461,9 @@ class TestProposalAPI(BaseProposalCreatorConfig):
         self.assertEqual(proposal.title, new_draft_title)
         self.assertEqual(proposal.milestones[0].title, new_milestone_title)
 
-        # check the draft has been archived
+        # check the draft has been consumed
         self.assertIsNone(proposal.live_draft)
-        old_live_draft = Proposal.query.get(draft_id)
-        self.assertEqual(old_live_draft.status, ProposalStatus.ARCHIVED)
+        self.assertIsNone(Proposal.query.get(draft_id))
 
         # check the proposal revision and base snapshot was added
         self.assertEqual(len(self.proposal.revisions), 2)
@@ -473,6 +488,15 @@ class TestProposalAPI(BaseProposalCreatorConfig):
         self.assertEqual(revision.proposal_archive_id, draft_id)
         self.assertEqual(len(json.loads(revision.changes)), 2)
 
+        # check both are served as archived proposals
+        base_resp = self.app.get(f"/api/v1/proposals/{base_revision.proposal_archive_id}/archive")
+        self.assert200(base_resp)
+        self.assertEqual(base_resp.json["title"], test_proposal["title"])
+        archive_resp = self.app.get(f"/api/v1/proposals/{draft_id}/archive")
+        self.assert200(archive_resp)
+        self.assertEqual(archive_resp.json["title"], new_draft_title)
+        self.assertEqual(archive_resp.json["milestones"][0]["title"], new_milestone_title)
+
     def test_publish_live_draft_bad_status_fail(self):
         # publishing a live draft without a LIVE_DRAFT status should fail
         self.login_default_user()
@@ -204,3 +204,89 @@ class TestProposalCommentAPI(BaseUserConfig):
         self.assertEqual(resp.json["likesCount"], 0)
         comment = Comment.query.get(comment_id)
         self.assertTrue(self.user not in comment.likes)
+
+    def test_authed_liked_is_batched(self):
+        proposal = Proposal(status=ProposalStatus.LIVE)
+        db.session.add(proposal)
+        db.session.commit()
+        proposal_id = proposal.id
+
+        def add_comments(count):
+            for _ in range(count):
+                comment = Comment(
+                    proposal_id=proposal_id,
+                    user_id=self.other_user.id,
+                    parent_comment_id=None,
+                    content=test_comment["comment"]
+                )
+                db.session.add(comment)
+                db.session.flush()
+                if comment.id % 2:
+                    comment.likes.append(self.user)
+            db.session.commit()
+
+        def get_comments():
+            resp = self.app.get(f"/api/v1/proposals/{proposal_id}/comments")
+            self.assert200(resp)
+            return resp.json['items']
+
+        self.login_default_user()
+        add_comments(5)
+        with self.assertMaxQueries(100) as statements:
+            items = get_comments()
+
+        # one lookup of the user's likes for the whole page
+        liked_lookups = [s for s in statements if s.startswith('SELECT comment_liker.comment_id')]
+        self.assertEqual(len(liked_lookups), 1)
+        self.assertEqual(len(items), 5)
+        for item in items:
+            self.assertEqual(item['authedLiked'], bool(item['id'] % 2))
+
+    def test_comment_threads_load_in_constant_queries(self):
+        proposal = Proposal(status=ProposalStatus.LIVE)
+        db.session.add(proposal)
+        db.session.commit()
+        proposal_id = proposal.id
+
+        def add(parent_id=None, hidden=False):
+            comment = Comment(
+                proposal_id=proposal_id,
+                user_id=self.other_user.id,
+                parent_comment_id=parent_id,
+                content=test_comment["comment"]
+            )
+            comment.hidden = hidden
+            db.session.add(comment)
+            db.session.commit()
+            return comment.id
+
+        def get_threads():
+            with self.assertMaxQueries(100) as statements:
+                resp = self.app.get(f"/api/v1/proposals/{proposal_id}/comments")
+            self.assert200(resp)
+            return resp.json['items'], len(statements)
+
+        def shape(items):
+            return [(c['id'], c['hidden'], shape(c['replies'])) for c in items]
+
+        first = add()
+        a = add(first)
+        a1 = add(a)
+        a1x = add(a1)
+        dead = add(first, hidden=True)
+        add(dead, hidden=True)
+        second = add()
+        removed = add(second, hidden=True)
+        kept = add(removed)
+
+        items, statements = get_threads()
+        self.assertEqual(sorted(shape(items)), sorted([
+            (first, False, [(a, False, [(a1, False, [(a1x, False, [])])])]),
+            (second, False, [(removed, True, [(kept, False, [])])]),
+        ]))
+
+        parent_id = kept
+        for _ in range(20):
+            parent_id = add(parent_id)
+        items, more_statements = get_threads()
+        self.assertEqual(more_statements, statements)
@@ -1,16 +1,14 @@
 import json
-from mock import patch
 
 from grant.proposal.models import Proposal
+from grant.settings import BLOCKCHAIN_API_SECRET
 from grant.utils.enums import ProposalStatus
 from ..config import BaseProposalCreatorConfig
-from ..test_data import test_proposal, mock_blockchain_api_requests
-from ..mocks import mock_request
+from ..test_data import test_proposal
 
 
 class TestProposalContributionAPI(BaseProposalCreatorConfig):
-    @patch('requests.get', side_effect=mock_blockchain_api_requests)
-    def test_create_proposal_contribution(self, mock_blockchain_get):
+    def test_create_proposal_contribution(self):
         self.login_default_user()
 
         contribution = {
@@ -25,8 +23,7 @@ class TestProposalContributionAPI(BaseProposalCreatorConfig):
 
         self.assertStatus(post_res, 201)
 
-    @patch('requests.get', side_effect=mock_blockchain_api_requests)
-    def test_create_duplicate_contribution(self, mock_blockchain_get):
+    def test_create_duplicate_contribution(self):
         self.login_default_user()
 
         contribution = {
@@ -49,8 +46,7 @@ class TestProposalContributionAPI(BaseProposalCreatorConfig):
         self.assert200(dupe_res)
         self.assertEqual(dupe_res.json['id'], post_res.json['id'])
 
-    @patch('requests.get', side_effect=mock_blockchain_api_requests)
-    def test_get_proposal_contribution(self, mock_blockchain_get):
+    def test_get_proposal_contribution(self):
         self.login_default_user()
 
         contribution = {
@@ -71,3 +67,83 @@ class TestProposalContributionAPI(BaseProposalCreatorConfig):
         contribution = contribution_res.json
         self.assertEqual(contribution['id'], contribution_id)
         self.assertEqual(contribution['status'], ProposalStatus.PENDING)
+
+    def test_confirm_contribution_updates_funding_totals(self):
+        self.login_default_user()
+
+        post_res = self.app.post(
+            "/api/v1/proposals/{}/contributions".format(self.proposal.id),
+            data=json.dumps({"amount": "1.2345"}),
+            content_type='application/json'
+        )
+        contribution_id = post_res.json['id']
+        self.assertEqual(self.proposal.contributed, "0")
+
+        confirmation = {
+            "to": "t123",
+            "amount": "123450000",
+            "txid": "tx123",
+        }
+        for _ in range(2):
+            # duplicate confirmations should not be counted twice
+            confirm_res = self.app.post(
+                f"/api/v1/proposals/contribution/{contribution_id}/confirm",
+                data=json.dumps(confirmation),
+                headers={"authorization": BLOCKCHAIN_API_SECRET},
+                content_type='application/json'
+            )
+            self.assert200(confirm_res)
+            self.assertEqual(self.proposal.contributed, "1.2345")
+            self.assertEqual(self.proposal.amount_staked, "0")
+
+    def test_calculate_funding_totals(self):
+        proposal = self.proposal
+        proposal.create_contribution(amount="1", user_id=self.user.id).confirm("tx1", "1")
+        proposal.create_contribution(amount="2.5", user_id=self.user.id).confirm("tx2", "2.5")
+        proposal.create_contribution(amount="0.025", user_id=self.user.id, staking=True).confirm("tx3", "0.025")
+        proposal.create_contribution(amount="7", user_id=self.user.id)
+
+        self.assertEqual(proposal.contributed, "3.5")
+        self.assertEqual(proposal.amount_staked, "0.025")
+        self.assertEqual(proposal.calculate_funding_totals(), ("3.5", "0.025"))
+
+    def test_confirm_contributions_batch(self):
+        first = self.proposal.create_contribution(amount="1", user_id=self.user.id)
+        second = self.proposal.create_contribution(amount="2.5", user_id=self.user.id)
+        confirmations = [
+            {"contributionId": first.id, "to": "t123", "amount": "100000000", "txid": "tx1"},
+            {"contributionId": second.id, "to": "t123", "amount": "250000000", "txid": "tx2"},
+            # reported twice in the same batch
+            {"contributionId": second.id, "to": "t123", "amount": "250000000", "txid": "tx2"},
+            {"contributionId": 9999, "to": "t123", "amount": "1", "txid": "tx3"},
+        ]
+
+        res = self.app.post(
+            "/api/v1/proposals/contributions/confirm/batch",
+            data=json.dumps({"contributions": confirmations}),
+            headers={"authorization": BLOCKCHAIN_API_SECRET},
+            content_type='application/json'
+        )
+        self.assert200(res)
+        self.assertEqual(res.json, {"confirmed": [first.id, second.id], "duplicates": [], "unknown": [9999]})
+        self.assertEqual(self.proposal.contributed, "3.5")
+        self.assertEqual(second.tx_id, "tx2")
+
+        # the watcher resending them doesn't count them twice
+        res = self.app.post(
+            "/api/v1/proposals/contributions/confirm/batch",
+            data=json.dumps({"contributions": confirmations[:2]}),
+            headers={"authorization": BLOCKCHAIN_API_SECRET},
+            content_type='application/json'
+        )
+        self.assert200(res)
+        self.assertEqual(res.json["duplicates"], [first.id, second.id])
+        self.assertEqual(self.proposal.contributed, "3.5")
+
+    def test_confirm_contributions_batch_requires_secret(self):
+        res = self.app.post(
+            "/api/v1/proposals/contributions/confirm/batch",
+            data=json.dumps({"contributions": []}),
+            content_type='application/json'
+        )
+        self.assert403(res)
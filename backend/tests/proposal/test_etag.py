@@ -0,0 +1,143 @@
+import json
+from datetime import datetime, timedelta
+
+from grant.ccr.models import CCR
+from grant.proposal.models import Proposal, db
+from grant.rfp.models import RFP
+from grant.utils.enums import ProposalStatus, ProposalStage, RFPStatus
+
+from ..config import BaseProposalCreatorConfig
+
+
+class TestProposalETag(BaseProposalCreatorConfig):
+    def setUp(self):
+        super().setUp()
+        self.proposal.status = ProposalStatus.LIVE
+        self.proposal.stage = ProposalStage.WIP
+        self.proposal.date_published = datetime.now()
+        db.session.commit()
+
+    def get(self, url, etag=None):
+        headers = {"If-None-Match": etag} if etag else {}
+        return self.app.get(url, headers=headers)
+
+    def assertNotModified(self, url, etag):
+        with self.assertMaxQueries(3):
+            resp = self.get(url, etag)
+        self.assertStatus(resp, 304)
+        self.assertEqual(resp.headers["ETag"], etag)
+        self.assertEqual(resp.data, b"")
+
+    def assertModified(self, url, etag):
+        resp = self.get(url, etag)
+        self.assert200(resp)
+        self.assertNotEqual(resp.headers["ETag"], etag)
+        return resp.headers["ETag"]
+
+    def test_proposal_detail(self):
+        url = f"/api/v1/proposals/{self.proposal.id}"
+        resp = self.get(url)
+        self.assert200(resp)
+        etag = resp.headers["ETag"]
+        self.assertIn("Cookie", resp.headers["Vary"])
+        self.assertNotModified(url, etag)
+
+        # milestones bump their proposal's stamp
+        self.proposal.milestones[0].title = "Renamed"
+        db.session.commit()
+        etag = self.assertModified(url, etag)
+
+        # likes change likes_count & authed_liked
+        self.login_default_user()
+        etag = self.assertModified(url, etag)
+        self.assertNotModified(url, etag)
+        resp = self.app.put(
+            f"/api/v1/proposals/{self.proposal.id}/like",
+            data=json.dumps({"isLiked": True}),
+            content_type="application/json"
+        )
+        self.assert200(resp)
+        self.assertModified(url, etag)
+
+    def test_proposal_detail_rfp_ccr_changes(self):
+        rfp = RFP(
+            title="ETag", brief="Brief", content="Content", bounty="10", status=RFPStatus.LIVE,
+            date_closes=datetime.now() + timedelta(days=30),
+        )
+        self.proposal.rfp = rfp
+        db.session.add(rfp)
+        db.session.commit()
+        rfp_id = rfp.id
+        ccr_id = CCR.create(status="LIVE", title="CCR", content="Content", brief="Brief", target="10",
+                            user_id=self.user.id).id
+        db.session.commit()
+
+        url = f"/api/v1/proposals/{self.proposal.id}"
+        etag = self.get(url).headers["ETag"]
+        # the detail nests the rfp's ccr, which bumps the rfp
+        CCR.query.get(ccr_id).rfp_id = rfp_id
+        db.session.commit()
+        self.assertModified(url, etag)
+
+    def test_unknown_proposal_is_not_tagged(self):
+        resp = self.get("/api/v1/proposals/12345", '"x"')
+        self.assert404(resp)
+        self.assertNotIn("ETag", resp.headers)
+
+    def test_invites_poll(self):
+        self.login_default_user()
+        url = f"/api/v1/proposals/{self.proposal.id}/invites"
+        resp = self.get(url)
+        self.assert200(resp)
+        self.assertEqual(set(resp.json.keys()), {"team", "invites"})
+        etag = resp.headers["ETag"]
+        self.assertNotModified(url, etag)
+
+        resp = self.app.post(
+            f"/api/v1/proposals/{self.proposal.id}/invite",
+            data=json.dumps({"address": "invitee@example.com"}),
+            content_type="application/json"
+        )
+        self.assertStatus(resp, 201)
+        resp = self.get(url, etag)
+        self.assert200(resp)
+        self.assertEqual(len(resp.json["invites"]), 1)
+        self.assertNotEqual(resp.headers["ETag"], etag)
+
+    def test_etag_varies_by_user(self):
+        url = f"/api/v1/proposals/{self.proposal.id}"
+        anonymous = self.get(url).headers["ETag"]
+        self.login_default_user()
+        self.assertModified(url, anonymous)
+
+    def test_home_latest(self):
+        url = "/api/v1/home/latest"
+        etag = self.get(url).headers["ETag"]
+        self.assertNotModified(url, etag)
+
+        db.session.add(RFP(title="New", brief="Brief", content="Content", bounty="10", status=RFPStatus.LIVE,
+                           date_closes=None))
+        db.session.commit()
+        etag = self.assertModified(url, etag)
+
+        db.session.delete(Proposal.query.get(self.other_proposal.id))
+        db.session.commit()
+        self.assertModified(url, etag)
+
+    def test_rfps(self):
+        rfp = RFP(title="RFP", brief="Brief", content="Content", bounty="10", status=RFPStatus.LIVE,
+                  date_closes=None)
+        db.session.add(rfp)
+        db.session.commit()
+        rfp_id = rfp.id
+        url = "/api/v1/rfps/"
+        etag = self.get(url).headers["ETag"]
+        self.assertNotModified(url, etag)
+
+        RFP.query.get(rfp_id).title = "Renamed"
+        db.session.commit()
+        etag = self.assertModified(url, etag)
+
+        self.proposal.rfp_id = rfp_id
+        db.session.commit()
+        self.assertModified(url, etag)
@@ -1,7 +1,16 @@
 
 from ..config import BaseProposalCreatorConfig
 import json
-from grant.proposal.models import Proposal, ProposalRevision
+from grant.proposal.models import Proposal, ProposalRevision, db
+from grant.proposal.revisions import (
+    KEYFRAME_INTERVAL,
+    decode_snapshot,
+    diff_lines,
+    document_cache,
+    encode_snapshot,
+    make_document,
+    patch_lines
+)
 from grant.utils.enums import ProposalChange
 from ..test_data import test_team
 
@@ -224,3 +233,39 @@ class TestProposalMethods(BaseProposalCreatorConfig):
         self.validate_changes(changes, ProposalChange.MILESTONE_EDIT_PERCENT, 1)
         self.validate_changes(changes, ProposalChange.MILESTONE_ADD, 2)
         self.validate_changes(changes, ProposalChange.MILESTONE_ADD, 3)
+
+    def test_snapshot_deltas(self):
+        old = "# Intro\nline 1\nline 2\nline 3\n"
+        new = "# Intro\nline 1\nline 2 edited\nline 3\nline 4"
+        self.assertEqual(patch_lines(old, diff_lines(old, new)), new)
+
+        proposal = Proposal.query.get(self.init_proposal(test_proposal_a))
+        document = make_document(proposal, proposal.milestones, [self.user.id])
+        edited = dict(document, content=new, title="Give Me Money B")
+        delta = encode_snapshot(edited, document)
+        self.assertLess(len(delta), len(encode_snapshot(edited)))
+        self.assertEqual(decode_snapshot(delta, document), edited)
+        self.assertEqual(decode_snapshot(encode_snapshot(edited)), edited)
+
+    def test_rebuild_revisions(self):
+        proposal = Proposal.query.get(self.init_proposal(test_proposal_a))
+        document = make_document(proposal, proposal.milestones, [self.user.id])
+        documents = []
+        for i in range(KEYFRAME_INTERVAL + 2):
+            previous = document
+            document = dict(previous, content=f"{previous['content']}\nrevision {i}", title=f"Revision {i}")
+            documents.append(document)
+            db.session.add(ProposalRevision.create(
+                author=self.user,
+                proposal_id=proposal.id,
+                proposal_archive_id=100000 + i,
+                changes=[],
+                revision_index=i,
+                document=document,
+                previous_document=previous
+            ))
+        db.session.commit()
+        document_cache.invalidate()
+
+        for revision in ProposalRevision.query.filter_by(proposal_id=proposal.id):
+            self.assertEqual(revision.document(), documents[revision.revision_index])
@@ -0,0 +1,113 @@
+from datetime import datetime, timedelta
+
+from grant.milestone.models import Milestone
+from grant.proposal.models import Proposal, ProposalUpdate, ProposalTeamInvite, db
+from grant.rfp.models import RFP
+from grant.user.models import User, SocialMedia, Avatar
+from grant.utils.enums import ProposalStatus, ProposalStage, RFPStatus
+
+from ..config import BaseUserConfig
+from ..test_data import test_proposal, test_user
+
+milestones = [
+    {
+        "title": "Milestone 1",
+        "content": "Content 1",
+        "days_estimated": "30",
+        "payout_percent": 50,
+        "immediate_payout": True
+    },
+    {
+        "title": "Milestone 2",
+        "content": "Content 2",
+        "days_estimated": "20",
+        "payout_percent": 50,
+        "immediate_payout": False
+    }
+]
+
+
+class TestProposalQueryCounts(BaseUserConfig):
+    def setUp(self):
+        super().setUp()
+        self.rfp = RFP(
+            title='Query counts',
+            brief='Brief',
+            content='Content',
+            bounty='10',
+            date_closes=datetime.now() + timedelta(days=30),
+            status=RFPStatus.LIVE,
+        )
+        db.session.add(self.rfp)
+        db.session.commit()
+        self._proposal_ids = []
+
+    def make_proposals(self, count):
+        for i in range(count):
+            member = User.create(
+                email_address=f'member{len(self._proposal_ids)}@example.com',
+                password='password',
+                display_name='Member',
+                title='',
+            )
+            db.session.add(SocialMedia(service='GITHUB', username=f'member{i}', user_id=member.id))
+            db.session.add(Avatar(image_url=test_user['avatar']['link'], user_id=member.id))
+            proposal = Proposal.create(
+                status=ProposalStatus.LIVE,
+                title=test_proposal["title"],
+                content=test_proposal["content"],
+                brief=test_proposal["brief"],
+                category=test_proposal["category"],
+                target=test_proposal["target"],
+                payout_address=test_proposal["payoutAddress"],
+            )
+            proposal.stage = ProposalStage.WIP
+            proposal.date_published = datetime.now()
+            proposal.team.append(member)
+            proposal.rfp = self.rfp
+            Milestone.make(milestones, proposal)
+            db.session.add(ProposalUpdate(proposal_id=proposal.id, title='Update', content='Content'))
+            db.session.add(ProposalTeamInvite(proposal_id=proposal.id, address='invitee@example.com'))
+            db.session.commit()
+            self._proposal_ids.append(proposal.id)
+        db.session.expire_all()
+
+    def count_queries(self, url):
+        with self.assertMaxQueries(100) as statements:
+            resp = self.app.get(url)
+        self.assert200(resp)
+        return len(statements)
+
+    def test_proposal_page_queries_do_not_grow_with_page_size(self):
+        self.make_proposals(1)
+        few = self.count_queries('/api/v1/proposals/')
+        self.make_proposals(5)
+        with self.assertMaxQueries(few):
+            resp = self.app.get('/api/v1/proposals/')
+        self.assertEqual(len(resp.json['items']), 6)
+
+    def test_authed_proposal_page_queries_do_not_grow(self):
+        # authed_follows & authed_liked are looked up for the whole page at once
+        self.login_default_user()
+        self.make_proposals(1)
+        few = self.count_queries('/api/v1/proposals/')
+        self.make_proposals(5)
+        with self.assertMaxQueries(few):
+            resp = self.app.get('/api/v1/proposals/')
+        self.assertEqual(len(resp.json['items']), 6)
+
+    def test_home_latest_queries_do_not_grow(self):
+        self.make_proposals(1)
+        few = self.count_queries('/api/v1/home/latest')
+        self.make_proposals(2)
+        with self.assertMaxQueries(few):
+            resp = self.app.get('/api/v1/home/latest')
+        self.assertEqual(len(resp.json['latestProposals']), 3)
+
+    def test_proposal_detail_query_count(self):
+        self.make_proposals(1)
+        # 7, plus the stamp lookup for the ETag
+        with self.assertMaxQueries(8):
+            resp = self.app.get(f'/api/v1/proposals/{self._proposal_ids[0]}')
+        self.assert200(resp)
+        self.assertEqual(resp.json['rfp']['id'], self.rfp.id)
@@ -4,8 +4,9 @@ from grant.utils import totp_2fa
 from grant.task.jobs import MilestoneDeadline
 from datetime import datetime, timedelta
 
-from grant.task.models import Task, db
-from grant.task.jobs import PruneDraft
+from grant.task.models import Task, TaskWatermark, db, task_archive
+from grant.task.jobs import ArchiveTasks, ProposalReminder, PruneDraft
+from grant.task import worker
 from grant.milestone.models import Milestone
 from grant.proposal.models import Proposal, ProposalUpdate
 from grant.utils.enums import ProposalStatus, ProposalStage, Category
@@ -82,6 +83,65 @@ class TestTaskAPI(BaseProposalCreatorConfig):
         tasks = Task.query.filter(Task.execute_after <= datetime.now()).filter_by(completed=False).all()
         self.assertEqual(tasks, [])
 
+    def test_failed_task_is_retried_with_backoff(self):
+        self.make_proposal_reminder_task()
+        with patch.dict('grant.task.worker.JOBS', {1: Mock(side_effect=Exception('boom'))}):
+            self.app.get("/api/v1/task")
+
+        task = Task.query.one()
+        self.assertFalse(task.completed)
+        self.assertEqual(task.attempts, 1)
+        self.assertIn('boom', task.last_error)
+        self.assertGreater(task.execute_after, datetime.now() + timedelta(seconds=worker.RETRY_DELAY - 5))
+
+        # not due again until the backoff has passed
+        self.assertEqual(worker.claim_tasks(), [])
+        later = datetime.now() + worker.retry_delay(1) + timedelta(seconds=1)
+        self.assertEqual(len(worker.claim_tasks(now=later)), 1)
+
+    def test_failed_task_gives_up_after_max_attempts(self):
+        self.make_proposal_reminder_task()
+        task = Task.query.one()
+        task.attempts = worker.MAX_ATTEMPTS - 1
+        db.session.commit()
+        with patch.dict('grant.task.worker.JOBS', {1: Mock(side_effect=Exception('boom'))}):
+            self.app.get("/api/v1/task")
+
+        # completed with its error, so it's archived like any other
+        task = Task.query.one()
+        self.assertTrue(task.completed)
+        self.assertIsNotNone(task.date_completed)
+        self.assertIn('boom', task.last_error)
+        self.assertEqual(worker.claim_tasks(now=datetime.now() + timedelta(days=1)), [])
+
+    def test_task_of_dead_worker_gives_up_after_max_attempts(self):
+        self.make_proposal_reminder_task()
+        task = Task.query.one()
+        task.attempts = worker.MAX_ATTEMPTS
+        db.session.commit()
+        self.assertEqual(worker.claim_tasks(), [])
+        self.assertTrue(Task.query.one().completed)
+
+    def test_schedule_replaces_pending_task_of_key(self):
+        first = Task.schedule(MilestoneDeadline.JOB_TYPE, {"proposal_id": 1}, datetime.now(), entity_id=1)
+        second = Task.schedule(MilestoneDeadline.JOB_TYPE, {"proposal_id": 1, "n": 2}, datetime.now(), entity_id=1)
+        db.session.commit()
+        self.assertEqual(first.id, second.id)
+        task = Task.query.filter_by(idempotency_key=f'{MilestoneDeadline.JOB_TYPE}:1').one()
+        self.assertEqual(task.blob, {"proposal_id": 1, "n": 2})
+
+    def test_run_worker_drains_due_tasks(self):
+        for _ in range(3):
+            self.make_proposal_reminder_task()
+        Task.query.first().execute_after = datetime.now() + timedelta(days=1)
+        db.session.commit()
+
+        processed, failed = worker.run_worker(concurrency=2, once=True)
+        self.assertEqual((processed, failed), (2, 0))
+        tasks = Task.query.order_by(Task.id).all()
+        self.assertEqual([t.completed for t in tasks], [False, True, True])
+        self.assertEqual([t.attempts for t in tasks], [0, 1, 1])
+
     @patch('grant.task.views.datetime')
     def test_proposal_pruning(self, mock_datetime):
         self.login_default_user()
@@ -90,33 +150,74 @@ class TestTaskAPI(BaseProposalCreatorConfig):
         )
         proposal_id = resp.json['proposalId']
 
-        # make sure proposal was created
+        # make sure proposal was created, without a task
+        self.assertStatus(resp, 201)
         proposal = Proposal.query.get(proposal_id)
         self.assertIsNotNone(proposal)
+        self.assertEqual(Task.query.count(), 0)
 
-        # make sure the task was created
-        self.assertStatus(resp, 201)
-        tasks = Task.query.all()
-        self.assertEqual(len(tasks), 1)
-        task = tasks[0]
-        self.assertEqual(resp.json['proposalId'], task.blob['proposal_id'])
-        self.assertFalse(task.completed)
+        # not pruned before its time
+        self.app.get("/api/v1/task")
+        self.assertIsNotNone(Proposal.query.get(proposal_id))
 
-        # mock time so task will run when called
+        # mock time so the sweep will prune it
         after_time = datetime.now() + timedelta(seconds=PruneDraft.PRUNE_TIME + 100)
         mock_datetime.now = Mock(return_value=after_time)
 
-        # run task
+        # run sweeps
         resp = self.app.get("/api/v1/task")
         self.assert200(resp)
 
-        # make sure task ran successfully
-        tasks = Task.query.all()
-        self.assertEqual(len(tasks), 1)
-        task = tasks[0]
-        self.assertTrue(task.completed)
+        # make sure it was pruned & the watermark moved on
         proposal = Proposal.query.get(proposal_id)
         self.assertIsNone(proposal)
+        self.assertEqual(TaskWatermark.query.get(PruneDraft.JOB_TYPE).date_swept, after_time)
+
+    def test_sweep_only_scans_past_watermark(self):
+        proposal = Proposal.create(status=ProposalStatus.DRAFT)
+        proposal_id = proposal.id
+        db.session.commit()
+
+        prunable = datetime.now() + timedelta(seconds=PruneDraft.PRUNE_TIME + 100)
+        # already swept past when it became prunable
+        db.session.add(TaskWatermark(job_type=PruneDraft.JOB_TYPE, date_swept=prunable))
+        db.session.commit()
+        worker.run_sweeps(now=prunable + timedelta(hours=1))
+        self.assertIsNotNone(Proposal.query.get(proposal_id))
+
+        TaskWatermark.query.get(PruneDraft.JOB_TYPE).date_swept = prunable - timedelta(hours=1)
+        db.session.commit()
+        worker.run_sweeps(now=prunable)
+        self.assertIsNone(Proposal.query.get(proposal_id))
+
+    def test_tasks_of_deleted_proposal_are_cancelled(self):
+        self.make_proposal_reminder_task()
+        self.make_proposal_reminder_task()
+        other_task = ProposalReminder(self.other_proposal.id)
+        other_task.make_task()
+        self.assertEqual(Task.query.count(), 3)
+
+        db.session.delete(self.proposal)
+        db.session.commit()
+        tasks = Task.query.all()
+        self.assertEqual([t.blob['proposal_id'] for t in tasks], [self.other_proposal.id])
+
+    def test_completed_tasks_are_archived(self):
+        self.make_proposal_reminder_task()
+        self.make_proposal_reminder_task()
+        self.app.get("/api/v1/task")
+        self.make_proposal_reminder_task()
+
+        worker.run_sweeps(now=datetime.now() + timedelta(seconds=ArchiveTasks.ARCHIVE_TIME - 100))
+        self.assertEqual(Task.query.count(), 3)
+
+        worker.run_sweeps(now=datetime.now() + timedelta(seconds=ArchiveTasks.ARCHIVE_TIME + 100))
+        tasks = Task.query.all()
+        self.assertEqual(len(tasks), 1)
+        self.assertFalse(tasks[0].completed)
+        archived = db.session.query(task_archive).all()
+        self.assertEqual(len(archived), 2)
+        self.assertTrue(all(t.completed for t in archived))
 
     def test_proposal_pruning_noops(self):
         # ensure all proposal noop states work as expected
@@ -164,17 +265,8 @@ class TestTaskAPI(BaseProposalCreatorConfig):
             db.session.add(proposal)
             db.session.commit()
 
-            blob = {
-                "proposal_id": proposal_id,
-            }
-
-            task = Task(
-                job_type=PruneDraft.JOB_TYPE,
-                blob=blob,
-                execute_after=datetime.now()
-            )
-
-            PruneDraft.process_task(task)
+            PruneDraft.sweep(None, datetime.now() + timedelta(seconds=PruneDraft.PRUNE_TIME + 100))
+            db.session.commit()
 
             proposal = Proposal.query.get(proposal_id)
             self.assertIsNotNone(proposal)
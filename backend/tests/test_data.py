@@ -135,11 +135,13 @@ test_reply = {
     # Fill in parentCommentId in test
 }
 
-mock_contribution_addresses = mock_request({
+contribution_addresses = {
     'transparent': 't123',
     'sprout': 'z123',
     'memo': '123',
-})
+}
+
+mock_contribution_addresses = mock_request(contribution_addresses)
 
 mock_valid_address = mock_request({
     'valid': True,
@@ -156,3 +158,12 @@ def mock_blockchain_api_requests(path, **kwargs):
     if '/validate/address' in path:
         return mock_valid_address()
     raise Exception('No mock data defined for path {}'.format(path))
+
+
+# what the FakeWatcher answers with by default, see BaseTestConfig
+blockchain_api_responses = {
+    '/contribution/addresses': contribution_addresses,
+    '/validate/address': {'valid': True},
+    '/bootstrap': {'startHeight': 123, 'currentHeight': 456, 'paged': True},
+    '/sync': {'startHeight': 123, 'currentHeight': 456, 'paged': True},
+}
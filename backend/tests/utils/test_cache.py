@@ -0,0 +1,87 @@
+from datetime import datetime
+from unittest.mock import patch
+
+from grant.extensions import response_cache
+from grant.proposal.models import Proposal, db
+from grant.utils.cache import LRUBackend
+from grant.utils.enums import ProposalStatus, ProposalStage
+
+from ..config import BaseProposalCreatorConfig
+
+
+class TestLRUBackend(BaseProposalCreatorConfig):
+    def test_evicts_least_recently_used(self):
+        backend = LRUBackend(2)
+        backend.set('a', b'1', 60)
+        backend.set('b', b'2', 60)
+        backend.get('a')
+        backend.set('c', b'3', 60)
+        self.assertEqual(backend.get('a'), b'1')
+        self.assertIsNone(backend.get('b'))
+        self.assertEqual(backend.get('c'), b'3')
+
+    def test_expires(self):
+        backend = LRUBackend(2)
+        backend.set('a', b'1', 60)
+        with patch('grant.utils.cache.time.time', return_value=datetime.now().timestamp() + 61):
+            self.assertIsNone(backend.get('a'))
+        self.assertEqual(backend.stats()['entries'], 0)
+
+
+class TestResponseCache(BaseProposalCreatorConfig):
+    def setUp(self):
+        super().setUp()
+        self.proposal.status = ProposalStatus.LIVE
+        self.proposal.stage = ProposalStage.WIP
+        self.proposal.date_published = datetime.now()
+        db.session.commit()
+        self.url = f"/api/v1/proposals/{self.proposal.id}"
+
+    def test_proposal_detail_read_through(self):
+        first = self.app.get(self.url)
+        self.assert200(first)
+        # only the etag's stamp lookup is left
+        with self.assertMaxQueries(1):
+            second = self.app.get(self.url)
+        self.assert200(second)
+        self.assertEqual(second.json, first.json)
+        self.assertEqual(second.headers["ETag"], first.headers["ETag"])
+        self.assertEqual(response_cache.stats()["endpoints"]["proposal"], {"hits": 1, "misses": 1})
+
+    def test_invalidated_by_writes(self):
+        self.app.get(self.url)
+        self.proposal.milestones[0].title = "Renamed"
+        db.session.commit()
+        resp = self.app.get(self.url)
+        self.assertEqual(resp.json["milestones"][0]["title"], "Renamed")
+
+        self.app.get("/api/v1/proposals/")
+        self.app.get("/api/v1/proposals/")
+        Proposal.query.get(self.proposal.id).title = "Retitled"
+        db.session.commit()
+        resp = self.app.get("/api/v1/proposals/")
+        self.assertEqual(resp.json["items"][0]["title"], "Retitled")
+        self.assertEqual(response_cache.stats()["endpoints"]["proposals"], {"hits": 1, "misses": 2})
+
+    def test_only_responses_showing_written_rows_are_dropped(self):
+        self.app.get(self.url)
+        self.app.get("/api/v1/proposals/")
+        self.other_proposal.title = "Other"
+        db.session.commit()
+        self.app.get(self.url)
+        self.app.get("/api/v1/proposals/")
+        self.assertEqual(response_cache.stats()["endpoints"]["proposal"], {"hits": 1, "misses": 1})
+        self.assertEqual(response_cache.stats()["endpoints"]["proposals"], {"hits": 0, "misses": 2})
+
+    def test_not_cached(self):
+        # authed responses carry authed_liked etc.
+        self.login_default_user()
+        self.app.get(self.url)
+        self.app.get(self.url)
+        self.app.get("/api/v1/proposals/?page=2")
+        self.assertEqual(response_cache.stats()["endpoints"], {})
+
+    def test_errors_not_cached(self):
+        self.assert404(self.app.get("/api/v1/proposals/12345"))
+        self.assert404(self.app.get("/api/v1/proposals/12345"))
+        self.assertEqual(response_cache.stats()["endpoints"]["proposal"], {"hits": 0, "misses": 2})
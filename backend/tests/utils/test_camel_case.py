@@ -0,0 +1,40 @@
+import json
+
+from animal_case import animalify
+from flask import current_app
+
+from grant.proposal.models import proposal_schema
+from grant.utils.camel_case import CamelCaseDict, camelize, snakeize
+from grant.utils.json_encoder import dumps
+
+from ..config import BaseProposalCreatorConfig
+
+
+class TestCamelCase(BaseProposalCreatorConfig):
+    def test_schema_dumps_camel_case(self):
+        dump = proposal_schema.dump(self.proposal)
+        self.assertIsInstance(dump, CamelCaseDict)
+        self.assertIn('proposalId', dump)
+        self.assertIn('dateCreated', dump)
+        self.assertIn('payoutPercent', dump['milestones'][0])
+        self.assertIn('userid', dump['team'][0])
+        # like animalify did, including the dicts returned by Method fields
+        self.assertEqual(dump, animalify(dump))
+
+    def test_camelize_skips_schema_output(self):
+        dump = proposal_schema.dump(self.proposal)
+        result = camelize({'latest_proposals': [dump]})
+        self.assertIs(result['latestProposals'][0], dump)
+
+    def test_snakeize(self):
+        self.assertEqual(
+            snakeize({'payoutPercent': '50', 'milestones': [{'immediatePayout': True}]}),
+            {'payout_percent': '50', 'milestones': [{'immediate_payout': True}]}
+        )
+
+    def test_encoders_match(self):
+        dump = camelize({'proposal': proposal_schema.dump(self.proposal), 'total_count': 1})
+        current_app.config['JSON_ENCODER'] = 'json'
+        stdlib = dumps(dump)
+        current_app.config['JSON_ENCODER'] = 'orjson'
+        self.assertEqual(json.loads(dumps(dump)), json.loads(stdlib))
@@ -0,0 +1,51 @@
+from grant.comment.models import Comment
+from grant.proposal.models import Proposal, db
+from grant.utils.counters import rebuild_counters
+
+from ..config import BaseProposalCreatorConfig
+
+
+class TestCounters(BaseProposalCreatorConfig):
+    def test_like_and_follow(self):
+        self.proposal.like(self.user, True)
+        self.proposal.like(self.user, True)
+        self.proposal.like(self.other_user, True)
+        self.proposal.follow(self.user, True)
+        db.session.commit()
+        self.assertEqual(self.proposal.likes_count, 2)
+        self.assertEqual(len(self.proposal.likes), 2)
+        self.assertEqual(self.proposal.followers_count, 1)
+
+        self.proposal.like(self.user, False)
+        self.proposal.like(self.user, False)
+        self.proposal.follow(self.user, False)
+        db.session.commit()
+        self.assertEqual(self.proposal.likes_count, 1)
+        self.assertEqual(self.proposal.likes, [self.other_user])
+        self.assertEqual(self.proposal.followers_count, 0)
+
+    def test_like_bumps_stamp(self):
+        stamp = self.proposal.stamp
+        self.proposal.like(self.user, True)
+        db.session.commit()
+        self.assertGreater(Proposal.query.get(self.proposal.id).stamp, stamp)
+
+    def test_listing_does_not_count(self):
+        with self.assertMaxQueries(1) as statements:
+            Proposal.query.all()
+        self.assertNotIn('count(', statements[0].lower())
+
+    def test_rebuild_counters(self):
+        comment = Comment(self.proposal.id, self.user.id, None, 'Counted')
+        db.session.add(comment)
+        db.session.flush()
+        # written around set_associated
+        comment.likes.append(self.other_user)
+        db.session.commit()
+        self.assertEqual(comment.likes_count, 0)
+
+        self.assertEqual(rebuild_counters(Comment, 'likes', 'likes_count', verify=True), 1)
+        self.assertEqual(rebuild_counters(Comment, 'likes', 'likes_count'), 1)
+        db.session.refresh(comment)
+        self.assertEqual(comment.likes_count, 1)
+        self.assertEqual(rebuild_counters(Comment, 'likes', 'likes_count', verify=True), 0)
@@ -0,0 +1,40 @@
+from mock import patch
+
+from grant.comment.models import Comment
+from grant.extensions import db
+from grant.user.models import User
+from grant.utils.ids import id_allocator, permute, BLOCK_SIZE, MIN_ID, MAX_ID
+
+from ..config import BaseUserConfig
+
+
+class TestIds(BaseUserConfig):
+    def test_permute(self):
+        ids = [permute(counter, b'key', 'comment') for counter in range(10000)]
+        self.assertEqual(len(set(ids)), len(ids))
+        self.assertTrue(all(MIN_ID <= id <= MAX_ID for id in ids))
+        # keyed per table
+        self.assertNotEqual(ids[:10], [permute(counter, b'key', 'proposal') for counter in range(10)])
+        self.assertNotEqual(ids[:10], [permute(counter, b'other', 'comment') for counter in range(10)])
+
+    def test_ids_are_unique_without_lookups(self):
+        with self.assertMaxQueries(2 * 3):
+            ids = [id_allocator.next_id(Comment) for _ in range(BLOCK_SIZE * 3)]
+        self.assertEqual(len(set(ids)), len(ids))
+
+    def test_skips_existing_ids(self):
+        id_allocator.reset()
+        taken = self.user.id
+        with patch('grant.utils.ids.permute', lambda counter, key, tweak: taken + counter % BLOCK_SIZE):
+            ids = [id_allocator.next_id(User) for _ in range(BLOCK_SIZE - 1)]
+        self.assertNotIn(taken, ids)
+        self.assertEqual(len(set(ids)), BLOCK_SIZE - 1)
+
+    def test_rollback_forgets_only_its_blocks(self):
+        id_allocator.reset()
+        id_allocator.next_id(Comment)
+        db.session.commit()
+        id_allocator.next_id(User)
+        db.session.rollback()
+        self.assertIn(Comment.__tablename__, id_allocator.blocks)
+        self.assertNotIn(User.__tablename__, id_allocator.blocks)
@@ -0,0 +1,38 @@
+from grant.proposal.models import ProposalContribution, db
+from grant.utils.enums import ContributionStatus
+from grant.utils.exceptions import ValidationException
+from grant.utils.money import AMOUNT_SCALE, PERCENT_SCALE, from_units, normalize, to_units
+
+from ..config import BaseProposalCreatorConfig
+
+
+class TestMoney(BaseProposalCreatorConfig):
+    def test_units(self):
+        self.assertEqual(to_units('1.5', AMOUNT_SCALE), 150000000)
+        self.assertEqual(to_units('1e-05', AMOUNT_SCALE), 1000)
+        self.assertEqual(to_units(25, PERCENT_SCALE), 2500)
+        # truncated past the scale
+        self.assertEqual(to_units('0.123456789', AMOUNT_SCALE), 12345678)
+        self.assertEqual(from_units(20000000000, AMOUNT_SCALE), '200')
+        self.assertEqual(from_units(0, AMOUNT_SCALE), '0')
+        self.assertEqual(normalize('2.50', PERCENT_SCALE), '2.5')
+        for bad in ('', 'abc', 'NaN', 'Infinity'):
+            with self.assertRaises(ValidationException):
+                to_units(bad, AMOUNT_SCALE)
+
+    def test_sorted_and_summed_as_numbers(self):
+        for amount in ('9', '10.5', '0.25', '100'):
+            contribution = self.proposal.create_contribution(amount=amount, user_id=self.user.id)
+            contribution.confirm(tx_id=f'tx{amount}', amount=amount)
+        db.session.commit()
+
+        amounts = [c.amount for c in ProposalContribution.query
+                   .filter_by(proposal_id=self.proposal.id, status=ContributionStatus.CONFIRMED)
+                   .order_by(ProposalContribution.amount.desc())]
+        self.assertEqual(amounts, ['100', '10.5', '9', '0.25'])
+        self.assertEqual(tuple(self.proposal.calculate_funding_totals()), ('119.75', '0'))
+        self.assertEqual(self.proposal.contributed, '119.75')
+
+        resp = self.app.get(f"/api/v1/proposals/{self.proposal.id}/contributions")
+        self.assert200(resp)
+        self.assertEqual([c['amount'] for c in resp.json['top']], amounts)
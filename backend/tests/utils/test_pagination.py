@@ -0,0 +1,92 @@
+from datetime import datetime, timedelta
+
+from grant.extensions import ma
+from grant.proposal.models import Proposal, db
+from grant.utils import pagination
+from grant.utils.enums import ProposalStatus
+
+from ..config import BaseProposalCreatorConfig
+
+
+class IdSchema(ma.Schema):
+    class Meta:
+        fields = ("id",)
+
+
+ids_schema = IdSchema(many=True)
+
+
+class TestCursorPagination(BaseProposalCreatorConfig):
+    def setUp(self):
+        super().setUp()
+        now = datetime.now()
+        for i in range(20):
+            proposal = Proposal.create(status=ProposalStatus.DRAFT)
+            # a few share a publish date, and drafts have none at all
+            proposal.date_published = None if i % 5 == 0 else now - timedelta(days=i // 2)
+            db.session.add(proposal)
+        db.session.commit()
+
+    def expected_ids(self, desc=True):
+        proposals = Proposal.query.all()
+        published = sorted(
+            [p for p in proposals if p.date_published],
+            key=lambda p: (p.date_published, p.id),
+            reverse=desc,
+        )
+        drafts = sorted([p for p in proposals if not p.date_published], key=lambda p: p.id, reverse=desc)
+        return [p.id for p in published + drafts]
+
+    def walk(self, sort, cursor=''):
+        pages = []
+        while cursor is not None:
+            page = pagination.proposal(schema=ids_schema, query=Proposal.query, sort=sort, cursor=cursor)
+            pages.append(page)
+            cursor = page['next_cursor']
+        return pages
+
+    def test_cursor_walks_every_row_once(self):
+        for sort, desc in [('PUBLISHED:DESC', True), ('PUBLISHED:ASC', False)]:
+            pages = self.walk(sort)
+            ids = [item['id'] for page in pages for item in page['items']]
+            self.assertEqual(ids, self.expected_ids(desc))
+            self.assertEqual(len(pages), 3)
+            self.assertIsNone(pages[0]['prev_cursor'])
+            self.assertIsNone(pages[-1]['next_cursor'])
+
+    def test_prev_cursor_returns_previous_page(self):
+        pages = self.walk('PUBLISHED:DESC')
+        for i in range(len(pages) - 1, 0, -1):
+            prev = pagination.proposal(
+                schema=ids_schema,
+                query=Proposal.query,
+                sort='PUBLISHED:DESC',
+                cursor=pages[i]['prev_cursor'],
+            )
+            self.assertEqual(prev['items'], pages[i - 1]['items'])
+        self.assertIsNone(prev['prev_cursor'])
+
+    def test_page_mode_unchanged(self):
+        page = pagination.proposal(schema=ids_schema, query=Proposal.query, page=2)
+        self.assertEqual(page['page'], 2)
+        self.assertEqual(page['total'], 22)
+        self.assertNotIn('next_cursor', page)
+
+    def test_cursor_for_other_sort_is_rejected(self):
+        cursor = self.walk('PUBLISHED:DESC')[0]['next_cursor']
+        with self.assertRaises(pagination.PaginationException):
+            pagination.proposal(schema=ids_schema, query=Proposal.query, sort='CREATED:DESC', cursor=cursor)
+
+    def test_invalid_cursor_is_bad_request(self):
+        resp = self.app.get("/api/v1/proposals/", query_string={'cursor': 'nope'})
+        self.assert400(resp)
+
+    def test_cursor_over_api(self):
+        for p in Proposal.query.all():
+            p.status = ProposalStatus.LIVE
+        db.session.commit()
+        resp = self.app.get("/api/v1/proposals/", query_string={'cursor': ''})
+        self.assert200(resp)
+        self.assertEqual([p['proposalId'] for p in resp.json['items']], self.expected_ids()[:9])
+        self.assertIsNotNone(resp.json['nextCursor'])
+        self.assertIsNone(resp.json['prevCursor'])
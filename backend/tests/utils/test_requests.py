@@ -0,0 +1,60 @@
+import requests
+
+from grant.utils.exceptions import BlockchainException
+from grant.utils.requests import blockchain_client, blockchain_get, blockchain_post
+
+from ..config import BaseTestConfig
+from ..test_data import contribution_addresses
+
+ADDRESSES = ('GET', '/contribution/addresses')
+
+
+class TestBlockchainClient(BaseTestConfig):
+    def test_get(self):
+        self.assertEqual(blockchain_get('/contribution/addresses', {'contributionId': 1}), contribution_addresses)
+        session = blockchain_client.get_session()
+        blockchain_get('/contribution/addresses', {'contributionId': 2})
+        self.assertIs(blockchain_client.get_session(), session)
+        self.assertEqual(blockchain_client.stats()['latencies']['/contribution/addresses']['count'], 2)
+
+    def test_api_error_is_not_retried(self):
+        with self.assertRaises(BlockchainException):
+            blockchain_get('/unknown')
+        self.assertEqual(len(self.watcher.calls), 1)
+        self.assertEqual(blockchain_client.breaker.failures, 0)
+
+    def test_get_retries_server_errors(self):
+        self.watcher.routes['/contribution/addresses'] = 503
+        with self.assertRaises(BlockchainException):
+            blockchain_get('/contribution/addresses')
+        self.assertEqual(self.watcher.calls, [ADDRESSES] * 3)
+
+    def test_post_is_not_retried(self):
+        self.watcher.routes['/bootstrap'] = 503
+        with self.assertRaises(BlockchainException):
+            blockchain_post('/bootstrap', {'pendingContributions': []})
+        self.assertEqual(len(self.watcher.calls), 1)
+
+    def test_read_timeout(self):
+        self.watcher.delay = 1
+        with self.assertRaises(requests.Timeout):
+            blockchain_get('/contribution/addresses')
+        self.assertEqual(len(self.watcher.calls), 3)
+
+    def test_circuit_breaker(self):
+        self.watcher.routes['/contribution/addresses'] = 503
+        for _ in range(5):
+            with self.assertRaises(BlockchainException):
+                blockchain_get('/contribution/addresses')
+        self.assertTrue(blockchain_client.stats()['circuit']['open'])
+
+        # fails fast without calling the watcher
+        self.watcher.reset({'/contribution/addresses': contribution_addresses})
+        with self.assertRaises(BlockchainException):
+            blockchain_get('/contribution/addresses')
+        self.assertEqual(self.watcher.calls, [])
+
+        # until it's tried again, and closes when that goes through
+        blockchain_client.breaker.reset_timeout = 0
+        self.assertEqual(blockchain_get('/contribution/addresses'), contribution_addresses)
+        self.assertFalse(blockchain_client.stats()['circuit']['open'])
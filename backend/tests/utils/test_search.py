@@ -0,0 +1,62 @@
+from grant.comment.models import Comment
+from grant.proposal.models import Proposal, db
+from grant.user.models import User
+from grant.utils import pagination
+from grant.utils.search import search_terms, rebuild_search_vectors
+
+from ..config import BaseProposalCreatorConfig
+from .test_pagination import ids_schema
+
+
+class TestSearch(BaseProposalCreatorConfig):
+    def search_ids(self, paginate, query, search, sort=None):
+        page = paginate(schema=ids_schema, query=query, search=search, sort=sort)
+        return [item['id'] for item in page['items']]
+
+    def test_search_terms(self):
+        self.assertEqual(search_terms('  Zcash  GRANTS '), ['zcash', 'grants'])
+        self.assertEqual(search_terms('ron@example.com'), ['ron', 'example.com'])
+        self.assertEqual(search_terms("'; drop --"), ['drop'])
+
+    def test_proposal_search_covers_brief_and_content(self):
+        self.proposal.brief = 'Shielded wallet for everyone'
+        db.session.commit()
+
+        self.assertEqual(self.search_ids(pagination.proposal, Proposal.query, 'shielded'), [self.proposal.id])
+        self.assertEqual(self.search_ids(pagination.proposal, Proposal.query, 'SHIELD wallet'), [self.proposal.id])
+        self.assertEqual(self.search_ids(pagination.proposal, Proposal.query, 'shielded nothing'), [])
+
+    def test_search_vector_maintained_on_write(self):
+        comment = Comment(proposal_id=self.proposal.id, user_id=self.user.id, parent_comment_id=None,
+                          content='First version')
+        db.session.add(comment)
+        db.session.commit()
+        self.assertEqual(self.search_ids(pagination.comment, Comment.query, 'first'), [comment.id])
+
+        comment.content = 'Edited version'
+        db.session.commit()
+        self.assertEqual(self.search_ids(pagination.comment, Comment.query, 'first'), [])
+        self.assertEqual(self.search_ids(pagination.comment, Comment.query, 'edited'), [comment.id])
+
+    def test_user_search_by_partial_email(self):
+        ids = self.search_ids(pagination.user, User.query, self.user.email_address.split('@')[0])
+        self.assertEqual(ids, [self.user.id])
+        self.assertEqual(self.search_ids(pagination.user, User.query, self.user.email_address), [self.user.id])
+
+    def test_relevance_sort_requires_search(self):
+        self.assertEqual(
+            self.search_ids(pagination.proposal, Proposal.query, self.proposal.title, sort='RELEVANCE'),
+            [self.proposal.id]
+        )
+        with self.assertRaises(pagination.PaginationException):
+            self.search_ids(pagination.proposal, Proposal.query, None, sort='RELEVANCE')
+        with self.assertRaises(pagination.PaginationException):
+            self.search_ids(pagination.contribution, None, 'x', sort='RELEVANCE')
+
+    def test_rebuild_search_vectors(self):
+        db.session.execute(Proposal.__table__.update().values(search_vector=None))
+        db.session.commit()
+        self.assertEqual(self.search_ids(pagination.proposal, Proposal.query, self.proposal.title), [])
+
+        self.assertEqual(rebuild_search_vectors(Proposal), 2)
+        self.assertEqual(self.search_ids(pagination.proposal, Proposal.query, self.proposal.title), [self.proposal.id])